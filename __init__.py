@@ -1,4 +1,5 @@
 import bpy
+import fnmatch
 import os
 from bpy_extras.io_utils import ExportHelper,ImportHelper
 from bpy.types import Operator, OperatorFileListElement
@@ -6,7 +7,7 @@ from bpy.types import Operator, OperatorFileListElement
 from .importers import pack_import
 from .exporters import pack_export, archive_export
 from .ui import output, material
-from .operators import rip_mesh_uv_islands, triangulate, apply_modifiers, limit_bones, normalize_weights, open_url
+from .operators import rip_mesh_uv_islands, triangulate, apply_modifiers, limit_bones, normalize_weights, open_url, upgrade_textures
 from .util import log, show_blender_system_console
 
 class ImportReplicantMeshPack(bpy.types.Operator, ImportHelper):
@@ -17,6 +18,18 @@ class ImportReplicantMeshPack(bpy.types.Operator, ImportHelper):
     files : bpy.props.CollectionProperty(name="File Path", type=OperatorFileListElement)
     directory: bpy.props.StringProperty(subtype='DIR_PATH')
     extract_textures: bpy.props.BoolProperty(name="Extract Textures", description="This automatically extracts and tries to convert textures to PNG/TIF", default=True)
+    write_converted_textures: bpy.props.BoolProperty(name="Write PNG/TIF", description="Save converted copies of extracted textures to disk. When disabled, textures are decoded straight into Blender images, which can still be saved later from the Image Editor", default=True)
+    preview_resolution: bpy.props.EnumProperty(
+        name="Texture Resolution",
+        description="Only decode the smallest mip at or above this size, for quickly blocking out scenes. Materials can be upgraded to full resolution later from the material panel",
+        items=[
+            ('0', "Full", "Decode every texture at full resolution"),
+            ('1024', "1024 Preview", "Decode the smallest mip that is at least 1024 pixels"),
+            ('512', "512 Preview", "Decode the smallest mip that is at least 512 pixels"),
+            ('256', "256 Preview", "Decode the smallest mip that is at least 256 pixels"),
+        ],
+        default='0'
+    )
     construct_materials: bpy.props.BoolProperty(name="Construct Materials", description="This automatically sets up materials with the appropriate textures (Requires the user to have extracted the textures at least once before)", default=True)
     only_extract_textures: bpy.props.BoolProperty(name="Only Extract Textures", description="This can be used to simply extract the textures from a PACK containing some, nothing else will be done", default=False)
 
@@ -31,7 +44,38 @@ class ImportReplicantMeshPack(bpy.types.Operator, ImportHelper):
                 if self.only_extract_textures:
                     pack_import.only_extract_textures(filepath, __name__)
                 else:
-                    pack_import.main(filepath, self.extract_textures, self.construct_materials, __name__)
+                    pack_import.main(filepath, self.extract_textures, self.construct_materials, __name__, self.write_converted_textures, int(self.preview_resolution))
+        pack_import.clear_import_lists()
+        return {"FINISHED"}
+
+class ImportReplicantArchivePack(ImportReplicantMeshPack):
+    '''Import NieR Replicant Mesh Pack File(s) straight out of the game's archives'''
+    bl_idname = "import_scene.replicant_archive_pack"
+    bl_label = "Import From Archive"
+    filter_glob: bpy.props.StringProperty(default="*.arc", options={'HIDDEN'})
+    entry_pattern: bpy.props.StringProperty(name="Entries", description="Archive entries to import from the selected info.arc, wildcards allowed (e.g. *pl000*.pack)", default="")
+
+    def execute(self, context):
+        index_path = os.path.join(self.directory, self.files[0].name) if self.files else self.filepath
+        try:
+            reader = pack_import.get_archive_reader(index_path)
+        except Exception as e:
+            self.report({'ERROR'}, f"Failed to read archive index {index_path}: {e}")
+            return {'CANCELLED'}
+        names = [name for name in reader.by_name if fnmatch.fnmatch(name, self.entry_pattern)]
+        if not self.entry_pattern or not names:
+            self.report({'ERROR'}, f"No entries in {os.path.basename(index_path)} match '{self.entry_pattern}'")
+            return {'CANCELLED'}
+
+        show_blender_system_console()
+        bpy.context.scene.render.fps = 60
+        bpy.context.scene.frame_end = 600
+        for name in names:
+            pack_path = pack_import.make_archive_path(index_path, name)
+            if self.only_extract_textures:
+                pack_import.only_extract_textures(pack_path, __name__)
+            else:
+                pack_import.main(pack_path, self.extract_textures, self.construct_materials, __name__, self.write_converted_textures, int(self.preview_resolution))
         pack_import.clear_import_lists()
         return {"FINISHED"}
 
@@ -49,10 +93,12 @@ class Replicant2BlenderPreferences(bpy.types.AddonPreferences):
 # Registration
 def replicant_import_mesh_pack(self, context):
     self.layout.operator(ImportReplicantMeshPack.bl_idname, text="NieR Replicant Mesh Pack(s)")
+    self.layout.operator(ImportReplicantArchivePack.bl_idname, text="NieR Replicant Mesh Pack(s) from Archive")
 
 def register():
     log.d("Registering...")
     bpy.utils.register_class(ImportReplicantMeshPack)
+    bpy.utils.register_class(ImportReplicantArchivePack)
     bpy.types.TOPBAR_MT_file_import.append(replicant_import_mesh_pack)
     bpy.utils.register_class(Replicant2BlenderPreferences)
     pack_export.register()
@@ -63,6 +109,7 @@ def register():
     limit_bones.register()
     normalize_weights.register()
     open_url.register()
+    upgrade_textures.register()
     output.register()
     material.register()
     log.d("Registered")
@@ -71,6 +118,7 @@ def unregister():
     log.d("Unregistering...")
     material.unregister()
     output.unregister()
+    upgrade_textures.unregister()
     open_url.unregister()
     normalize_weights.unregister()
     limit_bones.unregister()
@@ -81,6 +129,7 @@ def unregister():
     pack_export.unregister()
     bpy.utils.unregister_class(Replicant2BlenderPreferences)
     bpy.types.TOPBAR_MT_file_import.remove(replicant_import_mesh_pack)
+    bpy.utils.unregister_class(ImportReplicantArchivePack)
     bpy.utils.unregister_class(ImportReplicantMeshPack)
     log.d("Unregistered")
 
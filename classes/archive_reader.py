@@ -0,0 +1,381 @@
+import os
+import posixpath
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+import zstandard as zstd
+
+from ..classes.bxon import BXON
+from ..classes.tp_archive_file_param import ArchiveLoadType, TpArchiveFileParam, TpFileEntry
+from ..util import log
+
+
+SECTOR_ALIGNMENT   = 16
+STREAM_READ_SIZE   = 1 << 20    # Decompressed bytes pulled from a single stream per read
+STREAM_WINDOW_SIZE = 64 << 20   # Most recently decompressed bytes kept for reads that step backwards
+
+
+class SingleStreamCursor:
+    """
+    Random access into one PRELOAD_DECOMPRESS archive's decompressed stream.
+
+    Zstd frames can only be decompressed front to back. The cursor keeps the
+    reader's position and a window of the most recently decompressed bytes, so
+    reads in offset order cost a single pass over the archive. A read before
+    the window restarts decompression from the beginning.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.reader = None
+        self.position = 0           # Decompressed offset the reader will return next
+        self.window = bytearray()   # Decompressed bytes [window_start, position)
+        self.window_start = 0
+        self.size: int | None = None
+
+    def _restart(self) -> None:
+        self.close()
+        self.file = open(self.path, 'rb')
+        content_size = zstd.get_frame_parameters(self.file.read(18)).content_size
+        self.size = content_size if content_size != zstd.CONTENTSIZE_UNKNOWN else None
+        self.file.seek(0)
+        self.reader = zstd.ZstdDecompressor().stream_reader(self.file, read_across_frames=True)
+        self.position = 0
+        self.window = bytearray()
+        self.window_start = 0
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Decompressed bytes [offset, offset + size), shorter if the stream ends first."""
+        with self.lock:
+            if self.reader is None or offset < self.window_start:
+                self._restart()
+            while self.position < offset + size:
+                chunk = self.reader.read(STREAM_READ_SIZE)
+                if not chunk:
+                    self.size = self.position
+                    break
+                self.window += chunk
+                self.position += len(chunk)
+                # Keep what this read still needs, plus up to a window of history
+                excess = min(len(self.window) - STREAM_WINDOW_SIZE, offset - self.window_start)
+                if excess > 0:
+                    del self.window[:excess]
+                    self.window_start += excess
+            start = offset - self.window_start
+            return bytes(self.window[start:start + size])
+
+    def get_size(self) -> int:
+        """Decompressed size of the stream, from the frame header or by decompressing to the end."""
+        with self.lock:
+            if self.reader is None:
+                self._restart()
+            if self.size is not None:
+                return self.size
+            while chunk := self.reader.read(STREAM_READ_SIZE):
+                self.window += chunk
+                self.position += len(chunk)
+                excess = len(self.window) - STREAM_WINDOW_SIZE
+                if excess > 0:
+                    del self.window[:excess]
+                    self.window_start += excess
+            self.size = self.position
+            return self.size
+
+    def close(self) -> None:
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ArchiveReader:
+    """
+    Reads files back out of .arc archives through their info.arc index.
+
+    The index is decompressed and parsed once. STREAM entries are fetched with
+    one positioned read and one frame decompression, so they can be read from
+    any number of threads. PRELOAD_DECOMPRESS entries go through a
+    SingleStreamCursor per archive.
+    """
+    def __init__(self, index_path: Path | str, archive_dir: Path | str | None = None):
+        self.index_path = Path(index_path)
+        self.archive_dir = Path(archive_dir) if archive_dir else self.index_path.parent
+
+        with open(self.index_path, 'rb') as f:
+            bxon = BXON.from_bytes(self._decompress(f.read()))
+        if bxon is None or not isinstance(bxon.asset_data, TpArchiveFileParam):
+            raise ValueError(f"Could not parse tpArchiveFileParam from: {self.index_path}")
+        self.version = bxon.version
+        self.project_id = bxon.project_id
+        self.param: TpArchiveFileParam = bxon.asset_data
+
+        self.by_name: dict[str, TpFileEntry] = self.param.by_name
+        self.by_hash: dict[int, TpFileEntry] = self.param.by_hash
+        self.by_basename: dict[str, list[str]] = {}
+        for entry in self.param.files:
+            self.by_basename.setdefault(entry.name.split("/")[-1], []).append(entry.name)
+
+        self._fds: dict[int, int] = {}
+        self._fds_lock = threading.Lock()
+        self._cursors: dict[int, SingleStreamCursor] = {}
+        # Single stream entries carry no size, each one ends where the next one (in offset order) begins
+        self._stream_ends: dict[int, dict[int, int]] = {}
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.by_name
+
+    def __len__(self) -> int:
+        return len(self.param.files)
+
+    @staticmethod
+    def _decompress(data: bytes, max_output_size: int = 0) -> bytes:
+        dctx = zstd.ZstdDecompressor()
+        try:
+            return dctx.decompress(data, max_output_size=max_output_size)
+        except zstd.ZstdError:
+            # Frame may lack embedded content size; use streaming reader
+            with dctx.stream_reader(data) as reader:
+                return reader.read()
+
+    def get_archive_path(self, archive_index: int) -> Path:
+        return self.archive_dir / self.param.archives[archive_index].filename
+
+    def get_load_type(self, entry: TpFileEntry) -> ArchiveLoadType:
+        return ArchiveLoadType(self.param.archives[entry.archive_index].load_type)
+
+    def get_entry(self, name_or_hash: str | int) -> TpFileEntry:
+        entry = self.by_hash.get(name_or_hash) if isinstance(name_or_hash, int) else self.by_name.get(name_or_hash)
+        if entry is None:
+            raise KeyError(f"{name_or_hash} is not in {self.index_path}")
+        return entry
+
+    def _pread(self, archive_index: int, size: int, offset: int) -> bytes:
+        if hasattr(os, "pread"):
+            with self._fds_lock:
+                fd = self._fds.get(archive_index)
+                if fd is None:
+                    fd = self._fds[archive_index] = os.open(self.get_archive_path(archive_index), os.O_RDONLY)
+            return os.pread(fd, size, offset)
+        # No positioned reads on Windows, a handle per read keeps threads from sharing a file position
+        with open(self.get_archive_path(archive_index), 'rb') as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def _get_cursor(self, archive_index: int) -> SingleStreamCursor:
+        with self._fds_lock:
+            if archive_index not in self._cursors:
+                self._cursors[archive_index] = SingleStreamCursor(self.get_archive_path(archive_index))
+            return self._cursors[archive_index]
+
+    def _get_stream_end(self, entry: TpFileEntry) -> int:
+        with self._fds_lock:
+            ends = self._stream_ends.get(entry.archive_index)
+            if ends is None:
+                offsets = sorted({f.raw_offset for f in self.param.files if f.archive_index == entry.archive_index})
+                ends = self._stream_ends[entry.archive_index] = dict(zip(offsets, offsets[1:]))
+        end = ends.get(entry.raw_offset)
+        return end if end is not None else self._get_cursor(entry.archive_index).get_size()
+
+    def read(self, name_or_hash: str | int) -> bytes:
+        """Decompressed contents of one archived file, by name or FNV-1 path hash."""
+        entry = self.get_entry(name_or_hash)
+        if self.get_load_type(entry) != ArchiveLoadType.PRELOAD_DECOMPRESS:
+            frame = self._pread(entry.archive_index, entry.size, entry.raw_offset)
+            if len(frame) != entry.size:
+                raise ValueError(f"{entry.name} runs past the end of {self.get_archive_path(entry.archive_index)}")
+            return self._decompress(frame)
+
+        data = self._get_cursor(entry.archive_index).read(entry.raw_offset, self._get_stream_end(entry) - entry.raw_offset)
+        # The span to the next entry includes its alignment padding, trim it using the PACK header's total size
+        if data[:4] == b'PACK' and len(data) >= 12:
+            total_size = struct.unpack_from('<I', data, 8)[0]
+            if len(data) - SECTOR_ALIGNMENT < total_size <= len(data):
+                data = data[:total_size]
+        return data
+
+    def extract(self, name_or_hash: str | int, output_dir: Path | str) -> Path:
+        entry = self.get_entry(name_or_hash)
+        output_path = Path(output_dir) / entry.name
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(self.read(entry.name))
+        return output_path
+
+    def extract_all(self, output_dir: Path | str, names: Iterable[str] | None = None, workers: int | None = None) -> list[Path]:
+        """
+        Extract files (all of them by default) under output_dir, keeping their archive paths.
+        STREAM entries are extracted in parallel. Single stream entries are read in offset
+        order so their archive is decompressed once.
+        """
+        entries = [self.get_entry(name) for name in names] if names is not None else list(self.param.files)
+        entries.sort(key=lambda entry: (entry.archive_index, entry.raw_offset))
+        stream_entries = [entry for entry in entries if self.get_load_type(entry) != ArchiveLoadType.PRELOAD_DECOMPRESS]
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            stream_paths = executor.map(lambda entry: self.extract(entry.name, output_dir), stream_entries)
+            # Meanwhile walk the single streams front to back on this thread
+            paths = [self.extract(entry.name, output_dir) for entry in entries if self.get_load_type(entry) == ArchiveLoadType.PRELOAD_DECOMPRESS]
+            paths.extend(stream_paths)
+        return paths
+
+    def close(self) -> None:
+        with self._fds_lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+            for cursor in self._cursors.values():
+                cursor.close()
+            self._cursors.clear()
+
+
+# Virtual paths address a file inside an archive set as "<path to info.arc>::<archive entry name>"
+ARCHIVE_PATH_SEPARATOR = "::"
+ARCHIVE_CACHE_BYTES    = 512 << 20   # Decompressed PACK blobs kept in memory across lookups
+
+archive_readers: dict[str, tuple[ArchiveReader, tuple]] = {}  # Reader and get_files_signature of its files when opened
+archive_readers_lock = threading.Lock()
+
+
+class BlobCache:
+    """Least recently used decompressed files, bounded by their total size."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.blobs: OrderedDict[str, bytes] = OrderedDict()
+        self.total = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            blob = self.blobs.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self.blobs.move_to_end(key)
+            self.hits += 1
+            return blob
+
+    def put(self, key: str, blob: bytes) -> None:
+        # A blob larger than the whole cache would only evict everything else
+        if len(blob) > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.blobs:
+                self.total -= len(self.blobs.pop(key))
+            self.blobs[key] = blob
+            self.total += len(blob)
+            while self.total > self.max_bytes:
+                _key, evicted = self.blobs.popitem(last=False)
+                self.total -= len(evicted)
+
+    def discard_prefix(self, prefix: str) -> None:
+        with self.lock:
+            for key in [key for key in self.blobs if key.startswith(prefix)]:
+                self.total -= len(self.blobs.pop(key))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.blobs.clear()
+            self.total = 0
+
+
+archive_blob_cache = BlobCache(ARCHIVE_CACHE_BYTES)
+
+
+def make_archive_path(index_path: str | Path, name: str) -> str:
+    return str(index_path) + ARCHIVE_PATH_SEPARATOR + name
+
+
+def split_archive_path(path: str | Path) -> tuple[str, str] | None:
+    """(info.arc path, entry name) of a virtual path, None for a regular one."""
+    path = str(path)
+    # Skip past a Windows drive letter so "C:" is never taken for the separator
+    separator = path.find(ARCHIVE_PATH_SEPARATOR, 2)
+    if separator == -1:
+        return None
+    return path[:separator], path[separator + len(ARCHIVE_PATH_SEPARATOR):].replace("\\", "/").lstrip("/")
+
+
+def is_archive_path(path: str | Path) -> bool:
+    return split_archive_path(path) is not None
+
+
+def get_files_signature(reader: ArchiveReader) -> tuple:
+    """Size and mtime of the index and every archive it lists, None for missing files."""
+    signature = []
+    for path in [reader.index_path] + [reader.get_archive_path(i) for i in range(len(reader.param.archives))]:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def get_archive_reader(index_path: str | Path) -> ArchiveReader:
+    """Shared reader of an info.arc, reopened when the index or one of its archives was rewritten since."""
+    key = os.path.normcase(os.path.abspath(index_path))
+    with archive_readers_lock:
+        cached = archive_readers.get(key)
+        if cached is not None:
+            reader, signature = cached
+            if get_files_signature(reader) == signature:
+                return reader
+            log.d(f"{key} changed on disk, reopening it")
+            reader.close()
+            archive_blob_cache.discard_prefix(make_archive_path(reader.index_path, ""))
+        reader = ArchiveReader(key)
+        archive_readers[key] = (reader, get_files_signature(reader))
+        return reader
+
+
+def read_archive_path(path: str | Path) -> bytes:
+    """Contents of the file behind a virtual path, decompressed on first use and then served from the LRU."""
+    index_path, name = split_archive_path(path)
+    reader = get_archive_reader(index_path)
+    key = make_archive_path(reader.index_path, name)
+    blob = archive_blob_cache.get(key)
+    if blob is None:
+        blob = reader.read(name)
+        archive_blob_cache.put(key, blob)
+    return blob
+
+
+def resolve_archive_import(archive_path: str, import_path: str) -> str | None:
+    """
+    Virtual path of a PACK imported by the PACK at archive_path, looked up in the same archive set:
+    by its full import path, then next to the importing PACK, then by filename anywhere.
+    """
+    index_path, name = split_archive_path(archive_path)
+    reader = get_archive_reader(index_path)
+    import_path = import_path.lstrip("/")
+    filename = import_path.split("/")[-1]
+    candidates = [import_path, posixpath.join(posixpath.dirname(name), filename)]
+    candidates += [candidate + ".xap" for candidate in candidates]
+    for candidate in candidates:
+        if candidate in reader:
+            return make_archive_path(index_path, candidate)
+    matches = reader.by_basename.get(filename) or reader.by_basename.get(filename + ".xap")
+    return make_archive_path(index_path, matches[0]) if matches else None
+
+
+def clear_archive_readers() -> None:
+    with archive_readers_lock:
+        for reader, _signature in archive_readers.values():
+            reader.close()
+        archive_readers.clear()
+    archive_blob_cache.clear()
@@ -328,6 +328,10 @@ class Pack:
 
     @classmethod
     def from_file(cls, filepath: str) -> 'Pack':
+        """Parse a PACK from disk, or from an archive set given a virtual path (see archive_reader.split_archive_path)."""
+        from .archive_reader import is_archive_path, read_archive_path
+        if is_archive_path(filepath):
+            return cls.from_bytes(read_archive_path(filepath))
         with open(filepath, 'rb') as f:
             return cls.from_stream(f)
 
@@ -1,8 +1,12 @@
 import struct
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from enum import IntEnum
+from itertools import chain
 from typing import BinaryIO
 
+import numpy as np
+
 from ..classes.binary_writer import BinaryWriter
 from ..classes.common import read_string
 from ..util import fnv1
@@ -10,6 +14,57 @@ from ..util import fnv1
 
 ARC_OFFSET_SCALE = 4
 
+# Fixed 28-byte row of the file table, name_offset is relative to its own field
+FILE_ENTRY_DTYPE = np.dtype([
+    ('path_hash', '<u4'),
+    ('name_offset', '<u4'),
+    ('scaled_offset', '<u4'),
+    ('size', '<u4'),
+    ('pack_serialized_size', '<u4'),
+    ('pack_resource_size', '<u4'),
+    ('archive_index', 'u1'),
+    ('flags', 'u1'),
+    ('padding', 'V2'),
+])
+NAME_FIELD_OFFSET = FILE_ENTRY_DTYPE.fields['name_offset'][1]
+
+PATH_HASH_CACHE_SIZE = 1 << 17
+
+
+@lru_cache(maxsize=PATH_HASH_CACHE_SIZE)
+def get_path_hash(name: str) -> int:
+    """fnv1 of a file name, memoized so re-exporting an index does not hash its names again."""
+    return fnv1(name)
+
+
+def read_string_pool(stream: BinaryIO, positions: np.ndarray) -> list[str]:
+    """Strings at the given absolute positions, read from the stream in one pass."""
+    if len(positions) == 0:
+        return []
+    pool_start = int(positions.min())
+    stream.seek(pool_start)
+    pool = stream.read()
+    # Split the pool once and map each string start, pointers into the middle of a string fall back to a search
+    strings: dict[int, str] = {}
+    start = 0
+    for raw in pool.split(b'\x00'):
+        strings[start] = raw.decode('utf-8', errors='replace')
+        start += len(raw) + 1
+    names = []
+    for position in (positions - pool_start).tolist():
+        name = strings.get(position)
+        if name is None:
+            end = pool.find(b'\x00', position)
+            name = pool[position:end if end >= 0 else len(pool)].decode('utf-8', errors='replace')
+        names.append(name)
+    return names
+
+
+def get_offset_scales(archives: list['TpArchiveEntry'], archive_indices: np.ndarray) -> np.ndarray:
+    """Offset scale of each row's archive, 0 for rows pointing past the archive table."""
+    scales = np.array([archive.arc_offset_scale for archive in archives] + [0], dtype=np.uint64)
+    return scales[np.minimum(archive_indices, len(archives))]
+
 
 class ArchiveLoadType(IntEnum):
     PRELOAD_DECOMPRESS = 0   # Single compressed stream; game decompresses all at load
@@ -87,6 +142,9 @@ class TpFileEntry:
 class TpArchiveFileParam:
     archives: list[TpArchiveEntry]
     files: list[TpFileEntry]
+    # Filled by from_stream, not kept in sync with later changes to files
+    by_name: dict[str, TpFileEntry] = field(default_factory=dict, repr=False, compare=False)
+    by_hash: dict[int, TpFileEntry] = field(default_factory=dict, repr=False, compare=False)
 
     @classmethod
     def from_stream(cls, stream: BinaryIO) -> 'TpArchiveFileParam':
@@ -104,12 +162,27 @@ class TpArchiveFileParam:
                 archives.append(TpArchiveEntry.from_stream(stream))
 
         files: list[TpFileEntry] = []
+        by_name: dict[str, TpFileEntry] = {}
+        by_hash: dict[int, TpFileEntry] = {}
         if num_files > 0:
-            stream.seek(table_base + offset_to_table)
-            for _ in range(num_files):
-                files.append(TpFileEntry.from_stream(stream, archives))
-
-        return cls(archives=archives, files=files)
+            table_start = table_base + offset_to_table
+            stream.seek(table_start)
+            rows = np.frombuffer(stream.read(num_files * FILE_ENTRY_DTYPE.itemsize), dtype=FILE_ENTRY_DTYPE)
+            name_positions = table_start + np.arange(num_files, dtype=np.int64) * FILE_ENTRY_DTYPE.itemsize + NAME_FIELD_OFFSET + rows['name_offset']
+            names = read_string_pool(stream, name_positions)
+            raw_offsets = rows['scaled_offset'].astype(np.uint64) << get_offset_scales(archives, rows['archive_index'])
+
+            for name, path_hash, raw_offset, size, serialized, resource, archive_index, flags in zip(
+                names, rows['path_hash'].tolist(), raw_offsets.tolist(), rows['size'].tolist(),
+                rows['pack_serialized_size'].tolist(), rows['pack_resource_size'].tolist(),
+                rows['archive_index'].tolist(), rows['flags'].tolist(),
+            ):
+                entry = TpFileEntry(name, raw_offset, size, serialized, resource, archive_index, flags)
+                files.append(entry)
+                by_name[name] = entry
+                by_hash[path_hash] = entry
+
+        return cls(archives=archives, files=files, by_name=by_name, by_hash=by_hash)
 
     def write_to(self, writer: BinaryWriter) -> None:
         # Header
@@ -120,10 +193,16 @@ class TpArchiveFileParam:
         file_table_base = writer.tell()
         file_table_ph   = writer.write_placeholder('<I', file_table_base)
 
-        # Collect (placeholder_pos, string) pairs for deferred string pool
-        string_refs: list[tuple[int, str]] = []
+        # Lay out the string pool up front, each unique string is written once
+        string_offsets: dict[str, int] = {}
+        pool = bytearray()
+        for string in chain((entry.filename for entry in self.archives), (entry.name for entry in self.files)):
+            if string not in string_offsets:
+                string_offsets[string] = len(pool)
+                pool += string.encode('utf-8') + b'\x00'
 
         # Archive entry array
+        archive_name_phs: list[tuple[int, str]] = []
         if self.archives:
             writer.align(16)
             writer.patch_placeholder(arc_array_ph, writer.tell())
@@ -133,34 +212,30 @@ class TpArchiveFileParam:
                 writer.write_struct('<I', entry.arc_offset_scale)
                 writer.write_struct('<B', entry.load_type)
                 writer.write(b'\x00\x00\x00')  # padding
-                string_refs.append((name_ph, entry.filename))
+                archive_name_phs.append((name_ph, entry.filename))
 
         # File entry table
+        writer.align(16)
+        table_start = writer.tell()
+        table_size = len(self.files) * FILE_ENTRY_DTYPE.itemsize
+        pool_start = table_start + table_size + (16 - table_size % 16) % 16
         if self.files:
-            writer.align(16)
-            writer.patch_placeholder(file_table_ph, writer.tell())
-            for entry in self.files:
-                writer.write_struct('<I', fnv1(entry.name))
-                name_field_pos = writer.tell()
-                name_ph = writer.write_placeholder('<I', name_field_pos)
-                scale = (
-                    self.archives[entry.archive_index].arc_offset_scale
-                    if entry.archive_index < len(self.archives) else 0
-                )
-                writer.write_struct('<I', (entry.raw_offset >> scale) & 0xFFFFFFFF)
-                writer.write_struct('<I', entry.size)
-                writer.write_struct('<I', entry.pack_file_serialized_size)
-                writer.write_struct('<I', entry.pack_file_resource_size)
-                writer.write_struct('<B', entry.archive_index)
-                writer.write_struct('<B', entry.flags)
-                writer.write(b'\x00\x00')  # padding
-                string_refs.append((name_ph, entry.name))
-
-        # String pool — write each unique string once, patch all referencing placeholders
+            writer.patch_placeholder(file_table_ph, table_start)
+            rows = np.zeros(len(self.files), dtype=FILE_ENTRY_DTYPE)
+            rows['path_hash'] = [get_path_hash(entry.name) for entry in self.files]
+            rows['archive_index'] = [entry.archive_index for entry in self.files]
+            rows['flags'] = [entry.flags for entry in self.files]
+            rows['size'] = [entry.size for entry in self.files]
+            rows['pack_serialized_size'] = [entry.pack_file_serialized_size for entry in self.files]
+            rows['pack_resource_size'] = [entry.pack_file_resource_size for entry in self.files]
+            raw_offsets = np.array([entry.raw_offset for entry in self.files], dtype=np.uint64)
+            rows['scaled_offset'] = (raw_offsets >> get_offset_scales(self.archives, rows['archive_index'])) & 0xFFFFFFFF
+            name_fields = table_start + np.arange(len(self.files), dtype=np.int64) * FILE_ENTRY_DTYPE.itemsize + NAME_FIELD_OFFSET
+            rows['name_offset'] = pool_start + np.array([string_offsets[entry.name] for entry in self.files], dtype=np.int64) - name_fields
+            writer.write(rows.tobytes())
+
+        # String pool
         writer.align(16)
-        written_strings: dict[str, int] = {}
-        for ph, s in string_refs:
-            if s not in written_strings:
-                written_strings[s] = writer.tell()
-                writer.write_string(s)
-            writer.patch_placeholder(ph, written_strings[s])
+        writer.write(bytes(pool))
+        for name_ph, filename in archive_name_phs:
+            writer.patch_placeholder(name_ph, pool_start + string_offsets[filename])
@@ -1,18 +1,29 @@
+import hashlib
+import json
 import os
-from dataclasses import dataclass
+import posixpath
+import queue
+import struct
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
 from pathlib import Path
+import threading
 import time
-from typing import Optional
+from typing import Iterator, Optional, TypeVar
 
 import bpy
 from bpy.types import Operator, UILayout
-from bpy_extras.io_utils import ExportHelper
+from bpy_extras.io_utils import ExportHelper, ImportHelper
 
 import zstandard as zstd
 
 from ..util import label_multiline, log
+from ..classes.archive_reader import ArchiveReader
 from ..classes.binary_writer import BinaryWriter
 from ..classes.bxon import BXON
+from ..classes.common import Import
 from ..classes.pack import PackHeader
 from ..classes.tp_archive_file_param import (
     ArchiveLoadType,
@@ -28,6 +39,16 @@ BXON_VERSION     = 0x20090422
 BXON_PROJECT_ID  = 0xD3ADC0DE
 ZSTD_LEVEL       = 1
 ZSTD_WINDOW_LOG  = 15          # higher causes game crash
+ZSTD_MAX_LEVEL   = 19          # Levels above this only exist for larger windows
+COMPRESS_QUEUE_DEPTH = 4       # Frames in flight per compression thread
+STREAM_CHUNK_SIZE = 1 << 20    # Read size when streaming inputs into a single-stream archive
+PACK_HEADER_SIZE = 44          # Bytes PackHeader.from_stream reads
+ARCHIVE_MANIFEST_SUFFIX  = ".manifest.json"  # Sidecar of a STREAM .arc, see build_separate_frames
+ARCHIVE_MANIFEST_VERSION = 2
+ARCHIVE_DICT_ID = 0             # Frames are compressed without a dictionary, the Lunar Tear loader cannot use one
+ZSTD_DICT_SIZE   = 112640      # Trained dictionary size, zstd's own default
+DICT_MAX_INPUT_SIZE = 64 << 10 # Only PACKs up to this size are small enough to gain from a dictionary
+LEVEL_BENCHMARK_SAMPLE_SIZE = 64 << 20  # Input bytes compressed per level when tuning
 
 
 @dataclass
@@ -45,10 +66,79 @@ class ArchiveEntryInfo:
     pack_resource_size: int
 
 
-def zstd_compress(data: bytes) -> bytes:
-    params = zstd.ZstdCompressionParameters.from_level(ZSTD_LEVEL, window_log=ZSTD_WINDOW_LOG)
-    cctx = zstd.ZstdCompressor(compression_params=params)
-    return cctx.compress(data)
+@dataclass
+class CompressedFrame:
+    serialized_size: int
+    resource_size: int
+    raw_size: int
+    mtime: int            # st_mtime_ns of the input when it was read
+    content_hash: str
+    data: bytes
+    reused: bool = False  # Copied from the previous .arc instead of compressed
+    duplicate_of: int | None = None  # Index of an earlier input with the same bytes, data is empty
+
+
+@dataclass
+class LoadedInput:
+    index: int
+    size: int
+    mtime: int
+    content_hash: str
+    raw: bytes | None = None     # None when the frame is reused or a duplicate
+    frame: CompressedFrame | None = None
+
+
+@dataclass
+class ArchiveIOStats:
+    """File operations on the inputs during one build."""
+    opens: int = 0
+    stats: int = 0
+    reads: int = 0
+    bytes_read: int = 0
+
+    def log(self, inputs: int) -> None:
+        log.d(f"Read {inputs} inputs with {self.opens} opens, {self.stats} stats and {self.reads} reads ({self.bytes_read / (1024 * 1024):.2f} MB)")
+
+
+@dataclass
+class ArchiveVerifyResult:
+    checked: int = 0
+    mismatches: list[str] = field(default_factory=list)
+    unsourced: int = 0     # Entries with no source file to compare against
+    missing: list[str] = field(default_factory=list)  # Source files with no entry
+    compressed_bytes: int = 0
+    raw_bytes: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class LevelBenchmark:
+    level: int
+    ratio: float
+    compress_mbs: float
+    decompress_mbs: float
+
+
+# Each worker thread keeps its own compressor, a ZstdCompressor must not be shared between threads
+_thread_local = threading.local()
+
+
+def get_zstd_params(level: int = ZSTD_LEVEL) -> zstd.ZstdCompressionParameters:
+    return zstd.ZstdCompressionParameters.from_level(level, window_log=ZSTD_WINDOW_LOG)
+
+
+def get_zstd_compressor(level: int = ZSTD_LEVEL) -> zstd.ZstdCompressor:
+    cctxs = getattr(_thread_local, "cctxs", None)
+    if cctxs is None:
+        cctxs = _thread_local.cctxs = {}
+    cctx = cctxs.get(level)
+    if cctx is None:
+        cctx = cctxs[level] = zstd.ZstdCompressor(compression_params=get_zstd_params(level))
+    return cctx
+
+
+def zstd_compress(data: bytes, level: int = ZSTD_LEVEL) -> bytes:
+    return get_zstd_compressor(level).compress(data)
 
 
 def zstd_decompress(data: bytes) -> bytes:
@@ -64,7 +154,14 @@ def zstd_decompress(data: bytes) -> bytes:
 def get_pack_file_sizes(filepath: Path) -> tuple[int, int, int]:
     """Return (serialized_size, resource_size, total_size) from a PACK file header."""
     with open(filepath, 'rb') as f:
-        header = PackHeader.from_stream(f)
+        return parse_pack_sizes(f.read(PACK_HEADER_SIZE), filepath)
+
+
+def parse_pack_sizes(data: bytes, filepath: Path) -> tuple[int, int, int]:
+    """get_pack_file_sizes for a file already in memory, data only needs to hold the header."""
+    if len(data) < PACK_HEADER_SIZE:
+        raise ValueError(f"Not a PACK file (too short): {filepath}")
+    header = PackHeader.from_stream(BytesIO(data[:PACK_HEADER_SIZE]))
     if header.magic != b'PACK':
         raise ValueError(f"Not a PACK file (bad magic): {filepath}")
     return header.pack_serialized_size, header.pack_files_data_size, header.pack_total_size
@@ -84,88 +181,731 @@ def scan_inputs(input_dirs: list[str | Path]) -> list[ArchiveInput]:
     return inputs
 
 
-def build_separate_frames(output_path: Path, inputs: list[ArchiveInput]) -> list[ArchiveEntryInfo]:
+def read_pack_imports(filepath: Path) -> list[str]:
+    """Import paths from a PACK header, empty for anything that is not a PACK."""
+    with open(filepath, 'rb') as f:
+        header = PackHeader.from_stream(f)
+        if header.magic != b'PACK' or header.imports_count == 0:
+            return []
+        f.seek(header.imports_offset)
+        return [Import.from_stream(f).path for _ in range(header.imports_count)]
+
+
+def get_input_imports(inputs: list[ArchiveInput]) -> dict[str, list[str]]:
+    """
+    Names of the inputs each input imports. Import paths are matched like on
+    import: by full path, then next to the importer, then by filename anywhere.
+    Imports that are not part of the archive are left out.
+    """
+    by_name = {inp.name: inp for inp in inputs}
+    by_basename: dict[str, list[str]] = {}
+    for inp in inputs:
+        by_basename.setdefault(posixpath.basename(inp.name), []).append(inp.name)
+
+    graph: dict[str, list[str]] = {}
+    for inp in inputs:
+        try:
+            import_paths = read_pack_imports(inp.full_path)
+        except (OSError, struct.error) as e:
+            log.w(f"Could not read the imports of {inp.name}: {e}")
+            import_paths = []
+        dependencies = []
+        for import_path in import_paths:
+            import_path = import_path.lstrip("/")
+            filename = posixpath.basename(import_path)
+            candidates = [import_path, posixpath.join(posixpath.dirname(inp.name), filename)]
+            candidates += [candidate + ".xap" for candidate in candidates]
+            match = next((candidate for candidate in candidates if candidate in by_name), None)
+            if match is None:
+                matches = by_basename.get(filename) or by_basename.get(filename + ".xap")
+                match = matches[0] if matches else None
+            if match is not None and match != inp.name and match not in dependencies:
+                dependencies.append(match)
+        graph[inp.name] = dependencies
+    return graph
+
+
+def get_load_order(root: str, graph: dict[str, list[str]]) -> list[str]:
+    """
+    Order importing root loads its PACKs in, breadth-first like pack_import.main:
+    the root (a mesh), then all of its imports (its materials), then all of
+    theirs (their textures).
+    """
+    order = [root]
+    seen = {root}
+    level = [root]
+    while level:
+        next_level = []
+        for name in level:
+            for dependency in graph.get(name, []):
+                if dependency not in seen:
+                    seen.add(dependency)
+                    next_level.append(dependency)
+        order.extend(next_level)
+        level = next_level
+    return order
+
+
+def get_import_roots(inputs: list[ArchiveInput], graph: dict[str, list[str]]) -> list[str]:
+    """Inputs nobody imports, in input order."""
+    imported = {name for dependencies in graph.values() for name in dependencies}
+    return [inp.name for inp in inputs if inp.name not in imported]
+
+
+def order_inputs_by_imports(inputs: list[ArchiveInput], graph: dict[str, list[str]]) -> list[ArchiveInput]:
+    """
+    Lay every PACK nobody imports out in its load order (see get_load_order).
+    A PACK shared by several importers stays with the first one.
+    """
+    by_name = {inp.name: inp for inp in inputs}
+    # Roots first, then whatever only sits in import cycles
+    roots = get_import_roots(inputs, graph) + [inp.name for inp in inputs]
+
+    ordered: list[ArchiveInput] = []
+    placed: set[str] = set()
+    for root in roots:
+        if root in placed:
+            continue
+        for name in get_load_order(root, graph):
+            if name not in placed:
+                placed.add(name)
+                ordered.append(by_name[name])
+    return ordered
+
+
+def measure_import_seeks(inputs: list[ArchiveInput], graph: dict[str, list[str]]) -> tuple[int, int]:
+    """
+    Bytes skipped between consecutive reads while each root loads its PACKs in
+    load order, if inputs were stored uncompressed in this order. Returns the
+    total and the number of reads measured.
+    """
+    starts: dict[str, int] = {}
+    ends: dict[str, int] = {}
+    position = 0
+    for inp in inputs:
+        position += (SECTOR_ALIGNMENT - position % SECTOR_ALIGNMENT) % SECTOR_ALIGNMENT
+        starts[inp.name] = position
+        position += inp.full_path.stat().st_size
+        ends[inp.name] = position
+
+    total = 0
+    reads = 0
+    for root in get_import_roots(inputs, graph):
+        order = get_load_order(root, graph)
+        for previous, name in zip(order, order[1:]):
+            total += abs(starts[name] - ends[previous])
+            reads += 1
+    return total, reads
+
+
+def layout_inputs_by_imports(inputs: list[ArchiveInput]) -> list[ArchiveInput]:
+    """
+    Reorder inputs by their import graph if that shortens the seeks while loading,
+    otherwise keep the name order. Logs the seek distance of both.
+    """
+    graph = get_input_imports(inputs)
+    ordered = order_inputs_by_imports(inputs, graph)
+    before, reads = measure_import_seeks(inputs, graph)
+    after, _reads = measure_import_seeks(ordered, graph)
+    if not reads:
+        log.i("No imports between the archive inputs, keeping the name order")
+        return inputs
+
+    summary = (f"seek distance {before / (1024 * 1024):.2f} MB by name, {after / (1024 * 1024):.2f} MB by imports over {reads} reads "
+               f"(mean {before / reads / 1024:.1f} KB, {after / reads / 1024:.1f} KB)")
+    if after >= before:
+        log.i(f"Import graph layout would not shorten seeks, keeping the name order: {summary}")
+        return inputs
+    log.i(f"Laid out by import graph: {summary}")
+    return ordered
+
+
+def hash_content(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def find_duplicate_inputs(inputs: list[ArchiveInput], stats: ArchiveIOStats) -> tuple[dict[int, int], list[int]]:
+    """
+    Map the index of every input whose bytes repeat an earlier input to the index
+    of that first occurrence. Only inputs sharing a size with another are read
+    and hashed. Also returns the size of every input.
+    """
+    sizes = [inp.full_path.stat().st_size for inp in inputs]
+    stats.stats += len(inputs)
+    by_size: dict[int, list[int]] = {}
+    for i, size in enumerate(sizes):
+        by_size.setdefault(size, []).append(i)
+
+    duplicates: dict[int, int] = {}
+    for indices in by_size.values():
+        if len(indices) < 2:
+            continue
+        first_by_hash: dict[str, int] = {}
+        for i in indices:
+            with open(inputs[i].full_path, 'rb') as src:
+                raw = src.read()
+            stats.opens += 1
+            stats.reads += 1
+            stats.bytes_read += len(raw)
+            first = first_by_hash.setdefault(hash_content(raw), i)
+            if first != i:
+                duplicates[i] = first
+    return duplicates, sizes
+
+
+def read_input_chunks(inputs: list[ArchiveInput], indices: list[int], stats: ArchiveIOStats) -> Iterator[tuple[int, bytes, bool]]:
+    """(input index, chunk, is first chunk) for each input in turn, every input yields at least one chunk."""
+    for i in indices:
+        with open(inputs[i].full_path, 'rb') as src:
+            stats.opens += 1
+            first = True
+            while True:
+                chunk = src.read(STREAM_CHUNK_SIZE)
+                stats.reads += 1
+                stats.bytes_read += len(chunk)
+                if not chunk and not first:
+                    break
+                yield i, chunk, first
+                first = False
+
+
+def log_duplicate_inputs(inputs: list[ArchiveInput], duplicates: dict[int, int], saved_bytes: int, saved_seconds: float) -> None:
+    if not duplicates:
+        return
+    for i, first in duplicates.items():
+        log.d(f"{inputs[i].name} is identical to {inputs[first].name}, sharing its data")
+    log.i(f"Deduplicated {len(duplicates)} identical inputs, saved {saved_bytes / (1024 * 1024):.2f} MB in the archive and ~{saved_seconds:.4f} seconds of compression")
+
+
+T = TypeVar('T')
+
+
+def prefetch(items: Iterator[T], depth: int) -> Iterator[T]:
+    """
+    Run the items iterator on a background thread, up to depth items ahead of
+    the consumer. Exceptions are raised in the consumer, and the producer stops
+    when the consumer does.
+    """
+    ready: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except BaseException as e:
+            put((end, e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = ready.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def load_inputs(inputs: list[ArchiveInput], previous: dict[str, dict], previous_arc_path: Path | None, stats: ArchiveIOStats) -> Iterator[LoadedInput]:
+    """
+    Read and hash every input once, in order. Inputs whose bytes repeat an earlier
+    input become duplicates of it. Unchanged inputs (same size and mtime, or same
+    size and content hash if only the mtime moved) get their frame copied from
+    the previous .arc, those unchanged by mtime are not read at all. Everything
+    else is returned with its bytes, to be compressed.
+    """
+    first_by_hash: dict[str, int] = {}
+    previous_arc = open(previous_arc_path, 'rb') if previous_arc_path is not None else None
+    try:
+        for i, inp in enumerate(inputs):
+            record = previous.get(inp.name) if previous_arc is not None else None
+            stat = inp.full_path.stat()
+            stats.stats += 1
+            raw = None
+            if record is not None and stat.st_size == record["size"] and stat.st_mtime_ns == record["mtime"]:
+                content_hash = record["hash"]
+            else:
+                with open(inp.full_path, 'rb') as src:
+                    raw = src.read()
+                stats.opens += 1
+                stats.reads += 1
+                stats.bytes_read += len(raw)
+                content_hash = hash_content(raw)
+            loaded = LoadedInput(i, len(raw) if raw is not None else stat.st_size, stat.st_mtime_ns, content_hash)
+
+            first = first_by_hash.setdefault(content_hash, i)
+            if first != i:
+                loaded.frame = CompressedFrame(0, 0, loaded.size, loaded.mtime, content_hash, b'', duplicate_of=first)
+                yield loaded
+                continue
+
+            if record is not None and loaded.size == record["size"] and content_hash == record["hash"]:
+                previous_arc.seek(record["offset"])
+                compressed = previous_arc.read(record["compressed_size"])
+                if len(compressed) == record["compressed_size"]:
+                    loaded.frame = CompressedFrame(record["serialized_size"], record["resource_size"], loaded.size, loaded.mtime, content_hash, compressed, reused=True)
+                    yield loaded
+                    continue
+                if raw is None:
+                    with open(inp.full_path, 'rb') as src:
+                        raw = src.read()
+                    stats.opens += 1
+                    stats.reads += 1
+                    stats.bytes_read += len(raw)
+            loaded.raw = raw
+            yield loaded
+    finally:
+        if previous_arc is not None:
+            previous_arc.close()
+
+
+def compress_loaded(inp: ArchiveInput, loaded: LoadedInput, level: int = ZSTD_LEVEL) -> CompressedFrame:
+    if loaded.frame is not None:
+        return loaded.frame
+    serialized_size, resource_size, _total = parse_pack_sizes(loaded.raw, inp.full_path)
+    return CompressedFrame(serialized_size, resource_size, loaded.size, loaded.mtime, loaded.content_hash, zstd_compress(loaded.raw, level))
+
+
+def compress_inputs(inputs: list[ArchiveInput], workers: int, previous: dict[str, dict] | None = None, previous_arc_path: Path | None = None,
+                    level: int = ZSTD_LEVEL, stats: ArchiveIOStats | None = None) -> Iterator[CompressedFrame]:
+    """
+    Yield a frame per input in input order. A producer thread reads, hashes and
+    deduplicates inputs (see load_inputs) while up to workers frames compress
+    concurrently. zstandard and hashlib release the GIL, so reading, hashing and
+    compressing overlap. Only a bounded window of inputs is held in memory at once.
+    """
+    depth = workers * COMPRESS_QUEUE_DEPTH
+    loaded_inputs = prefetch(load_inputs(inputs, previous or {}, previous_arc_path, stats or ArchiveIOStats()), depth)
+    try:
+        if workers <= 1:
+            for loaded in loaded_inputs:
+                yield compress_loaded(inputs[loaded.index], loaded, level)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            window: deque[Future] = deque()
+            try:
+                for loaded in loaded_inputs:
+                    window.append(executor.submit(compress_loaded, inputs[loaded.index], loaded, level))
+                    if len(window) >= depth:
+                        yield window.popleft().result()
+                while window:
+                    yield window.popleft().result()
+            finally:
+                for future in window:
+                    future.cancel()
+    finally:
+        loaded_inputs.close()
+
+
+def get_archive_manifest_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ARCHIVE_MANIFEST_SUFFIX)
+
+
+def load_archive_manifest(output_path: Path, level: int = ZSTD_LEVEL, dict_id: int = ARCHIVE_DICT_ID) -> dict[str, dict]:
+    """Per-input records of the previous build of output_path, empty if they cannot be trusted or were compressed differently."""
+    try:
+        with open(get_archive_manifest_path(output_path), 'r') as f:
+            manifest = json.load(f)
+        arc_stat = output_path.stat()
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != ARCHIVE_MANIFEST_VERSION or manifest.get("zstd") != [level, ZSTD_WINDOW_LOG] or manifest.get("dict_id") != dict_id:
+        return {}
+    # The .arc was rewritten by something else since the manifest was saved
+    if manifest.get("arc_size") != arc_stat.st_size or manifest.get("arc_mtime") != arc_stat.st_mtime_ns:
+        return {}
+    return manifest["inputs"]
+
+
+def save_archive_manifest(output_path: Path, inputs: dict[str, dict], level: int = ZSTD_LEVEL, dict_id: int = ARCHIVE_DICT_ID) -> None:
+    arc_stat = output_path.stat()
+    manifest = {
+        "version": ARCHIVE_MANIFEST_VERSION,
+        "zstd": [level, ZSTD_WINDOW_LOG],
+        "dict_id": dict_id,
+        "arc_size": arc_stat.st_size,
+        "arc_mtime": arc_stat.st_mtime_ns,
+        "inputs": inputs,
+    }
+    with open(get_archive_manifest_path(output_path), 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+
+def build_separate_frames(output_path: Path, inputs: list[ArchiveInput], workers: int | None = None, incremental: bool = False, level: int = ZSTD_LEVEL) -> list[ArchiveEntryInfo]:
     """
     SeparateFrames mode (load type 1/2 — STREAM / STREAM_ONDEMAND).
 
     Each input file is compressed into its own Zstd frame, written sequentially
     to output_path with 16-byte alignment padding between frames.
     The entry offset is the byte position of the frame within the .arc file.
+    Every input is read once. Frames are compressed on a thread pool but
+    written in input order, so the output is byte-identical for any worker
+    count. Inputs with identical bytes share one frame.
+
+    When incremental, a sidecar manifest records every input's frame. The next
+    incremental build at the same level copies frames of unchanged inputs from
+    the previous .arc and only compresses the rest. Other builds delete the
+    manifest, it would no longer describe the .arc.
     """
+    workers = workers or os.cpu_count() or 1
+    previous = load_archive_manifest(output_path, level) if incremental else {}
+    if not incremental:
+        get_archive_manifest_path(output_path).unlink(missing_ok=True)
+    # Write next to the previous .arc, frames are still being copied out of it
+    build_path = output_path.with_name(output_path.name + ".tmp") if previous else output_path
+
     entries: list[ArchiveEntryInfo] = []
-    with open(output_path, 'wb') as arc:
-        for inp in inputs:
-            serialized_size, resource_size, _total = get_pack_file_sizes(inp.full_path)
+    manifest_inputs: dict[str, dict] = {}
+    raw_total = 0
+    compressed_raw = 0
+    reused = 0
+    saved_bytes = 0
+    saved_raw = 0
+    duplicates: dict[int, int] = {}
+    stats = ArchiveIOStats()
+    start = time.perf_counter()
+    try:
+        with open(build_path, 'wb') as arc:
+            frames = compress_inputs(inputs, workers, previous, output_path if previous else None, level, stats)
+            for i, (inp, frame) in enumerate(zip(inputs, frames)):
+                # Identical inputs are compressed once, their entries point at the first one's frame
+                if frame.duplicate_of is not None:
+                    duplicates[i] = frame.duplicate_of
+                    first = entries[frame.duplicate_of]
+                    entries.append(ArchiveEntryInfo(
+                        name=inp.name,
+                        offset=first.offset,
+                        compressed_size=first.compressed_size,
+                        pack_serialized_size=first.pack_serialized_size,
+                        pack_resource_size=first.pack_resource_size,
+                    ))
+                    # Keep this input's own mtime, it may be the one compressed next build
+                    record = dict(manifest_inputs[inputs[frame.duplicate_of].name])
+                    record["mtime"] = frame.mtime
+                    manifest_inputs[inp.name] = record
+                    raw_total  += record["size"]
+                    saved_raw  += record["size"]
+                    saved_bytes += first.compressed_size
+                    continue
+
+                c_size     = len(frame.data)
+                padding    = (SECTOR_ALIGNMENT - c_size % SECTOR_ALIGNMENT) % SECTOR_ALIGNMENT
+                raw_total += frame.raw_size
+                reused    += frame.reused
+                if not frame.reused:
+                    compressed_raw += frame.raw_size
+
+                entry_offset = arc.tell()
+                arc.write(frame.data)
+                if padding:
+                    arc.write(b'\x00' * padding)
+
+                entries.append(ArchiveEntryInfo(
+                    name=inp.name,
+                    offset=entry_offset,
+                    compressed_size=c_size,
+                    pack_serialized_size=frame.serialized_size,
+                    pack_resource_size=frame.resource_size,
+                ))
+                manifest_inputs[inp.name] = {
+                    "size": frame.raw_size,
+                    "mtime": frame.mtime,
+                    "hash": frame.content_hash,
+                    "offset": entry_offset,
+                    "compressed_size": c_size,
+                    "serialized_size": frame.serialized_size,
+                    "resource_size": frame.resource_size,
+                }
+        if build_path != output_path:
+            os.replace(build_path, output_path)
+    except BaseException:
+        if build_path != output_path and build_path.exists():
+            build_path.unlink()
+        raise
+
+    if incremental:
+        save_archive_manifest(output_path, manifest_inputs, level)
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    # Time saved is estimated from this build's own compression throughput
+    log_duplicate_inputs(inputs, duplicates, saved_bytes, saved_raw * elapsed / compressed_raw if compressed_raw else 0.0)
+    if reused:
+        log.i(f"Reused {reused} unchanged frames from the previous archive, compressed {len(inputs) - len(duplicates) - reused}")
+    stats.log(len(inputs))
+    log.d(f"Built {len(inputs) - len(duplicates)} frames for {len(inputs)} inputs ({raw_total / (1024 * 1024):.2f} MB) with {workers} threads in {elapsed:.4f} seconds, {raw_total / (1024 * 1024) / elapsed:.2f} MB/s")
+    return entries
 
-            with open(inp.full_path, 'rb') as src:
-                raw = src.read()
 
-            compressed = zstd_compress(raw)
-            c_size     = len(compressed)
-            padding    = (SECTOR_ALIGNMENT - c_size % SECTOR_ALIGNMENT) % SECTOR_ALIGNMENT
-
-            entry_offset = arc.tell()
-            arc.write(compressed)
-            if padding:
-                arc.write(b'\x00' * padding)
-
-            entries.append(ArchiveEntryInfo(
-                name=inp.name,
-                offset=entry_offset,
-                compressed_size=c_size,
-                pack_serialized_size=serialized_size,
-                pack_resource_size=resource_size,
-            ))
+def benchmark_separate_frames(inputs: list[ArchiveInput], worker_counts: list[int] | None = None, level: int = ZSTD_LEVEL) -> dict[int, float]:
+    """
+    Time frame compression (without writing the .arc) for each worker count and
+    log the speedup over a single thread. Also checks every run produces the
+    same frames as the serial one. Returns seconds per worker count.
+    """
+    cores = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    timings: dict[int, float] = {}
+    reference: list[bytes] | None = None
+    for workers in [1] + [w for w in worker_counts if w != 1]:
+        start = time.perf_counter()
+        frames = [frame.data for frame in compress_inputs(inputs, workers, level=level)]
+        timings[workers] = time.perf_counter() - start
+        if reference is None:
+            reference = frames
+        elif frames != reference:
+            raise RuntimeError(f"Compressing with {workers} threads produced different frames than the serial path")
+        log.i(f"{workers} threads: {timings[workers]:.4f} seconds, {timings[1] / timings[workers]:.2f}x speedup")
+    return timings
+
+
+def benchmark_dictionary(inputs: list[ArchiveInput], dict_size: int = ZSTD_DICT_SIZE, level: int = ZSTD_LEVEL) -> dict[str, float]:
+    """
+    Analysis only, the Lunar Tear loader decompresses frames without a dictionary.
 
-    return entries
+    Trains a dictionary from a sample of the small inputs (see sample_inputs)
+    and compresses each of them as its own frame with and without it, at the
+    given level and the export window. Logs the ratio (counting the dictionary
+    itself against the dictionary build) and the compression and decompression
+    throughput of both.
+    """
+    small_inputs = [inp for inp in inputs if inp.full_path.stat().st_size <= DICT_MAX_INPUT_SIZE]
+    if not small_inputs:
+        raise ValueError(f"No inputs of {DICT_MAX_INPUT_SIZE // 1024} KB or less to train a dictionary from")
+    raws = []
+    for inp in sample_inputs(small_inputs, LEVEL_BENCHMARK_SAMPLE_SIZE):
+        with open(inp.full_path, 'rb') as src:
+            raws.append(src.read())
+    log.i(f"Training on {len(raws)} of {len(small_inputs)} inputs of {DICT_MAX_INPUT_SIZE // 1024} KB or less")
+    raw_total = sum(len(raw) for raw in raws)
 
+    start = time.perf_counter()
+    dictionary = zstd.train_dictionary(dict_size, raws)
+    train_seconds = time.perf_counter() - start
+
+    params = get_zstd_params(level)
+    results: dict[str, float] = {"raw_size": raw_total, "dictionary_size": len(dictionary.as_bytes()), "train_seconds": train_seconds}
+    for label, dict_data in (("plain", None), ("dict", dictionary)):
+        cctx = zstd.ZstdCompressor(compression_params=params, dict_data=dict_data)
+        dctx = zstd.ZstdDecompressor(dict_data=dict_data)
+        start = time.perf_counter()
+        frames = [cctx.compress(raw) for raw in raws]
+        compress_seconds = max(time.perf_counter() - start, 1e-9)
+        start = time.perf_counter()
+        for frame in frames:
+            dctx.decompress(frame)
+        decompress_seconds = max(time.perf_counter() - start, 1e-9)
+
+        compressed = sum(len(frame) for frame in frames) + (results["dictionary_size"] if dict_data else 0)
+        results[f"{label}_size"] = compressed
+        results[f"{label}_compress_mbs"] = raw_total / (1024 * 1024) / compress_seconds
+        results[f"{label}_decompress_mbs"] = raw_total / (1024 * 1024) / decompress_seconds
+        log.i(f"{'With' if dict_data else 'Without'} dictionary: {compressed / (1024 * 1024):.2f} MB, ratio {raw_total / compressed:.3f}, "
+              f"compress {results[f'{label}_compress_mbs']:.2f} MB/s, decompress {results[f'{label}_decompress_mbs']:.2f} MB/s")
+
+    log.i(f"Trained a {results['dictionary_size'] / 1024:.1f} KB dictionary from {len(raws)} inputs in {train_seconds:.4f} seconds, "
+          f"it would shrink the archive by {(1 - results['dict_size'] / results['plain_size']) * 100:.1f}%")
+    return results
+
+
+def sample_inputs(inputs: list[ArchiveInput], sample_size: int) -> list[ArchiveInput]:
+    """Every n-th input, so the sample totals about sample_size bytes and spans the whole input set."""
+    total = sum(inp.full_path.stat().st_size for inp in inputs)
+    if total <= sample_size:
+        return inputs
+    return inputs[::-(-total // sample_size)]
+
+
+def benchmark_levels(inputs: list[ArchiveInput], levels: list[int] | None = None, sample_size: int = LEVEL_BENCHMARK_SAMPLE_SIZE) -> list[LevelBenchmark]:
+    """
+    Compress a sample of the inputs as separate frames at each level, always
+    under the ZSTD_WINDOW_LOG cap, and log the ratio and single-thread
+    compression and decompression throughput.
+    """
+    raws = []
+    for inp in sample_inputs(inputs, sample_size):
+        with open(inp.full_path, 'rb') as src:
+            raws.append(src.read())
+    raw_mb = sum(len(raw) for raw in raws) / (1024 * 1024)
+    log.i(f"Benchmarking compression levels on {len(raws)} of {len(inputs)} inputs ({raw_mb:.2f} MB)")
 
-def build_single_stream(output_path: Path, inputs: list[ArchiveInput]) -> list[ArchiveEntryInfo]:
+    dctx = zstd.ZstdDecompressor()
+    results: list[LevelBenchmark] = []
+    for level in levels or range(1, ZSTD_MAX_LEVEL + 1):
+        cctx = get_zstd_compressor(level)
+        start = time.perf_counter()
+        frames = [cctx.compress(raw) for raw in raws]
+        compress_seconds = max(time.perf_counter() - start, 1e-9)
+        start = time.perf_counter()
+        for frame in frames:
+            dctx.decompress(frame)
+        decompress_seconds = max(time.perf_counter() - start, 1e-9)
+
+        compressed_mb = sum(len(frame) for frame in frames) / (1024 * 1024)
+        results.append(LevelBenchmark(level, raw_mb / compressed_mb, raw_mb / compress_seconds, raw_mb / decompress_seconds))
+        log.i(f"Level {level:2}: ratio {results[-1].ratio:.3f}, compress {results[-1].compress_mbs:.2f} MB/s, decompress {results[-1].decompress_mbs:.2f} MB/s")
+    return results
+
+
+def recommend_level(results: list[LevelBenchmark], min_compress_mbs: float) -> LevelBenchmark:
+    """Best ratio among the levels compressing at least min_compress_mbs, or the fastest level if none does."""
+    within_budget = [result for result in results if result.compress_mbs >= min_compress_mbs]
+    if not within_budget:
+        return max(results, key=lambda result: result.compress_mbs)
+    # Lowest level wins a tie, it is the faster one
+    return max(within_budget, key=lambda result: (result.ratio, -result.level))
+
+
+def build_single_stream(output_path: Path, inputs: list[ArchiveInput], level: int = ZSTD_LEVEL) -> list[ArchiveEntryInfo]:
     """
     SingleStream mode (load type 0 — PRELOAD_DECOMPRESS).
 
     All files are concatenated (with 16-byte alignment between them) and
     compressed as a single Zstd stream. The entry offset is the position of
     each file within the *decompressed* stream. compressed_size is always 0.
+    Inputs are read once, in chunks streamed through the compressor straight
+    into the .arc, so memory use does not grow with the archive size. Their
+    PACK sizes come from the first chunk. Inputs with identical bytes are
+    stored once and share an offset, finding them costs one extra read of
+    each input that shares its size with another.
     """
-    uncompressed = bytearray()
     entries: list[ArchiveEntryInfo] = []
-
-    for inp in inputs:
-        serialized_size, resource_size, _total = get_pack_file_sizes(inp.full_path)
-
-        pad = (SECTOR_ALIGNMENT - len(uncompressed) % SECTOR_ALIGNMENT) % SECTOR_ALIGNMENT
-        uncompressed.extend(b'\x00' * pad)
-
-        entry_offset = len(uncompressed)
-
-        with open(inp.full_path, 'rb') as src:
-            data = src.read()
-        uncompressed.extend(data)
-
+    stats = ArchiveIOStats()
+    start = time.perf_counter()
+    # Identical inputs are written to the stream once, their entries point at the first copy
+    duplicates, sizes = find_duplicate_inputs(inputs, stats)
+    saved_bytes = sum(sizes[i] for i in duplicates)
+
+    # Lay out the decompressed stream up front so the frame header can carry its size
+    offsets: dict[int, int] = {}
+    stream_size = 0
+    for i in range(len(inputs)):
+        if i in duplicates:
+            continue
+        stream_size += (SECTOR_ALIGNMENT - stream_size % SECTOR_ALIGNMENT) % SECTOR_ALIGNMENT
+        offsets[i] = stream_size
+        stream_size += sizes[i]
+
+    def check_size(i: int) -> None:
+        if position - offsets[i] != sizes[i]:
+            raise ValueError(f"{inputs[i].full_path} changed size while building the archive")
+
+    # A producer thread reads the next chunks while the current ones compress
+    unique = [i for i in range(len(inputs)) if i not in duplicates]
+    pack_sizes: dict[int, tuple[int, int]] = {}
+    current = None
+    position = 0
+    # Stream into a temporary file so a failed build leaves the previous .arc in place
+    build_path = output_path.with_name(output_path.name + ".tmp")
+    try:
+        with open(build_path, 'wb') as arc:
+            # Not used as a context manager, ending the frame early would replace the real error with a zstd size error
+            writer = get_zstd_compressor(level).stream_writer(arc, size=stream_size, closefd=False)
+            for i, chunk, first in prefetch(read_input_chunks(inputs, unique, stats), COMPRESS_QUEUE_DEPTH):
+                if first:
+                    if current is not None:
+                        check_size(current)
+                    current = i
+                    # The first chunk holds the whole PACK header, a bad one fails the build before it is written
+                    serialized_size, resource_size, _total = parse_pack_sizes(chunk, inputs[i].full_path)
+                    pack_sizes[i] = (serialized_size, resource_size)
+                    if offsets[i] > position:
+                        writer.write(b'\x00' * (offsets[i] - position))
+                        position = offsets[i]
+                writer.write(chunk)
+                position += len(chunk)
+            if current is not None:
+                check_size(current)
+            writer.close()
+        os.replace(build_path, output_path)
+    except BaseException:
+        if build_path.exists():
+            build_path.unlink()
+        raise
+
+    for i, inp in enumerate(inputs):
+        first = duplicates.get(i, i)
         entries.append(ArchiveEntryInfo(
             name=inp.name,
-            offset=entry_offset,
+            offset=offsets[first],
             compressed_size=0,
-            pack_serialized_size=serialized_size,
-            pack_resource_size=resource_size,
+            pack_serialized_size=pack_sizes[first][0],
+            pack_resource_size=pack_sizes[first][1],
         ))
 
-    compressed = zstd_compress(bytes(uncompressed))
-    with open(output_path, 'wb') as arc:
-        arc.write(compressed)
+    elapsed = time.perf_counter() - start
+    # Sizes here are of the decompressed stream, the time is estimated from its throughput
+    log_duplicate_inputs(inputs, duplicates, saved_bytes, saved_bytes * elapsed / stream_size if stream_size else 0.0)
+    stats.log(len(inputs))
+    return entries
+
 
+def append_separate_frames(arc_path: Path, inputs: list[ArchiveInput], workers: int | None = None, level: int = ZSTD_LEVEL, arc_offset_scale: int = ARC_OFFSET_SCALE) -> list[ArchiveEntryInfo]:
+    """
+    Append a frame per input to the end of an existing SeparateFrames .arc,
+    leaving every byte already in it untouched. Frames of the entries the new
+    ones replace stay in the file as dead space until the next full build.
+    Offsets are aligned and range-checked for the archive's own
+    arc_offset_scale. The .arc is truncated back to its original size if
+    anything fails.
+    """
+    workers = workers or os.cpu_count() or 1
+    alignment = max(SECTOR_ALIGNMENT, 1 << arc_offset_scale)
+    entries: list[ArchiveEntryInfo] = []
+    stats = ArchiveIOStats()
+    original_size = arc_path.stat().st_size
+    start = time.perf_counter()
+    try:
+        with open(arc_path, 'r+b') as arc:
+            arc.seek(original_size)
+            arc.write(b'\x00' * ((alignment - original_size % alignment) % alignment))
+            for inp, frame in zip(inputs, compress_inputs(inputs, workers, level=level, stats=stats)):
+                if frame.duplicate_of is not None:
+                    first = entries[frame.duplicate_of]
+                    entries.append(ArchiveEntryInfo(inp.name, first.offset, first.compressed_size, first.pack_serialized_size, first.pack_resource_size))
+                    continue
+
+                entry_offset = arc.tell()
+                if entry_offset >> arc_offset_scale > 0xFFFFFFFF:
+                    raise ValueError(f"{arc_path} is too large to address {inp.name} at offset {entry_offset}")
+                arc.write(frame.data)
+                arc.write(b'\x00' * ((alignment - len(frame.data) % alignment) % alignment))
+                entries.append(ArchiveEntryInfo(inp.name, entry_offset, len(frame.data), frame.serialized_size, frame.resource_size))
+    except BaseException:
+        os.truncate(arc_path, original_size)
+        raise
+
+    stats.log(len(inputs))
+    appended = arc_path.stat().st_size - original_size
+    log.d(f"Appended {len(inputs)} entries ({appended / (1024 * 1024):.2f} MB) to {arc_path} in {time.perf_counter() - start:.4f} seconds")
     return entries
 
 
-def build_arc(output_path: Path | str, inputs: list[ArchiveInput], load_type: ArchiveLoadType = ArchiveLoadType.STREAM) -> list[ArchiveEntryInfo]:
+def build_arc(output_path: Path | str, inputs: list[ArchiveInput], load_type: ArchiveLoadType = ArchiveLoadType.STREAM, level: int = ZSTD_LEVEL, incremental: bool = False) -> list[ArchiveEntryInfo]:
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     if load_type == ArchiveLoadType.PRELOAD_DECOMPRESS:
-        return build_single_stream(output_path, inputs)
+        return build_single_stream(output_path, inputs, level)
     else:
-        return build_separate_frames(output_path, inputs)
+        return build_separate_frames(output_path, inputs, incremental=incremental, level=level)
 
 
 def add_archive_entry(archives: list[TpArchiveEntry], filename: str, load_type: ArchiveLoadType) -> int:
@@ -212,12 +952,18 @@ def serialize_param(param: TpArchiveFileParam, bxon_version: int, bxon_project_i
     return zstd_compress(writer.get_bytes())
 
 
-def patch_index(existing_index_path: Path | str, output_arc_path: Path | str, input_dirs: list[str | Path], load_type: ArchiveLoadType = ArchiveLoadType.STREAM, patched_index_path: Optional[Path | str] = None) -> None:
+def patch_index(existing_index_path: Path | str, output_arc_path: Path | str, input_dirs: list[str | Path], load_type: ArchiveLoadType = ArchiveLoadType.STREAM, patched_index_path: Optional[Path | str] = None,
+                level: int = ZSTD_LEVEL, append: bool = False) -> None:
     """
     Build a .arc archive and patch its entries into an existing tpArchiveFileParam index.
 
     Preserves the original BXON version and project_id. If the archive filename
     already exists in the index it is reused; otherwise a new entry is appended.
+
+    With append, frames are added to the end of output_arc_path if it already
+    exists instead of rebuilding it, so only the inputs are read and compressed
+    and only their rows of the index change. Appending needs a STREAM archive
+    that the index already has an entry for.
     """
     existing_index_path = Path(existing_index_path)
     output_arc_path     = Path(output_arc_path)
@@ -227,16 +973,27 @@ def patch_index(existing_index_path: Path | str, output_arc_path: Path | str, in
     if not inputs:
         raise ValueError(f"No files found in input directories: {input_dirs}")
 
-    entries = build_arc(output_arc_path, inputs, load_type)
-
     with open(existing_index_path, 'rb') as f:
         compressed = f.read()
     bxon = BXON.from_bytes(zstd_decompress(compressed))
     if bxon is None or not isinstance(bxon.asset_data, TpArchiveFileParam):
         raise ValueError(f"Could not parse tpArchiveFileParam from: {existing_index_path}")
-
     param = bxon.asset_data
-    arc_index = add_archive_entry(param.archives, output_arc_path.name, load_type)
+
+    if append and output_arc_path.exists():
+        # Appended offsets are only valid in an archive the index already describes
+        if not any(entry.filename == output_arc_path.name for entry in param.archives):
+            raise ValueError(f"Cannot append to {output_arc_path.name}, {existing_index_path.name} has no entry for it")
+        arc_index = add_archive_entry(param.archives, output_arc_path.name, load_type)
+        if ArchiveLoadType.PRELOAD_DECOMPRESS in (load_type, param.archives[arc_index].load_type):
+            raise ValueError(f"Cannot append to {output_arc_path.name}, single-stream archives have to be rebuilt")
+        names = {inp.name for inp in inputs}
+        superseded = sum(f.size for f in param.files if f.archive_index == arc_index and f.name in names)
+        entries = append_separate_frames(output_arc_path, inputs, level=level, arc_offset_scale=param.archives[arc_index].arc_offset_scale)
+        log.i(f"Appended {len(entries)} entries to {output_arc_path.name}, {superseded / (1024 * 1024):.2f} MB of replaced frames stay in it until it is rebuilt")
+    else:
+        entries = build_arc(output_arc_path, inputs, load_type, level)
+        arc_index = add_archive_entry(param.archives, output_arc_path.name, load_type)
     register_entries(param.files, arc_index, entries)
 
     patched_index_path.parent.mkdir(parents=True, exist_ok=True)
@@ -244,6 +1001,73 @@ def patch_index(existing_index_path: Path | str, output_arc_path: Path | str, in
         f.write(serialize_param(param, bxon.version, bxon.project_id))
 
 
+def verify_entry(reader: ArchiveReader, entry: TpFileEntry, source: ArchiveInput | None) -> tuple[int, list[str]]:
+    """Decompressed size of one entry and what is wrong with it."""
+    try:
+        data = reader.read(entry.name)
+    except Exception as e:
+        return 0, [f"{entry.name}: failed to read: {e}"]
+
+    problems = []
+    try:
+        serialized_size, resource_size, total_size = parse_pack_sizes(data, Path(entry.name))
+        if (serialized_size, resource_size) != (entry.pack_file_serialized_size, entry.pack_file_resource_size):
+            problems.append(f"{entry.name}: index has PACK sizes {entry.pack_file_serialized_size}/{entry.pack_file_resource_size}, header has {serialized_size}/{resource_size}")
+        if total_size != len(data):
+            problems.append(f"{entry.name}: decompressed to {len(data)} bytes, PACK header says {total_size}")
+    except ValueError as e:
+        problems.append(f"{entry.name}: {e}")
+
+    if source is not None:
+        with open(source.full_path, 'rb') as src:
+            raw = src.read()
+        if len(raw) != len(data):
+            problems.append(f"{entry.name}: {len(data)} bytes, source {source.full_path} has {len(raw)}")
+        elif hash_content(raw) != hash_content(data):
+            problems.append(f"{entry.name}: contents differ from {source.full_path}")
+    return len(data), problems
+
+
+def verify_archive(index_path: Path | str, source_dirs: list[str | Path] | None = None, workers: int | None = None) -> ArchiveVerifyResult:
+    """
+    Read back every entry of an info.arc and check it decompresses, that its
+    PACK header matches the sizes stored in the index, and, when source_dirs are
+    given, that it matches the source file of the same name by size and hash.
+    STREAM entries are checked on a thread pool, single-stream entries in offset
+    order on this thread so each stream is decompressed once.
+    """
+    workers = workers or os.cpu_count() or 1
+    sources = {inp.name: inp for inp in scan_inputs(source_dirs)} if source_dirs else {}
+    result = ArchiveVerifyResult()
+    start = time.perf_counter()
+    with ArchiveReader(index_path) as reader:
+        entries = sorted(reader.param.files, key=lambda entry: (entry.archive_index, entry.raw_offset))
+        stream_entries = [entry for entry in entries if reader.get_load_type(entry) != ArchiveLoadType.PRELOAD_DECOMPRESS]
+        single_stream_entries = [entry for entry in entries if reader.get_load_type(entry) == ArchiveLoadType.PRELOAD_DECOMPRESS]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            checks = executor.map(lambda entry: verify_entry(reader, entry, sources.get(entry.name)), stream_entries)
+            results = [verify_entry(reader, entry, sources.get(entry.name)) for entry in single_stream_entries]
+            results.extend(checks)
+
+    for raw_size, problems in results:
+        result.raw_bytes += raw_size
+        result.mismatches.extend(problems)
+    result.checked = len(entries)
+    result.compressed_bytes = sum(entry.size for entry in stream_entries)
+    result.unsourced = sum(entry.name not in sources for entry in entries) if sources else len(entries)
+    names = {entry.name for entry in entries}
+    result.missing = [name for name in sources if name not in names]
+    result.seconds = max(time.perf_counter() - start, 1e-9)
+
+    for problem in result.mismatches:
+        log.e(problem)
+    for name in result.missing:
+        log.w(f"{name} is in the source directories but not in {Path(index_path).name}")
+    log.i(f"Verified {result.checked} entries with {workers} threads in {result.seconds:.4f} seconds: {len(result.mismatches)} problems, "
+          f"{result.raw_bytes / (1024 * 1024) / result.seconds:.2f} MB/s decompressed, {result.compressed_bytes / (1024 * 1024) / result.seconds:.2f} MB/s of frames read")
+    return result
+
+
 def export(operator, load_type: ArchiveLoadType = ArchiveLoadType.STREAM) -> None:
     filepath = operator.filepath
     archive_root = bpy.context.scene.replicant_archive_root
@@ -260,11 +1084,14 @@ def export(operator, load_type: ArchiveLoadType = ArchiveLoadType.STREAM) -> Non
         operator.report({'ERROR'}, f"No files found in: {archive_root}")
         return {'CANCELLED'}
 
+    if bpy.context.scene.replicant_archive_layout == 'IMPORTS':
+        inputs = layout_inputs_by_imports(inputs)
+
     for input in inputs:
         log.d(f"Adding {input.full_path} to archive...")
 
     try:
-        entries = build_arc(output_arc_path, inputs, load_type)
+        entries = build_arc(output_arc_path, inputs, load_type, bpy.context.scene.replicant_archive_zstd_level, bpy.context.scene.replicant_archive_incremental)
     except Exception as e:
         log.e(f"Failed to build archive: {e}")
         operator.report({'ERROR'}, f"Failed to build archive: {e}")
@@ -286,7 +1113,8 @@ def export(operator, load_type: ArchiveLoadType = ArchiveLoadType.STREAM) -> Non
                 archive_index=0,
                 flags=0,
             )
-            for e in entries
+            # The index stays in name order whatever the layout of the .arc
+            for e in sorted(entries, key=lambda e: e.name)
         ],
     )
 
@@ -367,9 +1195,114 @@ class EXPORT_OT_replicant_archive(Operator, ExportHelper):
         return export(self)
 
 
+class EXPORT_OT_replicant_archive_dictionary(Operator):
+    """Estimate how much a trained zstd dictionary would shrink the archive. The Lunar Tear loader cannot use one, nothing is written"""
+    bl_idname = "export.replicant_archive_dictionary"
+    bl_label = "Analyze Dictionary Compression"
+
+    def execute(self, context):
+        inputs = scan_inputs([context.scene.replicant_archive_root])
+        if not inputs:
+            log.e(f"No files found in: {context.scene.replicant_archive_root}")
+            self.report({'ERROR'}, f"No files found in: {context.scene.replicant_archive_root}")
+            return {'CANCELLED'}
+
+        try:
+            results = benchmark_dictionary(inputs, level=context.scene.replicant_archive_zstd_level)
+        except (zstd.ZstdError, ValueError) as e:
+            # Training needs a fair number of samples, a handful of files is not enough
+            log.e(f"Failed to train a dictionary from {len(inputs)} files: {e}")
+            self.report({'ERROR'}, f"Failed to train a dictionary from {len(inputs)} files: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Ratio {results['raw_size'] / results['plain_size']:.3f} without a dictionary, "
+                              f"{results['raw_size'] / results['dict_size']:.3f} with one (see console)")
+        return {'FINISHED'}
+
+
+class EXPORT_OT_replicant_archive_tune_level(Operator):
+    """Benchmark compression levels on a sample of the archive root and set the level with the best ratio within the throughput budget"""
+    bl_idname = "export.replicant_archive_tune_level"
+    bl_label = "Tune Compression Level"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        scene = context.scene
+        inputs = scan_inputs([scene.replicant_archive_root])
+        if not inputs:
+            log.e(f"No files found in: {scene.replicant_archive_root}")
+            self.report({'ERROR'}, f"No files found in: {scene.replicant_archive_root}")
+            return {'CANCELLED'}
+
+        results = benchmark_levels(inputs)
+        best = recommend_level(results, scene.replicant_archive_min_throughput)
+        if best.compress_mbs < scene.replicant_archive_min_throughput:
+            log.w(f"No level compresses at {scene.replicant_archive_min_throughput:.1f} MB/s, using the fastest")
+        scene.replicant_archive_zstd_level = best.level
+        log.i(f"Recommended level {best.level}: ratio {best.ratio:.3f}, compress {best.compress_mbs:.2f} MB/s, decompress {best.decompress_mbs:.2f} MB/s")
+        self.report({'INFO'}, f"Compression level set to {best.level} (ratio {best.ratio:.3f}, {best.compress_mbs:.1f} MB/s)")
+        return {'FINISHED'}
+
+
+class EXPORT_OT_replicant_archive_verify(Operator, ImportHelper):
+    """Check every entry of an info.arc decompresses and matches its PACK header and the file it was built from in the archive root"""
+    bl_idname = "export.replicant_archive_verify"
+    bl_label = "Verify Archive"
+
+    filename_ext = ".arc"
+    filter_glob: bpy.props.StringProperty(default="*.arc", options={'HIDDEN'})
+
+    def execute(self, context):
+        archive_root = context.scene.replicant_archive_root
+        try:
+            result = verify_archive(self.filepath, [archive_root] if archive_root else None)
+        except Exception as e:
+            log.e(f"Failed to verify {self.filepath}: {e}")
+            self.report({'ERROR'}, f"Failed to verify {self.filepath}: {e}")
+            return {'CANCELLED'}
+
+        if result.mismatches or result.missing:
+            self.report({'WARNING'}, f"{len(result.mismatches)} problems in {result.checked} entries, {len(result.missing)} source files not archived (see console)")
+        else:
+            self.report({'INFO'}, f"All {result.checked} entries verified, {result.raw_bytes / (1024 * 1024) / result.seconds:.1f} MB/s")
+        return {'FINISHED'}
+
+
+class EXPORT_OT_replicant_archive_benchmark_threads(Operator):
+    """Time compressing a sample of the archive root with 1 thread up to one per core and log the speedup of each"""
+    bl_idname = "export.replicant_archive_benchmark_threads"
+    bl_label = "Benchmark Compression Threads"
+
+    def execute(self, context):
+        inputs = scan_inputs([context.scene.replicant_archive_root])
+        if not inputs:
+            log.e(f"No files found in: {context.scene.replicant_archive_root}")
+            self.report({'ERROR'}, f"No files found in: {context.scene.replicant_archive_root}")
+            return {'CANCELLED'}
+
+        try:
+            timings = benchmark_separate_frames(sample_inputs(inputs, LEVEL_BENCHMARK_SAMPLE_SIZE), level=context.scene.replicant_archive_zstd_level)
+        except Exception as e:
+            log.e(f"Failed to benchmark compression: {e}")
+            self.report({'ERROR'}, f"Failed to benchmark compression: {e}")
+            return {'CANCELLED'}
+
+        fastest = min(timings, key=timings.get)
+        self.report({'INFO'}, f"Fastest with {fastest} threads, {timings[1] / timings[fastest]:.2f}x over 1 thread (see console)")
+        return {'FINISHED'}
+
+
 def register():
     bpy.utils.register_class(EXPORT_OT_replicant_archive)
+    bpy.utils.register_class(EXPORT_OT_replicant_archive_benchmark_threads)
+    bpy.utils.register_class(EXPORT_OT_replicant_archive_verify)
+    bpy.utils.register_class(EXPORT_OT_replicant_archive_dictionary)
+    bpy.utils.register_class(EXPORT_OT_replicant_archive_tune_level)
 
 
 def unregister():
+    bpy.utils.unregister_class(EXPORT_OT_replicant_archive_benchmark_threads)
+    bpy.utils.unregister_class(EXPORT_OT_replicant_archive_verify)
+    bpy.utils.unregister_class(EXPORT_OT_replicant_archive_tune_level)
+    bpy.utils.unregister_class(EXPORT_OT_replicant_archive_dictionary)
     bpy.utils.unregister_class(EXPORT_OT_replicant_archive)
\ No newline at end of file
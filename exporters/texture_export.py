@@ -1,7 +1,9 @@
 
 
+import hashlib
 import os
 import time
+from collections import OrderedDict
 
 import bpy
 from bpy.types import Material
@@ -14,8 +16,39 @@ from ..classes.asset_package import tpXonAssetHeader
 from ..classes.binary_writer import BinaryWriter
 from ..classes.bxon import BXON
 from ..classes.pack import Pack, PackAssetPackage, PackFile, PackFileData
-from ..util import fnv1, get_export_collections_materials, log
+from ..ui.material import dxgi_format_strings
+from ..util import fnv1, get_export_collections_materials, log, register_texconv_path
 
+# Map DXGI format to ResourceFormat (inverse of the mapping in tex_head.py)
+DXGI_TO_RESOURCE_FORMAT = {
+    2: ResourceFormat.R32G32B32A32_FLOAT,
+    6: ResourceFormat.R32G32B32_FLOAT,
+    16: ResourceFormat.R32G32_FLOAT,
+    41: ResourceFormat.R32_FLOAT,
+    10: ResourceFormat.R16G16B16A16_FLOAT,
+    34: ResourceFormat.R16G16_FLOAT,
+    54: ResourceFormat.R16_FLOAT,
+    28: ResourceFormat.R8G8B8A8_UNORM,
+    29: ResourceFormat.R8G8B8A8_UNORM_SRGB,
+    49: ResourceFormat.R8G8_UNORM,
+    61: ResourceFormat.R8_UNORM,
+    87: ResourceFormat.B8G8R8A8_UNORM,
+    91: ResourceFormat.B8G8R8A8_UNORM_SRGB,
+    88: ResourceFormat.B8G8R8X8_UNORM,
+    93: ResourceFormat.B8G8R8X8_UNORM_SRGB,
+    71: ResourceFormat.BC1_UNORM,
+    72: ResourceFormat.BC1_UNORM_SRGB,
+    74: ResourceFormat.BC2_UNORM,
+    75: ResourceFormat.BC2_UNORM_SRGB,
+    77: ResourceFormat.BC3_UNORM,
+    78: ResourceFormat.BC3_UNORM_SRGB,
+    80: ResourceFormat.BC4_UNORM,
+    83: ResourceFormat.BC5_UNORM,
+    95: ResourceFormat.BC6H_UF16,
+    96: ResourceFormat.BC6H_SF16,
+    98: ResourceFormat.BC7_UNORM,
+    99: ResourceFormat.BC7_UNORM_SRGB,
+}
 
 def export(operator):
     texture_pack = operator.texture_pack
@@ -61,6 +94,10 @@ def export(operator):
     pack.asset_packages.append(asset_package)
 
     texture_paths = set()
+    quality = bpy.context.scene.replicant_texture_compression == 'QUALITY'
+    mip_filter = bpy.context.scene.replicant_mip_filter
+    encoded_pixels = 0
+    encode_start = time.perf_counter()
 
     for mat in materials:
         for sampler in mat.replicant_texture_samplers:
@@ -69,40 +106,15 @@ def export(operator):
             else:
                 texture_paths.add(sampler.texture_path)
 
-            try:
-                with open(sampler.texture_path, 'rb') as f:
-                    data = f.read()
-                dds = DDS.from_bytes(data)
-            except:
-                log.e(f"Failed to parse DDS data file {sampler.texture_path}, is it a valid DDS?")
-                operator.report({'ERROR'}, f"Failed to parse DDS data file {sampler.texture_path}, is it a valid DDS?")
-                return {'CANCELLED'}
-
-            tex_head = tpGxTexHead()
-            tex_head.width = dds.get_width()
-            tex_head.height = dds.get_height()
-            tex_head.depth = max(dds.get_depth(), 1)
-            tex_head.mip_count = dds.get_mip_count()
-            tex_head.total_data_size = dds.get_size()
-            dxgi_format = dds.get_dxgi_format()
-            if not dxgi_format:
-                log.e(f"Failed to get format of {sampler.texture_path}! Does it include a modern DXT10 header?")
-                operator.report({'ERROR'}, f"Failed to get format of {sampler.texture_path}! Does it include a modern DXT10 header?")
+            if os.path.splitext(sampler.texture_path)[-1].lower() == ".dds":
+                texture = read_dds_texture(operator, sampler)
+            else:
+                texture = encode_texture(operator, sampler, quality, mip_filter)
+                if texture is not None:
+                    encoded_pixels += sum(subresource.width * subresource.height for subresource in texture[0].subresources)
+            if texture is None:
                 return {'CANCELLED'}
-            tex_head.surface_format = get_xon_surface_format(dds)
-            for i in range(dds.get_subresource_count()):
-                tex_head.subresources.append(Subresource(
-                    offset=0,
-                    unknown0=0,
-                    row_pitch=dds.get_subresource_row_pitch(i),
-                    unknown1=0,
-                    slice_size=dds.get_subresource_size(i),
-                    unknown2=0,
-                    width=dds.get_subresource_width(i),
-                    height=dds.get_subresource_height(i),
-                    depth=dds.get_subresource_depth(i),
-                    row_count=dds.get_subresource_row_count(i)
-                ))
+            tex_head, tex_data = texture
 
             texture_basename = os.path.basename(sampler.texture_path)
             texture_filename = os.path.splitext(texture_basename)[0] + ".rtex"
@@ -127,7 +139,7 @@ def export(operator):
             
             file_data = PackFileData(
                 file_index=len(pack.files),
-                tex_data=tpGxTexData(dds.data)
+                tex_data=tex_data
             )
 
             pack.files.append(file)
@@ -137,6 +149,9 @@ def export(operator):
     log.d(f"Successfully generated data for {len(pack.files)} texture files")
 
     gen_end = time.perf_counter()
+    if encoded_pixels:
+        megapixels = encoded_pixels / 1_000_000
+        log.i(f"Generated {megapixels:.2f} megapixels of compressed texture data at {megapixels / (gen_end - encode_start):.2f} MP/s")
     log.d(f"Finished generating data in {gen_end - start:.4f} seconds.")
     log.d("Writing new PACK file...")
     write_start = time.perf_counter()
@@ -146,43 +161,158 @@ def export(operator):
     log.i(f"Total export time: {end - start:.4f} seconds!")
     return {'FINISHED'}
 
+def read_dds_texture(operator, sampler) -> tuple[tpGxTexHead, tpGxTexData] | None:
+    try:
+        with open(sampler.texture_path, 'rb') as f:
+            data = f.read()
+        dds = DDS.from_bytes(data)
+    except:
+        log.e(f"Failed to parse DDS data file {sampler.texture_path}, is it a valid DDS?")
+        operator.report({'ERROR'}, f"Failed to parse DDS data file {sampler.texture_path}, is it a valid DDS?")
+        return None
+
+    tex_head = tpGxTexHead()
+    tex_head.width = dds.get_width()
+    tex_head.height = dds.get_height()
+    tex_head.depth = max(dds.get_depth(), 1)
+    tex_head.mip_count = dds.get_mip_count()
+    tex_head.total_data_size = dds.get_size()
+    dxgi_format = dds.get_dxgi_format()
+    if not dxgi_format:
+        log.e(f"Failed to get format of {sampler.texture_path}! Does it include a modern DXT10 header?")
+        operator.report({'ERROR'}, f"Failed to get format of {sampler.texture_path}! Does it include a modern DXT10 header?")
+        return None
+    tex_head.surface_format = get_xon_surface_format(dds)
+    for i in range(dds.get_subresource_count()):
+        tex_head.subresources.append(Subresource(
+            offset=0,
+            unknown0=0,
+            row_pitch=dds.get_subresource_row_pitch(i),
+            unknown1=0,
+            slice_size=dds.get_subresource_size(i),
+            unknown2=0,
+            width=dds.get_subresource_width(i),
+            height=dds.get_subresource_height(i),
+            depth=dds.get_subresource_depth(i),
+            row_count=dds.get_subresource_row_count(i)
+        ))
+    return tex_head, tpGxTexData(dds.data)
+
+def can_encode(dxgi_format_name: str) -> bool:
+    register_texconv_path()
+    from replicant_texconv.encode import ENCODABLE_FORMATS
+    return dxgi_format_strings.index(dxgi_format_name) in ENCODABLE_FORMATS
+
+# Encoded subresources by hash of the source file and every setting that affects them, so re-exports skip mip generation and encoding.
+# Least recently used chains are dropped once the cache holds more than ENCODED_TEXTURE_CACHE_BYTES
+ENCODED_TEXTURE_CACHE_BYTES = 256 << 20
+encoded_texture_cache: OrderedDict[str, tuple[int, int, list[bytes]]] = OrderedDict()
+encoded_texture_cache_size = 0
+
+def get_encoded_texture(cache_key: str) -> tuple[int, int, list[bytes]] | None:
+    entry = encoded_texture_cache.get(cache_key)
+    if entry is not None:
+        encoded_texture_cache.move_to_end(cache_key)
+    return entry
+
+def put_encoded_texture(cache_key: str, width: int, height: int, mips: list[bytes]):
+    global encoded_texture_cache_size
+    size = sum(len(mip) for mip in mips)
+    if size > ENCODED_TEXTURE_CACHE_BYTES:
+        return
+    encoded_texture_cache[cache_key] = (width, height, mips)
+    encoded_texture_cache_size += size
+    while encoded_texture_cache_size > ENCODED_TEXTURE_CACHE_BYTES:
+        _key, (_width, _height, evicted) = encoded_texture_cache.popitem(last=False)
+        encoded_texture_cache_size -= sum(len(mip) for mip in evicted)
+
+def encode_texture(operator, sampler, quality: bool, mip_filter: str) -> tuple[tpGxTexHead, tpGxTexData] | None:
+    """Compress a PNG/TIF sampler texture and, if enabled, its mip chain to the sampler's DXGI format."""
+    register_texconv_path()
+    from replicant_texconv.bcn import BLOCK_SIZES
+    from replicant_texconv.encode import encode, load_image
+    from replicant_texconv.mips import generate_mips
+
+    if not can_encode(sampler.dxgi_format):
+        log.e(f"Cannot encode {sampler.texture_path} to {sampler.dxgi_format}, pick a BC1, BC3, BC4, BC5 or BC7 format or provide a DDS")
+        operator.report({'ERROR'}, f"Cannot encode {sampler.texture_path} to {sampler.dxgi_format}, pick a BC1, BC3, BC4, BC5 or BC7 format or provide a DDS")
+        return None
+    try:
+        with open(sampler.texture_path, 'rb') as f:
+            source = f.read()
+    except OSError as e:
+        log.e(f"Failed to read image {sampler.texture_path}: {e}")
+        operator.report({'ERROR'}, f"Failed to read image {sampler.texture_path}: {e}")
+        return None
+
+    dxgi_format = dxgi_format_strings.index(sampler.dxgi_format)
+    hasher = hashlib.blake2b(source, digest_size=16)
+    hasher.update(f"{dxgi_format}|{quality}|{sampler.mip_maps}|{mip_filter}".encode())
+    cache_key = hasher.hexdigest()
+
+    texture_name = os.path.basename(sampler.texture_path)
+    cached = get_encoded_texture(cache_key)
+    if cached is not None:
+        width, height, mips = cached
+        log.d(f"Reusing {len(mips)} encoded mips of {texture_name}, source unchanged since the last export")
+    else:
+        try:
+            pixels = load_image(source)
+        except Exception as e:
+            log.e(f"Failed to read image {sampler.texture_path}: {e}")
+            operator.report({'ERROR'}, f"Failed to read image {sampler.texture_path}: {e}")
+            return None
+
+        height, width = pixels.shape[:2]
+        start = time.perf_counter()
+        if sampler.mip_maps:
+            levels = generate_mips(pixels, sampler.dxgi_format.endswith("_SRGB"), mip_filter)
+        else:
+            levels = [pixels]
+        mips_end = time.perf_counter()
+        mips = [encode(level, dxgi_format, quality) for level in levels]
+        end = time.perf_counter()
+        megapixels = sum(level.shape[0] * level.shape[1] for level in levels) / 1_000_000
+        log.d(f"Generated {len(levels)} mips of {texture_name} ({width}x{height}) in {mips_end - start:.4f} seconds")
+        log.d(f"Encoded {texture_name} to {sampler.dxgi_format} in {end - mips_end:.4f} seconds, {megapixels / max(end - mips_end, 1e-9):.2f} MP/s")
+        put_encoded_texture(cache_key, width, height, mips)
+
+    tex_head = tpGxTexHead()
+    tex_head.width = width
+    tex_head.height = height
+    tex_head.depth = 1
+    tex_head.mip_count = len(mips)
+    tex_head.total_data_size = sum(len(data) for data in mips)
+    # Every mip the texture should have is embedded, nothing is left for the engine to generate
+    tex_head.surface_format = XonSurfaceFormat(
+        usage_maybe=0,
+        resource_format=DXGI_TO_RESOURCE_FORMAT[dxgi_format],
+        resource_dimension=ResourceDimension.TEXTURE2D,
+        generate_mips=False
+    )
+    for i, data in enumerate(mips):
+        mip_width = max(1, width >> i)
+        mip_height = max(1, height >> i)
+        tex_head.subresources.append(Subresource(
+            offset=0,
+            unknown0=0,
+            row_pitch=max(1, (mip_width + 3) // 4) * BLOCK_SIZES[dxgi_format],
+            unknown1=0,
+            slice_size=len(data),
+            unknown2=0,
+            width=mip_width,
+            height=mip_height,
+            depth=1,
+            row_count=max(1, (mip_height + 3) // 4)
+        ))
+    return tex_head, tpGxTexData(list(mips))
+
 def get_xon_surface_format(dds: DDS) -> XonSurfaceFormat:
     from puredds.enums import DDS_RESOURCE_MISC
 
-    # Map DXGI format to ResourceFormat (inverse of the mapping in tex_head.py)
-    dxgi_to_resource_format = {
-        2: ResourceFormat.R32G32B32A32_FLOAT,
-        6: ResourceFormat.R32G32B32_FLOAT,
-        16: ResourceFormat.R32G32_FLOAT,
-        41: ResourceFormat.R32_FLOAT,
-        10: ResourceFormat.R16G16B16A16_FLOAT,
-        34: ResourceFormat.R16G16_FLOAT,
-        54: ResourceFormat.R16_FLOAT,
-        28: ResourceFormat.R8G8B8A8_UNORM,
-        29: ResourceFormat.R8G8B8A8_UNORM_SRGB,
-        49: ResourceFormat.R8G8_UNORM,
-        61: ResourceFormat.R8_UNORM,
-        87: ResourceFormat.B8G8R8A8_UNORM,
-        91: ResourceFormat.B8G8R8A8_UNORM_SRGB,
-        88: ResourceFormat.B8G8R8X8_UNORM,
-        93: ResourceFormat.B8G8R8X8_UNORM_SRGB,
-        71: ResourceFormat.BC1_UNORM,
-        72: ResourceFormat.BC1_UNORM_SRGB,
-        74: ResourceFormat.BC2_UNORM,
-        75: ResourceFormat.BC2_UNORM_SRGB,
-        77: ResourceFormat.BC3_UNORM,
-        78: ResourceFormat.BC3_UNORM_SRGB,
-        80: ResourceFormat.BC4_UNORM,
-        83: ResourceFormat.BC5_UNORM,
-        95: ResourceFormat.BC6H_UF16,
-        96: ResourceFormat.BC6H_SF16,
-        98: ResourceFormat.BC7_UNORM,
-        99: ResourceFormat.BC7_UNORM_SRGB,
-    }
-
     # Get DXGI format from DDS
     dxgi_format = dds.get_dxgi_format()
-    resource_format = dxgi_to_resource_format.get(dxgi_format, ResourceFormat.UNKNOWN)
+    resource_format = DXGI_TO_RESOURCE_FORMAT.get(dxgi_format, ResourceFormat.UNKNOWN)
 
     # Determine resource dimension
     if dds.is_volume():
@@ -1,9 +1,16 @@
+import dataclasses
+import hashlib
+import json
 import os
+import shutil
+import struct
 import bpy
+import numpy as np
 from bpy.types import Material
 
 from ..classes.material_instance import tpGxMaterialInstanceV2
 from ..classes.asset_package import tpXonAssetHeader
+from ..classes.tex_data import tpGxTexData
 from ..classes.tex_head import tpGxTexHead, ResourceDimension, ResourceFormat
 from ..classes.pack import Pack, PackFile
 
@@ -19,6 +26,13 @@ from .materials.default import default_material
 from .materials.nodes import dx_to_gl_normal, grid_location, texture_sampler
 from ..util import *
 
+# Per texture pack record of what has been extracted, see extract_textures
+TEXTURE_MANIFEST_FILENAME = "manifest.json"
+TEXTURE_MANIFEST_VERSION = 1
+# Content addressed store of extracted and converted textures, shared by every pack folder next to it
+TEXTURE_STORE_DIRNAME = ".store"
+
+
 # Map material type names to their handler functions
 MATERIAL_HANDLERS = {
     "master_rs_standard": master_rs_standard,
@@ -32,25 +46,10 @@ MATERIAL_HANDLERS = {
 }
 
 def _find_pack_path(tex_name: str, textures_dir: str, imports: list[str]) -> str | None:
-    for root, dirs, files in os.walk(textures_dir):
-        if any(tex_name in file for file in files):
-            rel_path = os.path.relpath(root, textures_dir)
-            if rel_path == '.':
-                continue
-
-            path_parts = rel_path.split(os.sep)
-            for part in path_parts:
-                for import_str in imports:
-                    if import_str.endswith(part):
-                        return import_str
-    return None
+    return get_texture_index(textures_dir).find_pack_path(tex_name, imports)
 
 def _find_texture_path(tex_name: str, textures_dir: str) -> str | None:
-    matches = []
-    for root, dirs, files in os.walk(textures_dir):
-        for file in files:
-            if tex_name in file:
-                matches.append(os.path.join(root, file))
+    matches = get_texture_index(textures_dir).find_stem(tex_name)
 
     # Prioritize PNG files
     priority_matches = [m for m in matches if m.lower().endswith('.dds')] # Temporarily prioritize DDS 
@@ -77,7 +76,19 @@ def setup_material_texture_samplers(material: Material, material_asset: tpXonAss
         if pack_path:
             sampler.pack_path = pack_path
 
+def build_sampler_texture_index() -> dict[str, list]:
+    """Map texture basenames (no extension) to every material sampler referencing them."""
+    sampler_index: dict[str, list] = {}
+    for material in bpy.data.materials:
+        for sampler in material.replicant_texture_samplers:
+            if not sampler.texture_path:
+                continue
+            tex_basename = os.path.splitext(os.path.basename(sampler.texture_path))[0]
+            sampler_index.setdefault(tex_basename, []).append(sampler)
+    return sampler_index
+
 def setup_texture_sampler_dxgi_data(texture_packs: list[Pack]):
+    sampler_index = build_sampler_texture_index()
     for pack in texture_packs:
         for file in pack.files:
             if file.content.asset_type != "tpGxTexHead":
@@ -86,11 +97,9 @@ def setup_texture_sampler_dxgi_data(texture_packs: list[Pack]):
             tex_head: tpGxTexHead = file.content.asset_data
             dxgi_format_string = tex_head.get_format_str()
             has_multiple_mips = tex_head.mip_count > 1
-            for material in bpy.data.materials:
-                for sampler in material.replicant_texture_samplers:
-                    if tex_basename in sampler.texture_path:
-                        sampler.dxgi_format = dxgi_format_string
-                        sampler.mip_maps = has_multiple_mips
+            for sampler in sampler_index.get(tex_basename, []):
+                sampler.dxgi_format = dxgi_format_string
+                sampler.mip_maps = has_multiple_mips
 
 
 def setup_custom_ui_values(material: Material, material_instance: tpGxMaterialInstanceV2):
@@ -126,6 +135,7 @@ def setup_custom_ui_values(material: Material, material_instance: tpGxMaterialIn
 
 def construct_materials(pack_dir: str, material_packs: list[Pack]):
     log.i("Generating Blender materials...")
+    texture_image_cache.reset_counts()
     textures_dir = pack_dir + "\\replicant2blender_extracted\\"
 
     # Renamed in 5.0
@@ -169,185 +179,353 @@ def construct_materials(pack_dir: str, material_packs: list[Pack]):
         # Use default material generation
         default_material(textures_dir, material, material_instance)
         setup_custom_ui_values(material, material_instance)
+    if texture_image_cache.reused > 0:
+        log.i(f"Reused already loaded images for {texture_image_cache.reused} texture samplers, loaded {texture_image_cache.loads} images from disk.")
     log.i("Blender material generation complete.")
                 
 
-def extract_textures(pack_dir: str, texture_packs: list[Pack]):
+def load_texture_manifest(extracted_path: str) -> dict:
+    manifest_path = extracted_path + "\\" + TEXTURE_MANIFEST_FILENAME
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == TEXTURE_MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": TEXTURE_MANIFEST_VERSION, "textures": {}}
+
+def save_texture_manifest(extracted_path: str, manifest: dict):
+    manifest_path = extracted_path + "\\" + TEXTURE_MANIFEST_FILENAME
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+
+def hash_bytes(chunks: list[bytes]) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+def is_texture_up_to_date(extracted_path: str, previous_entry: dict | None, entry: dict) -> bool:
+    if not previous_entry or "converted" not in previous_entry:
+        return False
+    if previous_entry.get("head_hash") != entry["head_hash"] or previous_entry.get("data_hash") != entry["data_hash"]:
+        return False
+    if previous_entry.get("mip", 0) != entry["mip"]:
+        return False
+    return os.path.isfile(extracted_path + "\\" + previous_entry["dds"]) and os.path.isfile(extracted_path + "\\" + previous_entry["converted"])
+
+# DDS_HEADER and DDS_HEADER_DXT10, see https://learn.microsoft.com/en-us/windows/win32/direct3ddds/dds-header
+DDS_HEADER_STRUCT = struct.Struct("<4s7I44x2I4s20x4I4x5I")
+
+def build_dds_header(tex_head: tpGxTexHead) -> bytes | None:
+    """Magic, DDS_HEADER and DDS_HEADER_DXT10 for a texture, None if its format has no DXGI equivalent."""
+    dxgi_format = tex_head.surface_format.get_dxgi_format()
+    if dxgi_format == 0:  # DXGI_FORMAT_UNKNOWN
+        return None
+
+    is_compressed = tex_head.surface_format.is_compressed()
+    is_3d_texture = tex_head.surface_format.resource_dimension == ResourceDimension.TEXTURE3D
+    is_cubemap = tex_head.surface_format.resource_dimension == ResourceDimension.CUBEMAP
+
+    flags = 0x1 | 0x2 | 0x4 | 0x1000    # DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT
+    if is_compressed:
+        flags |= 0x80000    # DDSD_LINEARSIZE
+    else:
+        flags |= 0x8        # DDSD_PITCH
+    if tex_head.mip_count > 1:
+        flags |= 0x20000    # DDSD_MIPMAPCOUNT
+    if is_3d_texture and tex_head.depth > 1:
+        flags |= 0x800000    # DDSD_DEPTH
+
+    if is_compressed:
+        # For compressed formats, use the total size
+        pitch = tex_head.total_data_size
+    else:
+        # For uncompressed formats, calculate pitch (bytes per scanline)
+        pitch = tex_head.width * tex_head.surface_format.get_bytes_per_pixel()
+
+    caps = 0x1000   # DDSCAPS_TEXTURE
+    if tex_head.mip_count > 1 or is_cubemap:
+        caps |= 0x8 | 0x400000    # DDSCAPS_MIPMAP | DDSCAPS_COMPLEX
+    caps2 = 0x0
+    if is_3d_texture:
+        caps2 |= 0x200000   # DDSCAPS2_VOLUME
+    if is_cubemap:
+        caps2 |= 0x200 | 0xFE00    # DDSCAPS2_CUBEMAP | all 6 faces (POSITIVEX, NEGATIVEX, POSITIVEY, NEGATIVEY, POSITIVEZ, NEGATIVEZ)
+
+    misc_flags = 0x4 if is_cubemap else 0  # D3D11_RESOURCE_MISC_TEXTURECUBE
+
+    return DDS_HEADER_STRUCT.pack(
+        b"DDS ", 124, flags,
+        tex_head.height, tex_head.width, pitch,
+        tex_head.depth if is_3d_texture else 0,  # Depth (only for 3D/volume textures, otherwise 0)
+        tex_head.mip_count,
+        # DDS_PIXELFORMAT: size, DDPF_FOURCC, fourCC, then zeroed bit count and masks
+        32, 4, b"DX10",
+        caps, caps2, 0, 0,
+        # DDS_HEADER_DXT10
+        dxgi_format,
+        tex_head.surface_format.get_d3d10_dimension(),
+        misc_flags,
+        1,  # ArraySize
+        tex_head.surface_format.get_alpha_mode()
+    )
+
+def write_chunks(path: str, chunks: list[bytes]):
+    """Write chunks back to back without joining them first."""
+    with open(path, "wb") as f:
+        f.writelines(chunks)
+
+def create_texture_image(image_name: str, image, filepath: str) -> bpy.types.Image:
+    """Create a Blender image from a decoded texture without touching disk. It can be saved to filepath later."""
+    from replicant_texconv.convert import to_blender_pixels
+
+    height, width = image.shape[:2]
+    is_hdr = image.dtype == np.float32
+    b_image = bpy.data.images.new(image_name, width, height, alpha=True, float_buffer=is_hdr)
+    b_image.pixels.foreach_set(to_blender_pixels(image))
+    b_image.filepath_raw = filepath
+    b_image.file_format = 'TIFF' if is_hdr else 'PNG'
+    b_image.update()
+    return b_image
+
+def get_preview_mip(tex_head: tpGxTexHead, tex_data: tpGxTexData | None, preview_size: int) -> int:
+    """Index of the smallest mip whose larger side is still at least preview_size, 0 for full resolution."""
+    if preview_size <= 0 or tex_data is None or tex_head.surface_format.resource_dimension != ResourceDimension.TEXTURE2D:
+        return 0
+    # Only plain 2D textures have exactly one subresource per mip
+    if len(tex_head.subresources) != tex_head.mip_count or len(tex_data.subresource_data) != tex_head.mip_count:
+        return 0
+    mip = 0
+    for i, subresource in enumerate(tex_head.subresources):
+        if max(subresource.width, subresource.height) < preview_size:
+            break
+        mip = i
+    return mip
+
+def upgrade_texture_image(image: bpy.types.Image, dds_path: str) -> bool:
+    """Replace a preview image with the full resolution of its extracted DDS in place. Returns False if it already is."""
+    register_texconv_path()
+    from replicant_texconv.convert import convert_dds, decode_dds_image, to_blender_pixels
+
+    with open(dds_path, "rb") as f:
+        dds_bytes = f.read()
+    height, width = struct.unpack_from("<2I", dds_bytes, 12)
+    if tuple(image.size) == (width, height):
+        return False
+
+    extracted_path = os.path.dirname(dds_path)
+    manifest = load_texture_manifest(extracted_path)
+    manifest_entry = manifest["textures"].get(os.path.splitext(os.path.basename(dds_path))[0] + ".rtex")
+
+    if image.source == 'FILE' and image.filepath:
+        # Replace the converted preview so the file on disk matches the image. It is a hardlink into the
+        # shared store, unlink it first so other packs keep their preview
+        image_path = bpy.path.abspath(image.filepath)
+        if os.path.lexists(image_path):
+            os.remove(image_path)
+        converted_path = convert_dds(dds_bytes, image_path)
+        image.filepath = converted_path
+        image.reload()
+        if manifest_entry is not None:
+            manifest_entry["converted"] = os.path.relpath(converted_path, extracted_path)
+    else:
+        image.scale(width, height)
+        image.pixels.foreach_set(to_blender_pixels(decode_dds_image(dds_bytes)))
+        image.update()
+
+    if manifest_entry is not None:
+        manifest_entry["mip"] = 0
+        save_texture_manifest(extracted_path, manifest)
+    return True
+
+def link_or_copy(source_path: str, link_path: str):
+    """Hardlink link_path to source_path, copying instead where the filesystem cannot link."""
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    try:
+        os.link(source_path, link_path)
+    except OSError:
+        shutil.copyfile(source_path, link_path)
+
+def extract_textures(pack_dir: str, texture_packs: list[Pack], write_converted: bool = True, preview_size: int = 0):
+    register_texconv_path()
+    from replicant_texconv.convert import ConversionPool, decode_dds_image
+
     failed_texture_files: list[PackFile] = []
     extracted_textures_paths: list[str] = []
+    texture_index = get_texture_index(pack_dir + "\\" + "replicant2blender_extracted")
 
-    for pack in texture_packs:
-        log.i("Extracting textures...")
-
-        asset_pack_name = pack.asset_packages[0].name.replace(".xap", "")
+    # Unique textures are stored once by content hash, pack folders hold hardlinks to them
+    store_path = pack_dir + "\\" + "replicant2blender_extracted" + "\\" + TEXTURE_STORE_DIRNAME
+    if not os.path.isdir(store_path):
+        os.makedirs(store_path)
 
-        r2b_extracted_path = pack_dir + "\\" + "replicant2blender_extracted" + "\\" + asset_pack_name
-        converted_path = r2b_extracted_path + "\\" + "converted"
+    # Conversion starts in worker processes while the remaining textures are still being extracted
+    conversion_pool = ConversionPool()
 
-        if not os.path.isdir(r2b_extracted_path):
-            os.makedirs(r2b_extracted_path)
+    manifests: dict[str, dict] = {}
+    # Store path of each conversion (without extension) to every (extracted path, texture name, converted path, manifest entry) waiting on it
+    pending_conversions: dict[str, list[tuple[str, str, str, dict]]] = {}
+    in_memory_store_images: dict[str, tuple[str, str]] = {}
+    skipped_textures = 0
+    in_memory_textures = 0
+    preview_textures = 0
+    shared_textures = 0
+    shared_bytes = 0
 
-        if not os.path.isdir(converted_path):
-            os.makedirs(converted_path)
+    try:
+        for pack in texture_packs:
+            log.i("Extracting textures...")
 
-        k = 0
-        for idx, file in enumerate(pack.files):
-            if ".rtex" not in file.name:
-                log.w(f"{file.name} is not a texture. Skipping...")
-                continue
-            log.d(f"Extracting {idx+1}/{len(pack.files)}: {file.name}")
-            tex_head: tpGxTexHead = file.content.asset_data
-            file_name = file.name.replace(".rtex", "")
-            texture_filename = file_name + ".dds"
-            texture_path = r2b_extracted_path + "\\" + texture_filename
-            texture_file = open(texture_path, "wb")
-
-            # Magic
-            texture_file.write(str_to_bytes("DDS\x20"))
-            # HeaderSize
-            texture_file.write(uint32_to_bytes(124))
-
-            # Flags
-            is_compressed = tex_head.surface_format.is_compressed()
-            is_3d_texture = tex_head.surface_format.resource_dimension == ResourceDimension.TEXTURE3D
-            flags = 0x1 | 0x2 | 0x4 | 0x1000    # DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT
-            if is_compressed:
-                flags |= 0x80000    # DDSD_LINEARSIZE
-            else:
-                flags |= 0x8        # DDSD_PITCH
-            if tex_head.mip_count > 1:
-                flags |= 0x20000    # DDSD_MIPMAPCOUNT
-            if is_3d_texture and tex_head.depth > 1:
-                flags |= 0x800000    # DDSD_DEPTH
-            texture_file.write(uint32_to_bytes(flags))
-
-            # Height
-            texture_file.write(uint32_to_bytes(tex_head.height))
-            # Width
-            texture_file.write(uint32_to_bytes(tex_head.width))
-
-            # Pitch or LinearSize
-            if is_compressed:
-                # For compressed formats, use the total size
-                texture_file.write(uint32_to_bytes(tex_head.total_data_size))
-            else:
-                # For uncompressed formats, calculate pitch (bytes per scanline)
-                bytes_per_pixel = tex_head.surface_format.get_bytes_per_pixel()
-                pitch = tex_head.width * bytes_per_pixel
-                texture_file.write(uint32_to_bytes(pitch))
-
-            # Depth (only for 3D/volume textures, otherwise 0)
-            depth_value = tex_head.depth if is_3d_texture else 0
-            texture_file.write(uint32_to_bytes(depth_value))
-
-            # MipMapCount
-            texture_file.write(uint32_to_bytes(tex_head.mip_count))
-
-            # Reserved
-            for i in range(11):
-                texture_file.write(uint32_to_bytes(0))
-
-            # DDS_PIXELFORMAT
-            # Size
-            texture_file.write(uint32_to_bytes(32))
-            # Flags
-            texture_file.write(uint32_to_bytes(4))
-            # fourCC
-            texture_file.write(str_to_bytes("DX10"))
-            # RGBBitCount
-            texture_file.write(uint32_to_bytes(0))
-            # RGBABitMasks
-            for i in range(4):
-                texture_file.write(uint32_to_bytes(0))
-
-            # CAPS
-            is_cubemap = tex_head.surface_format.resource_dimension == ResourceDimension.CUBEMAP
-            caps = 0x1000   # DDSCAPS_TEXTURE
-            if tex_head.mip_count > 1 or is_cubemap:
-                caps |= 0x8 | 0x400000    # DDSCAPS_MIPMAP | DDSCAPS_COMPLEX
-            texture_file.write(uint32_to_bytes(caps))
-
-            # CAPS 2
-            caps2 = 0x0
-            if is_3d_texture:
-                caps2 |= 0x200000   # DDSCAPS2_VOLUME
-            if is_cubemap:
-                caps2 |= 0x200 | 0xFE00    # DDSCAPS2_CUBEMAP | all 6 faces (POSITIVEX, NEGATIVEX, POSITIVEY, NEGATIVEY, POSITIVEZ, NEGATIVEZ)
-            texture_file.write(uint32_to_bytes(caps2))
-            # CAPS 3
-            texture_file.write(uint32_to_bytes(0))
-            # CAPS 4
-            texture_file.write(uint32_to_bytes(0))
-            # Reserved
-            texture_file.write(uint32_to_bytes(0))
-
-            # DDS_HEADER_DXT10
-            # DXGI Format
-            dxgi_format = tex_head.surface_format.get_dxgi_format()
-            if dxgi_format == 0:  # DXGI_FORMAT_UNKNOWN
-                log.w(f"Texture extraction failed! {file.name} - Unknown format: {tex_head.surface_format.resource_format.name}")
-                failed_texture_files.append(file)
-                texture_file.close()
-                k += 1
-                continue
-            texture_file.write(uint32_to_bytes(dxgi_format))
+            asset_pack_name = pack.asset_packages[0].name.replace(".xap", "")
 
-            # D3D10 Resource Dimension
-            dimension = tex_head.surface_format.get_d3d10_dimension()
-            texture_file.write(uint32_to_bytes(dimension))
+            r2b_extracted_path = pack_dir + "\\" + "replicant2blender_extracted" + "\\" + asset_pack_name
+            converted_path = r2b_extracted_path + "\\" + "converted"
 
-            # MiscFlags
-            misc_flags = 0
-            if tex_head.surface_format.resource_dimension == ResourceDimension.CUBEMAP:
-                misc_flags = 0x4  # D3D11_RESOURCE_MISC_TEXTURECUBE
-            texture_file.write(uint32_to_bytes(misc_flags))
+            if not os.path.isdir(r2b_extracted_path):
+                os.makedirs(r2b_extracted_path)
 
-            # ArraySize
-            texture_file.write(uint32_to_bytes(1))
+            if not os.path.isdir(converted_path):
+                os.makedirs(converted_path)
 
-            # MiscFlags2 (alpha mode)
-            alpha_mode = tex_head.surface_format.get_alpha_mode()
-            texture_file.write(uint32_to_bytes(alpha_mode))
+            manifest = load_texture_manifest(r2b_extracted_path)
+            manifests[r2b_extracted_path] = manifest
 
-            # TextureData - find and write texture data
+            tex_data_by_index: dict[int, tpGxTexData] = {}
             for file_data in pack.files_data:
-                if file_data.file_index == idx and file_data.tex_data:
-                    # Write all subresource data (all mip levels and depth slices)
-                    for subresource_data in file_data.tex_data.subresource_data:
-                        texture_file.write(subresource_data)
-                    break
+                if file_data.tex_data:
+                    tex_data_by_index.setdefault(file_data.file_index, file_data.tex_data)
+
+            k = 0
+            for idx, file in enumerate(pack.files):
+                if ".rtex" not in file.name:
+                    log.w(f"{file.name} is not a texture. Skipping...")
+                    continue
+                tex_head: tpGxTexHead = file.content.asset_data
+                file_name = file.name.replace(".rtex", "")
+                texture_filename = file_name + ".dds"
+                texture_path = r2b_extracted_path + "\\" + texture_filename
+                tex_data = tex_data_by_index.get(idx)
+
+                # Skip textures whose extracted and converted outputs are already up to date
+                preview_mip = get_preview_mip(tex_head, tex_data, preview_size)
+                manifest_entry = {"head_hash": hash_bytes([file.raw_content_bytes]), "data_hash": hash_bytes(tex_data.subresource_data if tex_data else []), "mip": preview_mip}
+                previous_entry = manifest["textures"].get(file.name)
+                if is_texture_up_to_date(r2b_extracted_path, previous_entry, manifest_entry):
+                    log.d(f"Skipping {idx+1}/{len(pack.files)}: {file.name} (unchanged)")
+                    texture_index.add(texture_path)
+                    texture_index.add(r2b_extracted_path + "\\" + previous_entry["converted"])
+                    skipped_textures += 1
+                    k += 1
+                    continue
+
+                log.d(f"Extracting {idx+1}/{len(pack.files)}: {file.name}")
+                dds_header = build_dds_header(tex_head)
+                if dds_header is None:
+                    log.w(f"Texture extraction failed! {file.name} - Unknown format: {tex_head.surface_format.resource_format.name}")
+                    failed_texture_files.append(file)
+                    k += 1
+                    continue
+
+                # TextureData - all subresource data (all mip levels and depth slices) goes straight after the header
+                dds_chunks = [dds_header] + (tex_data.subresource_data if tex_data else [])
+                store_key = hash_bytes([manifest_entry["head_hash"].encode(), manifest_entry["data_hash"].encode()])
+                store_dds_path = store_path + "\\" + store_key + ".dds"
+                if os.path.isfile(store_dds_path):
+                    shared_textures += 1
+                    shared_bytes += sum(len(chunk) for chunk in dds_chunks)
+                else:
+                    write_chunks(store_dds_path, dds_chunks)
+                link_or_copy(store_dds_path, texture_path)
+                texture_index.add(texture_path)
+                extracted_textures_paths.append(texture_path)
+                manifest_entry["dds"] = texture_filename
+
+                # Previews of the same texture at different sizes are separate conversions
+                store_converted_base = store_path + "\\" + store_key + (f"_mip{preview_mip}" if preview_mip > 0 else "")
+                if preview_mip > 0:
+                    preview_textures += 1
+                k += 1
 
-            texture_file.close()
-            extracted_textures_paths.append(texture_path)
-            k += 1
-
-    log.i(f"Finished extracting {len(extracted_textures_paths)} textures.")
-
-    if extracted_textures_paths:
-        from puredds import DDS
-        import imageio
-        log.i(f"Converting {len(extracted_textures_paths)} textures...")
-
-        failed_conversions = 0
-        for idx, texture_path in enumerate(extracted_textures_paths):
-            try:
-                directory = os.path.dirname(texture_path)
-                converted_path = directory + "\\converted\\"
-                out_path = converted_path + os.path.basename(texture_path).replace(".dds", ".png")
-
-                log.d(f"Converting {idx+1}/{len(extracted_textures_paths)}: {os.path.basename(texture_path)}")
-
-                with open(texture_path, 'rb') as f:
-                    data = f.read()
-                dds = DDS.from_bytes(data)
-                image = dds.to_image()
-                if image.dtype == np.float32:
-                    out_path = out_path.replace(".png", ".tif") # Use .tif for HDR
-                imageio.imwrite(out_path, image)
-            except Exception as e:
-                log.e(f"Failed to convert {texture_path}! Error: {e}")
-                failed_conversions += 1
-
-        success_count = len(extracted_textures_paths) - failed_conversions
-        log.i(f"Finished converting textures. Success: {success_count}/{len(extracted_textures_paths)}")
-    return failed_texture_files
\ No newline at end of file
+                if not write_converted and store_converted_base in in_memory_store_images:
+                    image_name, image_extension = in_memory_store_images[store_converted_base]
+                    in_memory_texture_images[file_name + image_extension] = image_name
+                    in_memory_textures += 1
+                    continue
+                if write_converted:
+                    store_converted_path = next((store_converted_base + ext for ext in (".png", ".tif") if os.path.isfile(store_converted_base + ext)), None)
+                    if store_converted_path is not None:
+                        # Converted by an earlier import of this or another pack
+                        texture_converted_path = converted_path + "\\" + file_name + os.path.splitext(store_converted_path)[1]
+                        link_or_copy(store_converted_path, texture_converted_path)
+                        texture_index.add(texture_converted_path)
+                        manifest_entry["converted"] = os.path.relpath(texture_converted_path, r2b_extracted_path)
+                        manifest["textures"][file.name] = manifest_entry
+                        continue
+                    if store_converted_base in pending_conversions:
+                        pending_conversions[store_converted_base].append((r2b_extracted_path, file.name, converted_path + "\\" + file_name, manifest_entry))
+                        continue
+
+                dds_bytes = b"".join(dds_chunks)
+                if preview_mip > 0:
+                    # The full DDS stays on disk for export and upgrading, only the preview mip is decoded
+                    subresource = tex_head.subresources[preview_mip]
+                    preview_data = tex_data.subresource_data[preview_mip]
+                    preview_head = dataclasses.replace(tex_head, width=subresource.width, height=subresource.height, mip_count=1, total_data_size=len(preview_data))
+                    dds_bytes = build_dds_header(preview_head) + preview_data
+                if not write_converted:
+                    # Decode straight into a Blender image, the PNG/TIF is only written if the user saves it
+                    try:
+                        image = decode_dds_image(dds_bytes)
+                    except Exception as e:
+                        log.e(f"Failed to decode {texture_path}! Error: {e}")
+                        continue
+                    image_extension = ".tif" if image.dtype == np.float32 else ".png"
+                    b_image = create_texture_image(file_name + image_extension, image, converted_path + "\\" + file_name + image_extension)
+                    in_memory_texture_images[file_name + image_extension] = b_image.name
+                    in_memory_store_images[store_converted_base] = (b_image.name, image_extension)
+                    in_memory_textures += 1
+                    continue
+                conversion_pool.submit(store_converted_base, dds_bytes, store_converted_base + ".png")
+                pending_conversions[store_converted_base] = [(r2b_extracted_path, file.name, converted_path + "\\" + file_name, manifest_entry)]
+
+        log.i(f"Finished extracting {len(extracted_textures_paths)} textures.")
+        if shared_textures > 0:
+            log.i(f"{shared_textures} textures were already in the shared store, saved writing {shared_bytes / (1024 * 1024):.2f} MB.")
+        if in_memory_textures > 0:
+            log.i(f"Decoded {in_memory_textures} textures directly into Blender images without writing PNG/TIF files.")
+        if preview_textures > 0:
+            log.i(f"Decoded only a preview mip of {preview_textures} textures, upgrade materials to full resolution from the material panel.")
+        if skipped_textures > 0:
+            log.i(f"Skipped {skipped_textures} textures that were already extracted and converted.")
+
+        if pending_conversions:
+            log.i(f"Converting {len(pending_conversions)} unique textures using {conversion_pool.max_workers} processes...")
+
+            failed_conversions = 0
+            for idx, (store_converted_base, out_path, error) in enumerate(conversion_pool.results()):
+                waiting = pending_conversions[store_converted_base]
+                if error is not None:
+                    log.e(f"Failed to convert {waiting[0][2]}! Error: {error}")
+                    for r2b_extracted_path, texture_name, _, _ in waiting:
+                        manifests[r2b_extracted_path]["textures"].pop(texture_name, None)
+                    failed_conversions += 1
+                    continue
+                log.d(f"Converted {idx+1}/{len(pending_conversions)}: {os.path.basename(waiting[0][2])}")
+                for r2b_extracted_path, texture_name, texture_converted_base, manifest_entry in waiting:
+                    texture_converted_path = texture_converted_base + os.path.splitext(out_path)[1]
+                    link_or_copy(out_path, texture_converted_path)
+                    texture_index.add(texture_converted_path)
+                    manifest_entry["converted"] = os.path.relpath(texture_converted_path, r2b_extracted_path)
+                    manifests[r2b_extracted_path]["textures"][texture_name] = manifest_entry
+
+            success_count = len(pending_conversions) - failed_conversions
+            log.i(f"Finished converting textures. Success: {success_count}/{len(pending_conversions)}")
+    finally:
+        conversion_pool.close()
+
+    for r2b_extracted_path, manifest in manifests.items():
+        save_texture_manifest(r2b_extracted_path, manifest)
+    return failed_texture_files
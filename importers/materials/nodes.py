@@ -3,7 +3,7 @@ from bpy.types import Material, Node, NodeTree, Nodes
 import bpy
 
 from ...classes.material_instance import tpGxMaterialInstanceV2
-from ...util import log, search_texture
+from ...util import load_texture_image, log
 
 # Renamed in 5.0
 sepRGB_name = "ShaderNodeSeparateRGB" if bpy.app.version < (5, 0, 0) else "ShaderNodeSeparateColor"
@@ -15,8 +15,7 @@ def texture_sampler(material: Material, nodes: Nodes, instance: tpGxMaterialInst
     tex_index = next((i for i, x in enumerate(instance.texture_samplers) if x.name == sampler_name), None)        
     tex_node = nodes.new(type='ShaderNodeTexImage')
     if tex_index is not None:
-        texture = search_texture(textures_dir, converted_textures[tex_index])
-        tex_node.image = bpy.data.images.load(texture)
+        tex_node.image = load_texture_image(textures_dir, converted_textures[tex_index])
         for sampler in material.replicant_texture_samplers:
             if sampler.name == sampler_name:
                 # sampler.texture_path = texture # Temporarily disable to prioritise DDS
@@ -32,8 +31,7 @@ def first_texture_sampler(material: Material, nodes: Nodes, instance: tpGxMateri
     tex_node = nodes.new(type='ShaderNodeTexImage')
     if tex_index is not None:
         sampler_name = tex.name
-        texture = search_texture(textures_dir, converted_textures[tex_index])
-        tex_node.image = bpy.data.images.load(texture)
+        tex_node.image = load_texture_image(textures_dir, converted_textures[tex_index])
         tex_node.label = sampler_name
         for sampler in material.replicant_texture_samplers:
             if sampler.name == sampler_name:
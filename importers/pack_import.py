@@ -5,7 +5,8 @@ from .levelData_import import importLevelData
 from ..classes.pack import *
 from .mesh_import import construct_meshes
 from .material_import import construct_materials, extract_textures, setup_texture_sampler_dxgi_data
-from ..util import log
+from ..classes.archive_reader import clear_archive_readers, get_archive_reader, is_archive_path, make_archive_path, resolve_archive_import, split_archive_path
+from ..util import clear_texture_indices, log
 
 imported_texture_packs = []
 failed_texture_packs = []
@@ -14,9 +15,24 @@ imported_material_packs = []
 def clear_import_lists():
     imported_material_packs.clear()
     imported_texture_packs.clear()
-
-def main(pack_path: str, do_extract_textures: bool, do_construct_materials: bool, addon_name: str):
-    pack_directory = os.path.dirname(os.path.abspath(pack_path))
+    clear_texture_indices()
+    clear_archive_readers()
+
+def resolve_import_path(pack_path: str, pack_directory: str, import_path: str) -> str | None:
+    """Path of a PACK imported by pack_path. Loose files are looked up next to it, archive entries in its archive set."""
+    if is_archive_path(pack_path):
+        return resolve_archive_import(pack_path, import_path)
+    resolved_path = pack_directory + "\\" + import_path.split('/')[-1]
+    if os.path.isfile(resolved_path):
+        return resolved_path
+    if os.path.isfile(resolved_path + ".xap"):
+        return resolved_path + ".xap"
+    return None
+
+def main(pack_path: str, do_extract_textures: bool, do_construct_materials: bool, addon_name: str, write_converted_textures: bool = True, preview_size: int = 0):
+    # PACKs inside archives extract their textures next to the archive set's info.arc
+    archive_path = split_archive_path(pack_path)
+    pack_directory = os.path.dirname(os.path.abspath(archive_path[0] if archive_path else pack_path))
 
     # Import meshes
     log.i(f"Parsing Mesh PACK file... {pack_path}")
@@ -29,17 +45,13 @@ def main(pack_path: str, do_extract_textures: bool, do_construct_materials: bool
     failed_texture_files = []
     if do_extract_textures or do_construct_materials:
         material_packs: list[Pack] = []
+        material_pack_paths: list[str] = []
         for import_entry in pack.imports:
-            material_pack_filename = import_entry.path.split('/')[-1]
-            material_pack_path = pack_directory + "\\" + material_pack_filename
-
-            if not os.path.isfile(material_pack_path):
-                if os.path.isfile(material_pack_path + ".xap"):
-                    material_pack_path += ".xap"
-                else:
-                    log.w(f"Failed to find material PACK file: {material_pack_path}")
-                    continue
-            
+            material_pack_path = resolve_import_path(pack_path, pack_directory, import_entry.path)
+            if material_pack_path is None:
+                log.w(f"Failed to find material PACK file: {import_entry.path}")
+                continue
+
             if (material_pack_path not in imported_material_packs):
                 log.i(f"Parsing Material PACK file... {import_entry.path}")
                 material_pack = Pack.from_file(material_pack_path)
@@ -58,24 +70,22 @@ def main(pack_path: str, do_extract_textures: bool, do_construct_materials: bool
                             break
                     if has_material:
                         material_packs.append(material_pack)
+                        material_pack_paths.append(material_pack_path)
                         break
                 if not has_material:
                     log.w(f"{import_entry.path} did not contain any material instances, skipping...")
 
         texture_packs: list[Pack] = []
-        for material_pack in material_packs:
+        for material_pack, material_pack_path in zip(material_packs, material_pack_paths):
             for import_entry in material_pack.imports:
                 texture_pack_filename = import_entry.path.split('/')[-1]
-                texture_pack_path = pack_directory + "\\" + texture_pack_filename
-
-                if not os.path.isfile(texture_pack_path):
-                    if os.path.isfile(texture_pack_path + ".xap"):
-                        texture_pack_path += ".xap"
-                    else:
-                        if (texture_pack_path not in failed_texture_packs):
-                            failed_texture_packs.append(texture_pack_path)
-                            log.w(f"Failed to find texture PACK import file: {texture_pack_filename}")
-                        continue
+                texture_pack_path = resolve_import_path(material_pack_path, pack_directory, import_entry.path)
+
+                if texture_pack_path is None:
+                    if (import_entry.path not in failed_texture_packs):
+                        failed_texture_packs.append(import_entry.path)
+                        log.w(f"Failed to find texture PACK import file: {texture_pack_filename}")
+                    continue
 
                 if (texture_pack_path not in imported_texture_packs):
                     log.i(f"Parsing Texture PACK file... {import_entry.path}")
@@ -91,7 +101,7 @@ def main(pack_path: str, do_extract_textures: bool, do_construct_materials: bool
                         log.w(f"{import_entry.path} did not contain any textures, skipping...")
 
         if do_extract_textures:
-            failed_texture_files: list[PackFile] = extract_textures(pack_directory, texture_packs)
+            failed_texture_files: list[PackFile] = extract_textures(pack_directory, texture_packs, write_converted_textures, preview_size)
 
         if do_construct_materials:
             construct_materials(pack_directory, material_packs)
@@ -104,7 +114,8 @@ def main(pack_path: str, do_extract_textures: bool, do_construct_materials: bool
         log.i('Importing finished. ;)')
 
 def only_extract_textures(pack_path: str, addon_name: str):
-    pack_directory = os.path.dirname(os.path.abspath(pack_path))
+    archive_path = split_archive_path(pack_path)
+    pack_directory = os.path.dirname(os.path.abspath(archive_path[0] if archive_path else pack_path))
 
     texturePack = Pack.from_file(pack_path)
     failed_texture_files: list[PackFile] = extract_textures(pack_directory, [texturePack])
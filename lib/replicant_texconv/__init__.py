@@ -0,0 +1,7 @@
+"""
+Texture conversion code that runs outside of Blender.
+
+Nothing in this package may import bpy or the add-on's own modules: it is
+imported as a top-level package (see util.register_texconv_path) so that worker
+processes spawned by ProcessPoolExecutor can unpickle references to it.
+"""
@@ -0,0 +1,647 @@
+"""
+Block-compressed (BCn) texture decoding.
+
+Decodes a single mip level straight out of the DDS bytes into one
+preallocated array, without splitting the rest of the mip chain or
+allocating per block. Output matches puredds: (height, width, 4) uint8 RGBA
+for BC1-BC5 and BC7, (height, width, 3) float32 RGB for BC6H.
+"""
+import struct
+
+import numpy as np
+from numba import njit
+
+# DXGI_FORMAT values produced by XonSurfaceFormat.get_dxgi_format
+DXGI_BC1_UNORM = 71
+DXGI_BC1_UNORM_SRGB = 72
+DXGI_BC2_UNORM = 74
+DXGI_BC2_UNORM_SRGB = 75
+DXGI_BC3_UNORM = 77
+DXGI_BC3_UNORM_SRGB = 78
+DXGI_BC4_UNORM = 80
+DXGI_BC5_UNORM = 83
+DXGI_BC6H_UF16 = 95
+DXGI_BC6H_SF16 = 96
+DXGI_BC7_UNORM = 98
+DXGI_BC7_UNORM_SRGB = 99
+
+BLOCK_SIZES = {
+    DXGI_BC1_UNORM: 8, DXGI_BC1_UNORM_SRGB: 8,
+    DXGI_BC2_UNORM: 16, DXGI_BC2_UNORM_SRGB: 16,
+    DXGI_BC3_UNORM: 16, DXGI_BC3_UNORM_SRGB: 16,
+    DXGI_BC4_UNORM: 8,
+    DXGI_BC5_UNORM: 16,
+    DXGI_BC6H_UF16: 16, DXGI_BC6H_SF16: 16,
+    DXGI_BC7_UNORM: 16, DXGI_BC7_UNORM_SRGB: 16,
+}
+
+DDS_HEADER_SIZE = 128       # Magic + DDS_HEADER
+DX10_HEADER_SIZE = 20
+DDSCAPS2_VOLUME = 0x200000
+
+WEIGHTS_2 = np.array([0, 21, 43, 64], dtype=np.int32)
+WEIGHTS_3 = np.array([0, 9, 18, 27, 37, 46, 55, 64], dtype=np.int32)
+WEIGHTS_4 = np.array([0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64], dtype=np.int32)
+
+# BPTC partition and anchor tables (Khronos EXT_texture_compression_bptc)
+PARTITION_TABLE_2 = np.array([
+    [0,0,1,1,0,0,1,1,0,0,1,1,0,0,1,1], [0,0,0,1,0,0,0,1,0,0,0,1,0,0,0,1],
+    [0,1,1,1,0,1,1,1,0,1,1,1,0,1,1,1], [0,0,0,1,0,0,1,1,0,0,1,1,0,1,1,1],
+    [0,0,0,0,0,0,0,1,0,0,0,1,0,0,1,1], [0,0,1,1,0,1,1,1,0,1,1,1,1,1,1,1],
+    [0,0,0,1,0,0,1,1,0,1,1,1,1,1,1,1], [0,0,0,0,0,0,0,1,0,0,1,1,0,1,1,1],
+    [0,0,0,0,0,0,0,0,0,0,0,1,0,0,1,1], [0,0,1,1,0,1,1,1,1,1,1,1,1,1,1,1],
+    [0,0,0,0,0,0,0,1,0,1,1,1,1,1,1,1], [0,0,0,0,0,0,0,0,0,0,0,1,0,1,1,1],
+    [0,0,0,1,0,1,1,1,1,1,1,1,1,1,1,1], [0,0,0,0,0,0,0,0,1,1,1,1,1,1,1,1],
+    [0,0,0,0,1,1,1,1,1,1,1,1,1,1,1,1], [0,0,0,0,0,0,0,0,0,0,0,0,1,1,1,1],
+    [0,0,0,0,1,0,0,0,1,1,1,0,1,1,1,1], [0,1,1,1,0,0,0,1,0,0,0,0,0,0,0,0],
+    [0,0,0,0,0,0,0,0,1,0,0,0,1,1,1,0], [0,1,1,1,0,0,1,1,0,0,0,1,0,0,0,0],
+    [0,0,1,1,0,0,0,1,0,0,0,0,0,0,0,0], [0,0,0,0,1,0,0,0,1,1,0,0,1,1,1,0],
+    [0,0,0,0,0,0,0,0,1,0,0,0,1,1,0,0], [0,1,1,1,0,0,1,1,0,0,1,1,0,0,0,1],
+    [0,0,1,1,0,0,0,1,0,0,0,1,0,0,0,0], [0,0,0,0,1,0,0,0,1,0,0,0,1,1,0,0],
+    [0,1,1,0,0,1,1,0,0,1,1,0,0,1,1,0], [0,0,1,1,0,1,1,0,0,1,1,0,1,1,0,0],
+    [0,0,0,1,0,1,1,1,1,1,1,0,1,0,0,0], [0,0,0,0,1,1,1,1,1,1,1,1,0,0,0,0],
+    [0,1,1,1,0,0,0,1,1,0,0,0,1,1,1,0], [0,0,1,1,1,0,0,1,1,0,0,1,1,1,0,0],
+    [0,1,0,1,0,1,0,1,0,1,0,1,0,1,0,1], [0,0,0,0,1,1,1,1,0,0,0,0,1,1,1,1],
+    [0,1,0,1,1,0,1,0,0,1,0,1,1,0,1,0], [0,0,1,1,0,0,1,1,1,1,0,0,1,1,0,0],
+    [0,0,1,1,1,1,0,0,0,0,1,1,1,1,0,0], [0,1,0,1,0,1,0,1,1,0,1,0,1,0,1,0],
+    [0,1,1,0,1,0,0,1,0,1,1,0,1,0,0,1], [0,1,0,1,1,0,1,0,1,0,1,0,0,1,0,1],
+    [0,1,1,1,0,0,1,1,1,1,0,0,1,1,1,0], [0,0,0,1,0,0,1,1,1,1,0,0,1,0,0,0],
+    [0,0,1,1,0,0,1,0,0,1,0,0,1,1,0,0], [0,0,1,1,1,0,1,1,1,1,0,1,1,1,0,0],
+    [0,1,1,0,1,0,0,1,1,0,0,1,0,1,1,0], [0,0,1,1,1,1,0,0,1,1,0,0,0,0,1,1],
+    [0,1,1,0,0,1,1,0,1,0,0,1,1,0,0,1], [0,0,0,0,0,1,1,0,0,1,1,0,0,0,0,0],
+    [0,1,0,0,1,1,1,0,0,1,0,0,0,0,0,0], [0,0,1,0,0,1,1,1,0,0,1,0,0,0,0,0],
+    [0,0,0,0,0,0,1,0,0,1,1,1,0,0,1,0], [0,0,0,0,0,1,0,0,1,1,1,0,0,1,0,0],
+    [0,1,1,0,1,1,0,0,1,0,0,1,0,0,1,1], [0,0,1,1,0,1,1,0,1,1,0,0,1,0,0,1],
+    [0,1,1,0,0,0,1,1,1,0,0,1,1,1,0,0], [0,0,1,1,1,0,0,1,1,1,0,0,0,1,1,0],
+    [0,1,1,0,1,1,0,0,1,1,0,0,1,0,0,1], [0,1,1,0,0,0,1,1,0,0,1,1,1,0,0,1],
+    [0,1,1,1,1,1,1,0,1,0,0,0,0,0,0,1], [0,0,0,1,1,0,0,0,1,1,1,0,0,1,1,1],
+    [0,0,0,0,1,1,1,1,0,0,1,1,0,0,1,1], [0,0,1,1,0,0,1,1,1,1,1,1,0,0,0,0],
+    [0,0,1,0,0,0,1,0,1,1,1,0,1,1,1,0], [0,1,0,0,0,1,0,0,0,1,1,1,0,1,1,1],
+], dtype=np.uint8)
+
+PARTITION_TABLE_3 = np.array([
+    [0,0,1,1,0,0,1,1,0,2,2,1,2,2,2,2], [0,0,0,1,0,0,1,1,2,2,1,1,2,2,2,1],
+    [0,0,0,0,2,0,0,1,2,2,1,1,2,2,1,1], [0,2,2,2,0,0,2,2,0,0,1,1,0,1,1,1],
+    [0,0,0,0,0,0,0,0,1,1,2,2,1,1,2,2], [0,0,1,1,0,0,1,1,0,0,2,2,0,0,2,2],
+    [0,0,2,2,0,0,2,2,1,1,1,1,1,1,1,1], [0,0,1,1,0,0,1,1,2,2,1,1,2,2,1,1],
+    [0,0,0,0,0,0,0,0,1,1,1,1,2,2,2,2], [0,0,0,0,1,1,1,1,1,1,1,1,2,2,2,2],
+    [0,0,0,0,1,1,1,1,2,2,2,2,2,2,2,2], [0,0,1,2,0,0,1,2,0,0,1,2,0,0,1,2],
+    [0,1,1,2,0,1,1,2,0,1,1,2,0,1,1,2], [0,1,2,2,0,1,2,2,0,1,2,2,0,1,2,2],
+    [0,0,1,1,0,1,1,2,1,1,2,2,1,2,2,2], [0,0,1,1,2,0,0,1,2,2,0,0,2,2,2,0],
+    [0,0,0,1,0,0,1,1,0,1,1,2,1,1,2,2], [0,1,1,1,0,0,1,1,2,0,0,1,2,2,0,0],
+    [0,0,0,0,1,1,2,2,1,1,2,2,1,1,2,2], [0,0,2,2,0,0,2,2,0,0,2,2,1,1,1,1],
+    [0,1,1,1,0,1,1,1,0,2,2,2,0,2,2,2], [0,0,0,1,0,0,0,1,2,2,2,1,2,2,2,1],
+    [0,0,0,0,0,0,1,1,0,1,2,2,0,1,2,2], [0,0,0,0,1,1,0,0,2,2,1,0,2,2,1,0],
+    [0,1,2,2,0,1,2,2,0,0,1,1,0,0,0,0], [0,0,1,2,0,0,1,2,1,1,2,2,2,2,2,2],
+    [0,1,1,0,1,2,2,1,1,2,2,1,0,1,1,0], [0,0,0,0,0,1,1,0,1,2,2,1,1,2,2,1],
+    [0,0,2,2,1,1,0,2,1,1,0,2,0,0,2,2], [0,1,1,0,0,1,1,0,2,0,0,2,2,2,2,2],
+    [0,0,1,1,0,1,2,2,0,1,2,2,0,0,1,1], [0,0,0,0,2,0,0,0,2,2,1,1,2,2,2,1],
+    [0,0,0,0,0,0,0,2,1,1,2,2,1,2,2,2], [0,2,2,2,0,0,2,2,0,0,1,2,0,0,1,1],
+    [0,0,1,1,0,0,1,2,0,0,2,2,0,2,2,2], [0,1,2,0,0,1,2,0,0,1,2,0,0,1,2,0],
+    [0,0,0,0,1,1,1,1,2,2,2,2,0,0,0,0], [0,1,2,0,1,2,0,1,2,0,1,2,0,1,2,0],
+    [0,1,2,0,2,0,1,2,1,2,0,1,0,1,2,0], [0,0,1,1,2,2,0,0,1,1,2,2,0,0,1,1],
+    [0,0,1,1,1,1,2,2,2,2,0,0,0,0,1,1], [0,1,0,1,0,1,0,1,2,2,2,2,2,2,2,2],
+    [0,0,0,0,0,0,0,0,2,1,2,1,2,1,2,1], [0,0,2,2,1,1,2,2,0,0,2,2,1,1,2,2],
+    [0,0,2,2,0,0,1,1,0,0,2,2,0,0,1,1], [0,2,2,0,1,2,2,1,0,2,2,0,1,2,2,1],
+    [0,1,0,1,2,2,2,2,2,2,2,2,0,1,0,1], [0,0,0,0,2,1,2,1,2,1,2,1,2,1,2,1],
+    [0,1,0,1,0,1,0,1,0,1,0,1,2,2,2,2], [0,2,2,2,0,1,1,1,0,2,2,2,0,1,1,1],
+    [0,0,0,2,1,1,1,2,0,0,0,2,1,1,1,2], [0,0,0,0,2,1,1,2,2,1,1,2,2,1,1,2],
+    [0,2,2,2,0,1,1,1,0,1,1,1,0,2,2,2], [0,0,0,2,1,1,1,2,1,1,1,2,0,0,0,2],
+    [0,1,1,0,0,1,1,0,0,1,1,0,2,2,2,2], [0,0,0,0,0,0,0,0,2,1,1,2,2,1,1,2],
+    [0,1,1,0,0,1,1,0,2,2,2,2,2,2,2,2], [0,0,2,2,0,0,1,1,0,0,1,1,0,0,2,2],
+    [0,0,2,2,1,1,2,2,1,1,2,2,0,0,2,2], [0,0,0,0,0,0,0,0,0,0,0,0,2,1,1,2],
+    [0,0,0,2,0,0,0,1,0,0,0,2,0,0,0,1], [0,2,2,2,1,2,2,2,0,2,2,2,1,2,2,2],
+    [0,1,0,1,2,2,2,2,2,2,2,2,2,2,2,2], [0,1,1,1,2,0,1,1,2,2,0,1,2,2,2,0],
+], dtype=np.uint8)
+
+ANCHOR_TABLE_2 = np.array([
+    15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,15,
+    15, 2, 8, 2, 2, 8, 8,15, 2, 8, 2, 2, 8, 8, 2, 2,
+    15,15, 6, 8, 2, 8,15,15, 2, 8, 2, 2, 2,15,15, 6,
+     6, 2, 6, 8,15,15, 2, 2,15,15,15,15,15, 2, 2,15,
+], dtype=np.uint8)
+
+ANCHOR_TABLE_3_SUBSET_1 = np.array([
+     3, 3,15,15, 8, 3,15,15, 8, 8, 6, 6, 6, 5, 3, 3,
+     3, 3, 8,15, 3, 3, 6,10, 5, 8, 8, 6, 8, 5,15,15,
+     8,15, 3, 5, 6,10, 8,15,15, 3,15, 5,15,15,15,15,
+     3,15, 5, 5, 5, 8, 5,10, 5,10, 8,13,15,12, 3, 3,
+], dtype=np.uint8)
+
+ANCHOR_TABLE_3_SUBSET_2 = np.array([
+    15, 8, 8, 3,15,15, 3, 8,15,15,15,15,15,15,15, 8,
+    15, 8,15, 3,15, 8,15, 8, 3,15, 6,10,15,15,10, 8,
+    15, 3,15,10,10, 8, 9,10, 6,15, 8,15, 3, 6, 6, 8,
+    15, 3,15,15,15,15,15,15,15,15,15,15, 3,15,15, 8,
+], dtype=np.uint8)
+
+# BC7 modes: subsets, partition bits, rotation bits, index selection bits,
+# color bits, alpha bits, per-endpoint p-bits, shared p-bits, index bits, secondary index bits
+BC7_MODES = np.array([
+    [3, 4, 0, 0, 4, 0, 1, 0, 3, 0],
+    [2, 6, 0, 0, 6, 0, 0, 1, 3, 0],
+    [3, 6, 0, 0, 5, 0, 0, 0, 2, 0],
+    [2, 6, 0, 0, 7, 0, 1, 0, 2, 0],
+    [1, 0, 2, 1, 5, 6, 0, 0, 2, 3],
+    [1, 0, 2, 0, 7, 8, 0, 0, 2, 2],
+    [1, 0, 0, 0, 7, 7, 1, 0, 4, 0],
+    [2, 6, 0, 0, 5, 5, 1, 0, 2, 0],
+], dtype=np.int32)
+
+# BC6H modes: base bits, delta bits (R, G, B), subsets, transformed endpoints, index bits
+BC6H_MODES = np.array([
+    [10, 5, 5, 5, 2, 1, 3],
+    [ 7, 6, 6, 6, 2, 1, 3],
+    [11, 5, 4, 4, 2, 1, 3],
+    [11, 4, 5, 4, 2, 1, 3],
+    [11, 4, 4, 5, 2, 1, 3],
+    [ 9, 5, 5, 5, 2, 1, 3],
+    [ 8, 6, 5, 5, 2, 1, 3],
+    [ 8, 5, 6, 5, 2, 1, 3],
+    [ 8, 5, 5, 6, 2, 1, 3],
+    [ 6, 6, 6, 6, 2, 0, 3],
+    [10,10,10,10, 1, 0, 4],
+    [11, 9, 9, 9, 1, 1, 4],
+    [12, 8, 8, 8, 1, 1, 4],
+    [16, 4, 4, 4, 1, 1, 4],
+], dtype=np.int32)
+
+# BC6H mode code (2 bits, or 5 bits when the low 2 bits are >= 2) to mode index, -1 for reserved codes
+BC6H_MODE_CODES = np.array([
+     0,  1,  2, 10,  0,  1,  3, 11,  0,  1,  4, 12,  0,  1,  5, 13,
+     0,  1,  6, -1,  0,  1,  7, -1,  0,  1,  8, -1,  0,  1,  9, -1,
+], dtype=np.int32)
+
+# BC6H endpoint bit layout: runs of (endpoint field, shift, bit count, reversed) read after the mode code.
+# Fields are channel * 4 + endpoint, channels R=0 G=1 B=2.
+R0, R1, R2, R3, G0, G1, G2, G3, B0, B1, B2, B3 = range(12)
+_bc6h_layouts = [
+    [(G2,4,1,0),(B2,4,1,0),(B3,4,1,0),(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,5,0),(G3,4,1,0),(G2,0,4,0),(G1,0,5,0),
+     (B3,0,1,0),(G3,0,4,0),(B1,0,5,0),(B3,1,1,0),(B2,0,4,0),(R2,0,5,0),(B3,2,1,0),(R3,0,5,0),(B3,3,1,0)],
+    [(G2,5,1,0),(G3,4,1,0),(G3,5,1,0),(R0,0,7,0),(B3,0,1,0),(B3,1,1,0),(B2,4,1,0),(G0,0,7,0),(B2,5,1,0),(B3,2,1,0),
+     (G2,4,1,0),(B0,0,7,0),(B3,3,1,0),(B3,5,1,0),(B3,4,1,0),(R1,0,6,0),(G2,0,4,0),(G1,0,6,0),(G3,0,4,0),(B1,0,6,0),
+     (B2,0,4,0),(R2,0,6,0),(R3,0,6,0)],
+    [(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,5,0),(R0,10,1,0),(G2,0,4,0),(G1,0,4,0),(G0,10,1,0),(B3,0,1,0),(G3,0,4,0),
+     (B1,0,4,0),(B0,10,1,0),(B3,1,1,0),(B2,0,4,0),(R2,0,5,0),(B3,2,1,0),(R3,0,5,0),(B3,3,1,0)],
+    [(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,4,0),(R0,10,1,0),(G3,4,1,0),(G2,0,4,0),(G1,0,5,0),(G0,10,1,0),(G3,0,4,0),
+     (B1,0,4,0),(B0,10,1,0),(B3,1,1,0),(B2,0,4,0),(R2,0,4,0),(B3,0,1,0),(B3,2,1,0),(R3,0,4,0),(G2,4,1,0),(B3,3,1,0)],
+    [(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,4,0),(R0,10,1,0),(B2,4,1,0),(G2,0,4,0),(G1,0,4,0),(G0,10,1,0),(B3,0,1,0),
+     (G3,0,4,0),(B1,0,5,0),(B0,10,1,0),(B2,0,4,0),(R2,0,4,0),(B3,1,1,0),(B3,2,1,0),(R3,0,4,0),(B3,4,1,0),(B3,3,1,0)],
+    [(R0,0,9,0),(B2,4,1,0),(G0,0,9,0),(G2,4,1,0),(B0,0,9,0),(B3,4,1,0),(R1,0,5,0),(G3,4,1,0),(G2,0,4,0),(G1,0,5,0),
+     (B3,0,1,0),(G3,0,4,0),(B1,0,5,0),(B3,1,1,0),(B2,0,4,0),(R2,0,5,0),(B3,2,1,0),(R3,0,5,0),(B3,3,1,0)],
+    [(R0,0,8,0),(G3,4,1,0),(B2,4,1,0),(G0,0,8,0),(B3,2,1,0),(G2,4,1,0),(B0,0,8,0),(B3,3,1,0),(B3,4,1,0),(R1,0,6,0),
+     (G2,0,4,0),(G1,0,5,0),(B3,0,1,0),(G3,0,4,0),(B1,0,5,0),(B3,1,1,0),(B2,0,4,0),(R2,0,6,0),(R3,0,6,0)],
+    [(R0,0,8,0),(B3,0,1,0),(B2,4,1,0),(G0,0,8,0),(G2,5,1,0),(G2,4,1,0),(B0,0,8,0),(G3,5,1,0),(B3,4,1,0),(R1,0,5,0),
+     (G3,4,1,0),(G2,0,4,0),(G1,0,6,0),(G3,0,4,0),(B1,0,5,0),(B3,1,1,0),(B2,0,4,0),(R2,0,5,0),(B3,2,1,0),(R3,0,5,0),
+     (B3,3,1,0)],
+    [(R0,0,8,0),(B3,1,1,0),(B2,4,1,0),(G0,0,8,0),(B2,5,1,0),(G2,4,1,0),(B0,0,8,0),(B3,5,1,0),(B3,4,1,0),(R1,0,5,0),
+     (G3,4,1,0),(G2,0,4,0),(G1,0,5,0),(B3,0,1,0),(G3,0,4,0),(B1,0,6,0),(B2,0,4,0),(R2,0,5,0),(B3,2,1,0),(R3,0,5,0),
+     (B3,3,1,0)],
+    [(R0,0,6,0),(G3,4,1,0),(B3,0,1,0),(B3,1,1,0),(B2,4,1,0),(G0,0,6,0),(G2,5,1,0),(B2,5,1,0),(B3,2,1,0),(G2,4,1,0),
+     (B0,0,6,0),(G3,5,1,0),(B3,3,1,0),(B3,5,1,0),(B3,4,1,0),(R1,0,6,0),(G2,0,4,0),(G1,0,6,0),(G3,0,4,0),(B1,0,6,0),
+     (B2,0,4,0),(R2,0,6,0),(R3,0,6,0)],
+    [(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,10,0),(G1,0,10,0),(B1,0,10,0)],
+    [(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,9,0),(R0,10,1,0),(G1,0,9,0),(G0,10,1,0),(B1,0,9,0),(B0,10,1,0)],
+    [(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,8,0),(R0,10,2,1),(G1,0,8,0),(G0,10,2,1),(B1,0,8,0),(B0,10,2,1)],
+    [(R0,0,10,0),(G0,0,10,0),(B0,0,10,0),(R1,0,4,0),(R0,10,6,1),(G1,0,4,0),(G0,10,6,1),(B1,0,4,0),(B0,10,6,1)],
+]
+
+# Every half float bit pattern widened to float32
+HALF_TO_FLOAT = np.arange(0x10000, dtype=np.uint16).view(np.float16).astype(np.float32)
+
+BC6H_LAYOUTS = np.zeros((len(_bc6h_layouts), max(len(layout) for layout in _bc6h_layouts), 4), dtype=np.int32)
+for _mode, _layout in enumerate(_bc6h_layouts):
+    BC6H_LAYOUTS[_mode, :len(_layout)] = _layout
+
+
+@njit(cache=True, nogil=True)
+def _read_bits(block, offset, count):
+    """Read count bits (LSB first) starting at bit offset of a block."""
+    result = 0
+    bits_read = 0
+    while bits_read < count:
+        byte = block[offset >> 3]
+        bit = offset & 7
+        take = min(count - bits_read, 8 - bit)
+        result |= ((byte >> bit) & ((1 << take) - 1)) << bits_read
+        bits_read += take
+        offset += take
+    return result
+
+
+@njit(cache=True, nogil=True)
+def _read_uint(block, start, size):
+    value = 0
+    for i in range(size):
+        value |= np.int64(block[start + i]) << (8 * i)
+    return value
+
+
+@njit(cache=True, nogil=True)
+def _store_block(pixels, out, x0, y0, width, height, channels):
+    for i in range(16):
+        y = y0 + (i >> 2)
+        x = x0 + (i & 3)
+        if y < height and x < width:
+            for c in range(channels):
+                out[y, x, c] = pixels[i, c]
+
+
+@njit(cache=True, nogil=True)
+def _rgb565_palette(block, start, palette, allow_three_color):
+    c0 = block[start] | (np.int32(block[start + 1]) << 8)
+    c1 = block[start + 2] | (np.int32(block[start + 3]) << 8)
+    for e in range(2):
+        c = c0 if e == 0 else c1
+        r = ((c >> 11) & 0x1F) << 3
+        g = ((c >> 5) & 0x3F) << 2
+        b = (c & 0x1F) << 3
+        palette[e, 0] = r | (r >> 5)
+        palette[e, 1] = g | (g >> 6)
+        palette[e, 2] = b | (b >> 5)
+        palette[e, 3] = 255
+    if c0 > c1 or not allow_three_color:
+        for ch in range(3):
+            palette[2, ch] = (2 * palette[0, ch] + palette[1, ch]) // 3
+            palette[3, ch] = (palette[0, ch] + 2 * palette[1, ch]) // 3
+        palette[2, 3] = 255
+        palette[3, 3] = 255
+    else:
+        for ch in range(3):
+            palette[2, ch] = (palette[0, ch] + palette[1, ch]) // 2
+            palette[3, ch] = 0
+        palette[2, 3] = 255
+        palette[3, 3] = 0
+
+
+@njit(cache=True, nogil=True)
+def _alpha_palette(block, start, palette):
+    a0 = np.int32(block[start])
+    a1 = np.int32(block[start + 1])
+    palette[0] = a0
+    palette[1] = a1
+    if a0 > a1:
+        for i in range(1, 7):
+            palette[i + 1] = ((7 - i) * a0 + i * a1) // 7
+    else:
+        for i in range(1, 5):
+            palette[i + 1] = ((5 - i) * a0 + i * a1) // 5
+        palette[6] = 0
+        palette[7] = 255
+
+
+@njit(cache=True, nogil=True)
+def _decode_bc1_bc2_bc3(blocks, out, blocks_x, width, height, alpha_mode):
+    """alpha_mode: 0 = BC1, 2 = BC2 (explicit 4-bit alpha), 3 = BC3 (interpolated alpha)."""
+    palette = np.empty((4, 4), dtype=np.int32)
+    alphas = np.empty(8, dtype=np.int32)
+    pixels = np.empty((16, 4), dtype=np.int32)
+    color_start = 0 if alpha_mode == 0 else 8
+    for block_index in range(blocks.shape[0]):
+        block = blocks[block_index]
+        _rgb565_palette(block, color_start, palette, alpha_mode == 0)
+        color_bits = _read_uint(block, color_start + 4, 4)
+        for i in range(16):
+            index = (color_bits >> (2 * i)) & 0x3
+            for c in range(4):
+                pixels[i, c] = palette[index, c]
+        if alpha_mode == 2:
+            alpha_bits = _read_uint(block, 0, 8)
+            for i in range(16):
+                alpha = (alpha_bits >> (4 * i)) & 0xF
+                pixels[i, 3] = (alpha << 4) | alpha
+        elif alpha_mode == 3:
+            _alpha_palette(block, 0, alphas)
+            alpha_bits = _read_uint(block, 2, 6)
+            for i in range(16):
+                pixels[i, 3] = alphas[(alpha_bits >> (3 * i)) & 0x7]
+        _store_block(pixels, out, (block_index % blocks_x) * 4, (block_index // blocks_x) * 4, width, height, 4)
+
+
+@njit(cache=True, nogil=True)
+def _decode_bc4_bc5(blocks, out, blocks_x, width, height, two_channel):
+    values = np.empty(8, dtype=np.int32)
+    pixels = np.empty((16, 4), dtype=np.int32)
+    for block_index in range(blocks.shape[0]):
+        block = blocks[block_index]
+        _alpha_palette(block, 0, values)
+        bits = _read_uint(block, 2, 6)
+        for i in range(16):
+            value = values[(bits >> (3 * i)) & 0x7]
+            pixels[i, 0] = value
+            pixels[i, 1] = value
+            pixels[i, 2] = value
+            pixels[i, 3] = 255
+        if two_channel:
+            _alpha_palette(block, 8, values)
+            bits = _read_uint(block, 10, 6)
+            for i in range(16):
+                pixels[i, 1] = values[(bits >> (3 * i)) & 0x7]
+                pixels[i, 2] = 0
+        _store_block(pixels, out, (block_index % blocks_x) * 4, (block_index // blocks_x) * 4, width, height, 4)
+
+
+@njit(cache=True, nogil=True)
+def _expand_bits(value, bits):
+    """Expand a bits-wide value to 8 bits by bit replication."""
+    if bits >= 8:
+        return value
+    value <<= 8 - bits
+    return value | (value >> bits)
+
+
+@njit(cache=True, nogil=True)
+def _weight(index_bits, index):
+    if index_bits == 2:
+        return WEIGHTS_2[index]
+    if index_bits == 3:
+        return WEIGHTS_3[index]
+    return WEIGHTS_4[index]
+
+
+@njit(cache=True, nogil=True)
+def _bc7_anchor(subsets, partition, subset):
+    if subset == 0:
+        return 0
+    if subsets == 2:
+        return ANCHOR_TABLE_2[partition]
+    if subset == 1:
+        return ANCHOR_TABLE_3_SUBSET_1[partition]
+    return ANCHOR_TABLE_3_SUBSET_2[partition]
+
+
+@njit(cache=True, nogil=True)
+def _decode_bc7(blocks, out, blocks_x, width, height):
+    endpoints = np.empty((6, 4), dtype=np.int32)
+    subset_of = np.empty(16, dtype=np.int32)
+    indices = np.empty(16, dtype=np.int32)
+    secondary = np.empty(16, dtype=np.int32)
+    pixels = np.empty((16, 4), dtype=np.int32)
+    for block_index in range(blocks.shape[0]):
+        block = blocks[block_index]
+        mode = 0
+        while mode < 8 and not (block[0] >> mode) & 1:
+            mode += 1
+        if mode == 8:
+            # Reserved mode, decodes to transparent black
+            pixels[:] = 0
+            _store_block(pixels, out, (block_index % blocks_x) * 4, (block_index // blocks_x) * 4, width, height, 4)
+            continue
+
+        subsets = BC7_MODES[mode, 0]
+        color_bits = BC7_MODES[mode, 4]
+        alpha_bits = BC7_MODES[mode, 5]
+        endpoint_pbits = BC7_MODES[mode, 6]
+        shared_pbits = BC7_MODES[mode, 7]
+        index_bits = BC7_MODES[mode, 8]
+        secondary_bits = BC7_MODES[mode, 9]
+        num_endpoints = subsets * 2
+
+        pos = mode + 1
+        partition = _read_bits(block, pos, BC7_MODES[mode, 1])
+        pos += BC7_MODES[mode, 1]
+        rotation = _read_bits(block, pos, BC7_MODES[mode, 2])
+        pos += BC7_MODES[mode, 2]
+        index_selection = _read_bits(block, pos, BC7_MODES[mode, 3])
+        pos += BC7_MODES[mode, 3]
+
+        channels = 4 if alpha_bits > 0 else 3
+        for c in range(channels):
+            bits = color_bits if c < 3 else alpha_bits
+            for e in range(num_endpoints):
+                endpoints[e, c] = _read_bits(block, pos, bits)
+                pos += bits
+        if endpoint_pbits:
+            for e in range(num_endpoints):
+                pbit = _read_bits(block, pos, 1)
+                pos += 1
+                for c in range(channels):
+                    endpoints[e, c] = (endpoints[e, c] << 1) | pbit
+        elif shared_pbits:
+            for s in range(subsets):
+                pbit = _read_bits(block, pos, 1)
+                pos += 1
+                for c in range(channels):
+                    endpoints[2 * s, c] = (endpoints[2 * s, c] << 1) | pbit
+                    endpoints[2 * s + 1, c] = (endpoints[2 * s + 1, c] << 1) | pbit
+        has_pbit = 1 if endpoint_pbits or shared_pbits else 0
+        for e in range(num_endpoints):
+            for c in range(3):
+                endpoints[e, c] = _expand_bits(endpoints[e, c], color_bits + has_pbit)
+            if alpha_bits > 0:
+                endpoints[e, 3] = _expand_bits(endpoints[e, 3], alpha_bits + has_pbit)
+            else:
+                endpoints[e, 3] = 255
+
+        for i in range(16):
+            if subsets == 2:
+                subset_of[i] = PARTITION_TABLE_2[partition, i]
+            elif subsets == 3:
+                subset_of[i] = PARTITION_TABLE_3[partition, i]
+            else:
+                subset_of[i] = 0
+        for i in range(16):
+            bits = index_bits - 1 if i == _bc7_anchor(subsets, partition, subset_of[i]) else index_bits
+            indices[i] = _read_bits(block, pos, bits)
+            pos += bits
+        if secondary_bits:
+            for i in range(16):
+                bits = secondary_bits - 1 if i == 0 else secondary_bits
+                secondary[i] = _read_bits(block, pos, bits)
+                pos += bits
+
+        for i in range(16):
+            e0 = subset_of[i] * 2
+            e1 = e0 + 1
+            if secondary_bits == 0:
+                color_weight = _weight(index_bits, indices[i])
+                alpha_weight = color_weight
+            elif index_selection == 0:
+                color_weight = _weight(index_bits, indices[i])
+                alpha_weight = _weight(secondary_bits, secondary[i])
+            else:
+                color_weight = _weight(secondary_bits, secondary[i])
+                alpha_weight = _weight(index_bits, indices[i])
+            for c in range(4):
+                weight = color_weight if c < 3 else alpha_weight
+                pixels[i, c] = (endpoints[e0, c] * (64 - weight) + endpoints[e1, c] * weight + 32) >> 6
+            if rotation > 0:
+                alpha = pixels[i, 3]
+                pixels[i, 3] = pixels[i, rotation - 1]
+                pixels[i, rotation - 1] = alpha
+        _store_block(pixels, out, (block_index % blocks_x) * 4, (block_index // blocks_x) * 4, width, height, 4)
+
+
+@njit(cache=True, nogil=True)
+def _sign_extend(value, bits):
+    if value & (1 << (bits - 1)):
+        value -= 1 << bits
+    return value
+
+
+@njit(cache=True, nogil=True)
+def _bc6h_unquantize(value, bits, signed):
+    if not signed:
+        if bits >= 15 or value == 0:
+            return value
+        if value == (1 << bits) - 1:
+            return 0xFFFF
+        return ((value << 16) + 0x8000) >> bits
+    if bits >= 16:
+        return value
+    negative = value < 0
+    if negative:
+        value = -value
+    if value == 0:
+        result = 0
+    elif value >= (1 << (bits - 1)) - 1:
+        result = 0x7FFF
+    else:
+        result = ((value << 15) + 0x4000) >> (bits - 1)
+    return -result if negative else result
+
+
+@njit(cache=True, nogil=True)
+def _bc6h_to_float(value, signed):
+    """Finish unquantizing an interpolated value to a half float and widen it to float32."""
+    if not signed:
+        return HALF_TO_FLOAT[(value * 31) >> 6]
+    if value < 0:
+        return HALF_TO_FLOAT[0x8000 | ((-value * 31) >> 5)]
+    return HALF_TO_FLOAT[(value * 31) >> 5]
+
+
+@njit(cache=True, nogil=True)
+def _decode_bc6h(blocks, out, blocks_x, width, height, signed):
+    endpoints = np.empty((3, 4), dtype=np.int64)
+    pixels = np.empty((16, 3), dtype=np.float32)
+    for block_index in range(blocks.shape[0]):
+        block = blocks[block_index]
+        code = _read_bits(block, 0, 2)
+        pos = 2
+        if code >= 2:
+            code = _read_bits(block, 0, 5)
+            pos = 5
+        mode = BC6H_MODE_CODES[code]
+        if mode < 0:
+            # Reserved mode, decodes to black
+            pixels[:] = 0
+            _store_block(pixels, out, (block_index % blocks_x) * 4, (block_index // blocks_x) * 4, width, height, 3)
+            continue
+
+        base_bits = BC6H_MODES[mode, 0]
+        subsets = BC6H_MODES[mode, 4]
+        transformed = BC6H_MODES[mode, 5]
+        index_bits = BC6H_MODES[mode, 6]
+        num_endpoints = subsets * 2
+
+        endpoints[:] = 0
+        for run in range(BC6H_LAYOUTS.shape[1]):
+            count = BC6H_LAYOUTS[mode, run, 2]
+            if count == 0:
+                break
+            value = _read_bits(block, pos, count)
+            pos += count
+            if BC6H_LAYOUTS[mode, run, 3]:
+                reversed_value = 0
+                for _ in range(count):
+                    reversed_value = (reversed_value << 1) | (value & 1)
+                    value >>= 1
+                value = reversed_value
+            field = BC6H_LAYOUTS[mode, run, 0]
+            endpoints[field >> 2, field & 3] |= value << BC6H_LAYOUTS[mode, run, 1]
+
+        partition = 0
+        if subsets == 2:
+            partition = _read_bits(block, pos, 5)
+            pos += 5
+
+        for c in range(3):
+            delta_bits = BC6H_MODES[mode, 1 + c]
+            if signed:
+                endpoints[c, 0] = _sign_extend(endpoints[c, 0], base_bits)
+            if transformed or signed:
+                for e in range(1, num_endpoints):
+                    endpoints[c, e] = _sign_extend(endpoints[c, e], delta_bits)
+            if transformed:
+                mask = (1 << base_bits) - 1
+                for e in range(1, num_endpoints):
+                    endpoints[c, e] = (endpoints[c, 0] + endpoints[c, e]) & mask
+                    if signed:
+                        endpoints[c, e] = _sign_extend(endpoints[c, e], base_bits)
+            for e in range(num_endpoints):
+                endpoints[c, e] = _bc6h_unquantize(endpoints[c, e], base_bits, signed)
+
+        for i in range(16):
+            subset = PARTITION_TABLE_2[partition, i] if subsets == 2 else 0
+            anchor = i == 0 or (subset == 1 and i == ANCHOR_TABLE_2[partition])
+            bits = index_bits - 1 if anchor else index_bits
+            weight = _weight(index_bits, _read_bits(block, pos, bits))
+            pos += bits
+            e0 = subset * 2
+            for c in range(3):
+                value = (endpoints[c, e0] * (64 - weight) + endpoints[c, e0 + 1] * weight + 32) >> 6
+                pixels[i, c] = _bc6h_to_float(value, signed)
+        _store_block(pixels, out, (block_index % blocks_x) * 4, (block_index // blocks_x) * 4, width, height, 3)
+
+
+def is_block_compressed(dxgi_format: int) -> bool:
+    return dxgi_format in BLOCK_SIZES
+
+
+def get_mip_size(width: int, height: int, dxgi_format: int) -> int:
+    return max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * BLOCK_SIZES[dxgi_format]
+
+
+def decode(data, width: int, height: int, dxgi_format: int) -> np.ndarray:
+    """Decode one surface of block-compressed data."""
+    block_size = BLOCK_SIZES[dxgi_format]
+    blocks_x = max(1, (width + 3) // 4)
+    blocks_y = max(1, (height + 3) // 4)
+    size = blocks_x * blocks_y * block_size
+    if len(data) < size:
+        raise ValueError(f"Expected {size} bytes of BC data for {width}x{height}, got {len(data)}")
+    blocks = np.frombuffer(data, dtype=np.uint8, count=size).reshape(-1, block_size)
+
+    if dxgi_format in (DXGI_BC6H_UF16, DXGI_BC6H_SF16):
+        out = np.zeros((height, width, 3), dtype=np.float32)
+        _decode_bc6h(blocks, out, blocks_x, width, height, dxgi_format == DXGI_BC6H_SF16)
+        return out
+
+    out = np.zeros((height, width, 4), dtype=np.uint8)
+    if dxgi_format in (DXGI_BC1_UNORM, DXGI_BC1_UNORM_SRGB):
+        _decode_bc1_bc2_bc3(blocks, out, blocks_x, width, height, 0)
+    elif dxgi_format in (DXGI_BC2_UNORM, DXGI_BC2_UNORM_SRGB):
+        _decode_bc1_bc2_bc3(blocks, out, blocks_x, width, height, 2)
+    elif dxgi_format in (DXGI_BC3_UNORM, DXGI_BC3_UNORM_SRGB):
+        _decode_bc1_bc2_bc3(blocks, out, blocks_x, width, height, 3)
+    elif dxgi_format in (DXGI_BC4_UNORM, DXGI_BC5_UNORM):
+        _decode_bc4_bc5(blocks, out, blocks_x, width, height, dxgi_format == DXGI_BC5_UNORM)
+    else:
+        _decode_bc7(blocks, out, blocks_x, width, height)
+    return out
+
+
+def decode_dds(dds_bytes: bytes, mip: int = 0) -> np.ndarray | None:
+    """
+    Decode one mip of the first surface of a DX10 DDS, reading only that mip's blocks.
+    Returns None when the texture is not block compressed, so the caller can fall back to puredds.
+    """
+    if dds_bytes[84:88] != b"DX10":
+        return None
+    height, width, _, depth, mip_count = struct.unpack_from("<5I", dds_bytes, 12)
+    caps2 = struct.unpack_from("<I", dds_bytes, 112)[0]
+    dxgi_format = struct.unpack_from("<I", dds_bytes, DDS_HEADER_SIZE)[0]
+    if not is_block_compressed(dxgi_format):
+        return None
+    mip_count = max(1, mip_count)
+    if not 0 <= mip < mip_count:
+        raise ValueError(f"Invalid mip {mip}, texture has {mip_count} mip level(s)")
+    if not caps2 & DDSCAPS2_VOLUME:
+        depth = 1
+
+    # Mips of the first array slice / face are stored back to back right after the headers
+    offset = DDS_HEADER_SIZE + DX10_HEADER_SIZE
+    for level in range(mip):
+        offset += get_mip_size(max(1, width >> level), max(1, height >> level), dxgi_format) * max(1, depth >> level)
+    return decode(memoryview(dds_bytes)[offset:], max(1, width >> mip), max(1, height >> mip), dxgi_format)
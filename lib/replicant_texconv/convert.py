@@ -0,0 +1,151 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from typing import Iterator
+
+MIN_PARALLEL_JOBS = 4   # Below this, spawning workers costs more than it saves
+MAX_JOBS_PER_WORKER = 2 # In-flight jobs per worker, each one holds a whole DDS in memory
+
+
+def decode_dds_image(dds_bytes: bytes) -> "np.ndarray":
+    """Decode the first mip of an in-memory DDS, as uint8 for LDR formats or float32 for HDR ones."""
+    from .bcn import decode_dds
+
+    image = decode_dds(dds_bytes)
+    if image is None:
+        # Uncompressed formats are left to puredds
+        from puredds import DDS
+        image = DDS.from_bytes(dds_bytes).to_image()
+    return image
+
+
+def convert_dds(dds_bytes: bytes, out_path: str) -> str:
+    """Decode an in-memory DDS and write it to out_path (.tif for HDR). Returns the written path."""
+    import imageio
+    import numpy as np
+
+    image = decode_dds_image(dds_bytes)
+    if image.dtype == np.float32:
+        out_path = os.path.splitext(out_path)[0] + ".tif" # Use .tif for HDR
+    imageio.imwrite(out_path, image)
+    return out_path
+
+
+def to_blender_pixels(image: "np.ndarray") -> "np.ndarray":
+    """Flatten a decoded image to the bottom-up float32 RGBA layout of bpy.types.Image.pixels."""
+    import numpy as np
+
+    if image.ndim == 2:
+        image = image[:, :, None]
+    height, width, channels = image.shape
+    pixels = np.ones((height, width, 4), dtype=np.float32)
+    if image.dtype == np.uint8:
+        source = image.astype(np.float32) * np.float32(1 / 255)
+    elif image.dtype == np.uint16:
+        source = image.astype(np.float32) * np.float32(1 / 65535)
+    else:
+        source = image.astype(np.float32, copy=False)
+    if channels < 3:
+        pixels[:, :, :3] = source[:, :, :1]
+        if channels == 2:
+            pixels[:, :, 3] = source[:, :, 1]
+    else:
+        pixels[:, :, :min(channels, 4)] = source[:, :, :4]
+    return pixels[::-1].ravel()
+
+
+class ConversionPool:
+    """
+    Runs convert_dds jobs on a process pool using every core.
+
+    Jobs are submitted as soon as they are available and collected with
+    results(). At most MAX_JOBS_PER_WORKER jobs per worker are in flight,
+    submit() blocks on the oldest ones beyond that so DDS payloads are freed
+    as soon as they are converted. Falls back to converting in-process when
+    there are too few jobs to be worth spawning workers, or when the pool
+    cannot be started.
+    """
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor: ProcessPoolExecutor | None = None
+        self.futures: dict[Future, tuple[str, str, bytes]] = {}
+        self.pending: list[tuple[str, bytes, str]] = []
+        self.retry: list[tuple[str, bytes, str]] = []
+        self.done: list[tuple[str, str | None, Exception | None]] = []
+        self.serial = self.max_workers <= 1
+
+    def submit(self, name: str, dds_bytes: bytes, out_path: str) -> None:
+        if self.serial:
+            self.done.append(self._convert(name, dds_bytes, out_path))
+            return
+        if self.executor is None:
+            # Hold back the first few jobs so small packs never pay for process startup
+            self.pending.append((name, dds_bytes, out_path))
+            if len(self.pending) < MIN_PARALLEL_JOBS:
+                return
+            try:
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, ValueError):
+                self.serial = True
+                return
+            pending, self.pending = self.pending, []
+            for job in pending:
+                self._submit(*job)
+            return
+        self._submit(name, dds_bytes, out_path)
+
+    def _submit(self, name: str, dds_bytes: bytes, out_path: str) -> None:
+        while len(self.futures) >= self.max_workers * MAX_JOBS_PER_WORKER:
+            finished, _ = wait(self.futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = self._collect(future)
+                if result is not None:
+                    self.done.append(result)
+        try:
+            future = self.executor.submit(convert_dds, dds_bytes, out_path)
+        except BrokenProcessPool:
+            self.retry.append((name, dds_bytes, out_path))
+            return
+        self.futures[future] = (name, out_path, dds_bytes)
+
+    def _collect(self, future: Future) -> tuple[str, str | None, Exception | None] | None:
+        """Release a finished job's payload, keeping it only if the pool broke and it must be retried."""
+        name, out_path, dds_bytes = self.futures.pop(future)
+        try:
+            return name, future.result(), None
+        except BrokenProcessPool:
+            self.retry.append((name, dds_bytes, out_path))
+            return None
+        except Exception as e:
+            return name, None, e
+
+    @staticmethod
+    def _convert(name: str, dds_bytes: bytes, out_path: str) -> tuple[str, str | None, Exception | None]:
+        try:
+            return name, convert_dds(dds_bytes, out_path), None
+        except Exception as e:
+            return name, None, e
+
+    def results(self) -> Iterator[tuple[str, str | None, Exception | None]]:
+        """Yield (name, written_path, error) for every submitted job as it completes."""
+        while self.done:
+            yield self.done.pop(0)
+        for future in as_completed(list(self.futures)):
+            result = self._collect(future)
+            if result is not None:
+                yield result
+
+        # Anything the pool could not run (or was never given to it) is converted here
+        jobs, self.pending, self.retry = self.pending + self.retry, [], []
+        for job in jobs:
+            yield self._convert(*job)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.futures.clear()
+        self.pending.clear()
+        self.retry.clear()
+        self.done.clear()
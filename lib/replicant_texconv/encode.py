@@ -0,0 +1,520 @@
+"""
+Block-compressed (BCn) texture encoding.
+
+Encodes RGBA8 images to BC1, BC3, BC4, BC5 and BC7 (mode 6). Rows of blocks
+are spread across all cores with numba's prange. The FAST preset fits
+endpoints to the block's bounding box. The QUALITY preset fits them along
+the principal axis, refines them by least squares and, for BC7, searches
+every p-bit combination.
+"""
+import numpy as np
+from numba import njit, prange
+
+from .bcn import (
+    BLOCK_SIZES, WEIGHTS_4,
+    DXGI_BC1_UNORM, DXGI_BC1_UNORM_SRGB, DXGI_BC3_UNORM, DXGI_BC3_UNORM_SRGB,
+    DXGI_BC4_UNORM, DXGI_BC5_UNORM, DXGI_BC7_UNORM, DXGI_BC7_UNORM_SRGB,
+)
+
+# _SRGB variants hold the same block data, only the DXGI format tells the GPU to linearize on sampling
+ENCODABLE_FORMATS = {
+    DXGI_BC1_UNORM, DXGI_BC1_UNORM_SRGB,
+    DXGI_BC3_UNORM, DXGI_BC3_UNORM_SRGB,
+    DXGI_BC4_UNORM,
+    DXGI_BC5_UNORM,
+    DXGI_BC7_UNORM, DXGI_BC7_UNORM_SRGB,
+}
+
+REFINE_ITERATIONS = 2   # Least squares passes in the QUALITY preset
+
+
+@njit(cache=True, nogil=True)
+def _put_bits(dst, offset, value, count):
+    for i in range(count):
+        if (value >> i) & 1:
+            bit = offset + i
+            dst[bit >> 3] |= np.uint8(1 << (bit & 7))
+
+
+@njit(cache=True, nogil=True)
+def _load_block(pixels, bx, by, block):
+    for i in range(16):
+        for c in range(4):
+            block[i, c] = pixels[by * 4 + (i >> 2), bx * 4 + (i & 3), c]
+
+
+@njit(cache=True, nogil=True)
+def _fit_endpoints(block, mask, channels, quality, e0, e1):
+    """Fit a line segment through the masked pixels of a block, in the first `channels` channels."""
+    count = 0.0
+    mean = np.zeros(4)
+    lo = np.full(4, 255.0)
+    hi = np.zeros(4)
+    for i in range(16):
+        if not mask[i]:
+            continue
+        count += 1.0
+        for c in range(channels):
+            v = block[i, c]
+            mean[c] += v
+            lo[c] = min(lo[c], v)
+            hi[c] = max(hi[c], v)
+    if count == 0.0:
+        e0[:] = 0.0
+        e1[:] = 0.0
+        return
+
+    if not quality:
+        # Bounding box, inset slightly so the interpolated colors land inside the block
+        for c in range(channels):
+            inset = (hi[c] - lo[c]) / 16.0
+            e0[c] = hi[c] - inset
+            e1[c] = lo[c] + inset
+        return
+
+    mean /= count
+    cov = np.zeros((4, 4))
+    for i in range(16):
+        if not mask[i]:
+            continue
+        for c in range(channels):
+            for d in range(channels):
+                cov[c, d] += (block[i, c] - mean[c]) * (block[i, d] - mean[d])
+    # Principal axis by power iteration, seeded with the bounding box diagonal
+    axis = hi - lo
+    next_axis = np.zeros(4)
+    for _ in range(8):
+        for c in range(4):
+            next_axis[c] = cov[c, 0] * axis[0] + cov[c, 1] * axis[1] + cov[c, 2] * axis[2] + cov[c, 3] * axis[3]
+        norm = np.sqrt(np.sum(next_axis * next_axis))
+        if norm < 1e-8:
+            break
+        axis = next_axis / norm
+    norm = np.sqrt(np.sum(axis * axis))
+    if norm < 1e-8:
+        e0[:] = mean
+        e1[:] = mean
+        return
+    axis /= norm
+
+    t_min = 1e30
+    t_max = -1e30
+    for i in range(16):
+        if not mask[i]:
+            continue
+        t = 0.0
+        for c in range(channels):
+            t += (block[i, c] - mean[c]) * axis[c]
+        t_min = min(t_min, t)
+        t_max = max(t_max, t)
+    for c in range(channels):
+        e0[c] = min(255.0, max(0.0, mean[c] + axis[c] * t_max))
+        e1[c] = min(255.0, max(0.0, mean[c] + axis[c] * t_min))
+
+
+@njit(cache=True, nogil=True)
+def _least_squares(block, mask, channels, weights, e0, e1):
+    """Solve for the endpoints that best reproduce the block given per-pixel interpolation weights (0 = e0, 1 = e1)."""
+    aa = 0.0
+    ab = 0.0
+    bb = 0.0
+    ax = np.zeros(4)
+    bx = np.zeros(4)
+    for i in range(16):
+        if not mask[i]:
+            continue
+        t = weights[i]
+        s = 1.0 - t
+        aa += s * s
+        ab += s * t
+        bb += t * t
+        for c in range(channels):
+            ax[c] += s * block[i, c]
+            bx[c] += t * block[i, c]
+    det = aa * bb - ab * ab
+    if abs(det) < 1e-8:
+        return False
+    for c in range(channels):
+        e0[c] = min(255.0, max(0.0, (ax[c] * bb - bx[c] * ab) / det))
+        e1[c] = min(255.0, max(0.0, (bx[c] * aa - ax[c] * ab) / det))
+    return True
+
+
+@njit(cache=True, nogil=True)
+def _to_565(e):
+    r = int(e[0] * 31.0 / 255.0 + 0.5)
+    g = int(e[1] * 63.0 / 255.0 + 0.5)
+    b = int(e[2] * 31.0 / 255.0 + 0.5)
+    return (r << 11) | (g << 5) | b
+
+
+@njit(cache=True, nogil=True)
+def _bc1_palette(c0, c1, four_color, palette):
+    for e in range(2):
+        c = c0 if e == 0 else c1
+        r = ((c >> 11) & 0x1F) << 3
+        g = ((c >> 5) & 0x3F) << 2
+        b = (c & 0x1F) << 3
+        palette[e, 0] = r | (r >> 5)
+        palette[e, 1] = g | (g >> 6)
+        palette[e, 2] = b | (b >> 5)
+    for ch in range(3):
+        if four_color:
+            palette[2, ch] = (2 * palette[0, ch] + palette[1, ch]) // 3
+            palette[3, ch] = (palette[0, ch] + 2 * palette[1, ch]) // 3
+        else:
+            palette[2, ch] = (palette[0, ch] + palette[1, ch]) // 2
+            palette[3, ch] = 0
+
+
+@njit(cache=True, nogil=True)
+def _bc1_indices(block, transparent, c0, c1, four_color, palette, indices, weights):
+    """Pick the nearest palette entry for every pixel. Returns the squared error."""
+    _bc1_palette(c0, c1, four_color, palette)
+    error = 0.0
+    for i in range(16):
+        if transparent[i]:
+            indices[i] = 3
+            continue
+        best = 0
+        best_error = 1e30
+        for p in range(4 if four_color else 3):
+            d = 0.0
+            for c in range(3):
+                diff = block[i, c] - palette[p, c]
+                d += diff * diff
+            if d < best_error:
+                best_error = d
+                best = p
+        indices[i] = best
+        error += best_error
+    for i in range(16):
+        index = indices[i]
+        if four_color:
+            weights[i] = 0.0 if index == 0 else 1.0 if index == 1 else 1.0 / 3.0 if index == 2 else 2.0 / 3.0
+        else:
+            weights[i] = 0.0 if index == 0 else 1.0 if index == 1 else 0.5
+    return error
+
+
+@njit(cache=True, nogil=True)
+def _encode_color_block(block, dst, offset, quality, punch_through):
+    """Write an 8 byte BC1 color block. With punch_through, pixels with alpha < 128 use the 3-color transparent entry."""
+    transparent = np.zeros(16, dtype=np.bool_)
+    opaque = np.ones(16, dtype=np.bool_)
+    has_transparency = False
+    if punch_through:
+        for i in range(16):
+            if block[i, 3] < 128.0:
+                transparent[i] = True
+                opaque[i] = False
+                has_transparency = True
+    four_color = not has_transparency
+
+    e0 = np.zeros(4)
+    e1 = np.zeros(4)
+    _fit_endpoints(block, opaque, 3, quality, e0, e1)
+    palette = np.empty((4, 3), dtype=np.int32)
+    indices = np.zeros(16, dtype=np.int32)
+    weights = np.zeros(16)
+    best_indices = np.zeros(16, dtype=np.int32)
+    best_error = 1e30
+    best_c0 = 0
+    best_c1 = 0
+    iterations = 1 + REFINE_ITERATIONS if quality else 1
+    for iteration in range(iterations):
+        c0 = _to_565(e0)
+        c1 = _to_565(e1)
+        # 4-color mode needs c0 > c1, the 3-color mode c0 <= c1
+        if (four_color and c0 < c1) or (not four_color and c0 > c1):
+            c0, c1 = c1, c0
+            e0, e1 = e1, e0
+        block_four_color = four_color and c0 != c1
+        error = _bc1_indices(block, transparent, c0, c1, block_four_color, palette, indices, weights)
+        if error < best_error:
+            best_error = error
+            best_c0 = c0
+            best_c1 = c1
+            best_indices[:] = indices
+        if iteration == iterations - 1 or not _least_squares(block, opaque, 3, weights, e0, e1):
+            break
+
+    dst[offset] = best_c0 & 0xFF
+    dst[offset + 1] = best_c0 >> 8
+    dst[offset + 2] = best_c1 & 0xFF
+    dst[offset + 3] = best_c1 >> 8
+    bits = 0
+    for i in range(16):
+        bits |= best_indices[i] << (2 * i)
+    for i in range(4):
+        dst[offset + 4 + i] = (bits >> (8 * i)) & 0xFF
+
+
+@njit(cache=True, nogil=True)
+def _bc4_palette(a0, a1, palette):
+    palette[0] = a0
+    palette[1] = a1
+    if a0 > a1:
+        for i in range(1, 7):
+            palette[i + 1] = ((7 - i) * a0 + i * a1) // 7
+    else:
+        for i in range(1, 5):
+            palette[i + 1] = ((5 - i) * a0 + i * a1) // 5
+        palette[6] = 0
+        palette[7] = 255
+
+
+@njit(cache=True, nogil=True)
+def _bc4_indices(values, a0, a1, palette, indices):
+    _bc4_palette(a0, a1, palette)
+    error = 0.0
+    for i in range(16):
+        best = 0
+        best_error = 1e30
+        for p in range(8):
+            d = (values[i] - palette[p]) ** 2
+            if d < best_error:
+                best_error = d
+                best = p
+        indices[i] = best
+        error += best_error
+    return error
+
+
+@njit(cache=True, nogil=True)
+def _encode_channel_block(block, channel, dst, offset, quality):
+    """Write an 8 byte BC4 block (also the BC3 alpha block and each half of BC5) for one channel."""
+    values = np.empty(16)
+    lo = 255
+    hi = 0
+    for i in range(16):
+        values[i] = block[i, channel]
+        lo = min(lo, int(block[i, channel]))
+        hi = max(hi, int(block[i, channel]))
+
+    palette = np.empty(8, dtype=np.int32)
+    indices = np.zeros(16, dtype=np.int32)
+    best_indices = np.zeros(16, dtype=np.int32)
+    # 8-value mode spans the whole range
+    best_a0 = hi
+    best_a1 = lo
+    best_error = _bc4_indices(values, hi, lo, palette, best_indices)
+    if quality and best_error > 0.0:
+        # 6-value mode only spans the values strictly between 0 and 255, which get exact entries
+        inner_lo = 255
+        inner_hi = 0
+        for i in range(16):
+            v = int(values[i])
+            if 0 < v < 255:
+                inner_lo = min(inner_lo, v)
+                inner_hi = max(inner_hi, v)
+        if inner_lo <= inner_hi:
+            error = _bc4_indices(values, inner_lo, inner_hi, palette, indices)
+            if error < best_error:
+                best_error = error
+                best_a0 = inner_lo
+                best_a1 = inner_hi
+                best_indices[:] = indices
+
+    dst[offset] = best_a0
+    dst[offset + 1] = best_a1
+    bits = 0
+    for i in range(16):
+        bits |= best_indices[i] << (3 * i)
+    for i in range(6):
+        dst[offset + 2 + i] = (bits >> (8 * i)) & 0xFF
+
+
+@njit(cache=True, nogil=True)
+def _quantize_mode6(e, pbit, q):
+    for c in range(4):
+        q[c] = (min(127, max(0, int((e[c] - pbit) / 2.0 + 0.5))) << 1) | pbit
+
+
+@njit(cache=True, nogil=True)
+def _nearest_pbit(e):
+    """The p-bit that loses the least when quantizing this endpoint on its own."""
+    errors = np.zeros(2)
+    q = np.zeros(4, dtype=np.int32)
+    for pbit in range(2):
+        _quantize_mode6(e, pbit, q)
+        for c in range(4):
+            errors[pbit] += (e[c] - q[c]) ** 2
+    return 0 if errors[0] <= errors[1] else 1
+
+
+@njit(cache=True, nogil=True)
+def _mode6_indices(block, q0, q1, palette, indices, weights):
+    for p in range(16):
+        w = WEIGHTS_4[p]
+        for c in range(4):
+            palette[p, c] = (q0[c] * (64 - w) + q1[c] * w + 32) >> 6
+    error = 0.0
+    for i in range(16):
+        best = 0
+        best_error = 1e30
+        for p in range(16):
+            d = 0.0
+            for c in range(4):
+                diff = block[i, c] - palette[p, c]
+                d += diff * diff
+            if d < best_error:
+                best_error = d
+                best = p
+        indices[i] = best
+        weights[i] = WEIGHTS_4[best] / 64.0
+        error += best_error
+    return error
+
+
+@njit(cache=True, nogil=True)
+def _encode_bc7_block(block, dst, quality):
+    """Write a 16 byte BC7 mode 6 block: one subset, 7.7.7.7 endpoints with a p-bit each, 4-bit indices."""
+    mask = np.ones(16, dtype=np.bool_)
+    e0 = np.zeros(4)
+    e1 = np.zeros(4)
+    _fit_endpoints(block, mask, 4, quality, e0, e1)
+
+    q0 = np.zeros(4, dtype=np.int32)
+    q1 = np.zeros(4, dtype=np.int32)
+    best_q0 = np.zeros(4, dtype=np.int32)
+    best_q1 = np.zeros(4, dtype=np.int32)
+    palette = np.empty((16, 4), dtype=np.int32)
+    indices = np.zeros(16, dtype=np.int32)
+    weights = np.zeros(16)
+    best_indices = np.zeros(16, dtype=np.int32)
+    best_error = 1e30
+    best_p0 = 0
+    best_p1 = 0
+    # Alpha 255 is only reachable with a p-bit of 1, any other endpoint alpha would make an opaque block translucent
+    opaque = True
+    for i in range(16):
+        if block[i, 3] != 255.0:
+            opaque = False
+    iterations = 1 + REFINE_ITERATIONS if quality else 1
+    for iteration in range(iterations):
+        for pbits in range(4):
+            p0 = pbits & 1
+            p1 = pbits >> 1
+            if opaque:
+                if quality and pbits != 3:
+                    continue
+                p0 = 1
+                p1 = 1
+                e0[3] = 255.0
+                e1[3] = 255.0
+            elif not quality:
+                # Pick each endpoint's p-bit by its own rounding error instead of trying every pair
+                p0 = _nearest_pbit(e0)
+                p1 = _nearest_pbit(e1)
+            _quantize_mode6(e0, p0, q0)
+            _quantize_mode6(e1, p1, q1)
+            error = _mode6_indices(block, q0, q1, palette, indices, weights)
+            if error < best_error:
+                best_error = error
+                best_q0[:] = q0
+                best_q1[:] = q1
+                best_p0 = p0
+                best_p1 = p1
+                best_indices[:] = indices
+            if not quality:
+                break
+        if iteration == iterations - 1 or best_error == 0.0:
+            break
+        for i in range(16):
+            weights[i] = WEIGHTS_4[best_indices[i]] / 64.0
+        if not _least_squares(block, mask, 4, weights, e0, e1):
+            break
+
+    # The anchor (first) index is stored without its top bit, so it must be < 8
+    if best_indices[0] >= 8:
+        best_q0, best_q1 = best_q1, best_q0
+        best_p0, best_p1 = best_p1, best_p0
+        for i in range(16):
+            best_indices[i] = 15 - best_indices[i]
+
+    dst[:] = 0
+    pos = 0
+    _put_bits(dst, pos, 1 << 6, 7)
+    pos += 7
+    for c in range(4):
+        _put_bits(dst, pos, best_q0[c] >> 1, 7)
+        _put_bits(dst, pos + 7, best_q1[c] >> 1, 7)
+        pos += 14
+    _put_bits(dst, pos, best_p0, 1)
+    _put_bits(dst, pos + 1, best_p1, 1)
+    pos += 2
+    _put_bits(dst, pos, best_indices[0], 3)
+    pos += 3
+    for i in range(1, 16):
+        _put_bits(dst, pos, best_indices[i], 4)
+        pos += 4
+
+
+@njit(parallel=True, cache=True)
+def _encode_blocks(pixels, out, blocks_x, blocks_y, kind, quality):
+    """kind: 1 = BC1, 3 = BC3, 4 = BC4, 5 = BC5, 7 = BC7."""
+    for by in prange(blocks_y):
+        block = np.empty((16, 4))
+        for bx in range(blocks_x):
+            dst = out[by * blocks_x + bx]
+            _load_block(pixels, bx, by, block)
+            if kind == 1:
+                _encode_color_block(block, dst, 0, quality, True)
+            elif kind == 3:
+                _encode_channel_block(block, 3, dst, 0, quality)
+                _encode_color_block(block, dst, 8, quality, False)
+            elif kind == 4:
+                _encode_channel_block(block, 0, dst, 0, quality)
+            elif kind == 5:
+                _encode_channel_block(block, 0, dst, 0, quality)
+                _encode_channel_block(block, 1, dst, 8, quality)
+            else:
+                _encode_bc7_block(block, dst, quality)
+
+
+ENCODER_KINDS = {
+    DXGI_BC1_UNORM: 1, DXGI_BC1_UNORM_SRGB: 1,
+    DXGI_BC3_UNORM: 3, DXGI_BC3_UNORM_SRGB: 3,
+    DXGI_BC4_UNORM: 4,
+    DXGI_BC5_UNORM: 5,
+    DXGI_BC7_UNORM: 7, DXGI_BC7_UNORM_SRGB: 7,
+}
+
+
+def to_rgba8(image: np.ndarray) -> np.ndarray:
+    """Convert a decoded image (grayscale, RGB or RGBA of any common dtype) to contiguous RGBA8."""
+    if image.dtype == np.uint16:
+        image = (image >> 8).astype(np.uint8)
+    elif image.dtype.kind == 'f':
+        image = (np.clip(image, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+    elif image.dtype != np.uint8:
+        image = image.astype(np.uint8)
+    if image.ndim == 2:
+        image = image[:, :, None]
+    channels = image.shape[2]
+    if channels < 3:
+        image = np.concatenate([np.repeat(image[:, :, :1], 3, axis=2), image[:, :, 1:2]], axis=2)
+    if image.shape[2] == 3:
+        image = np.concatenate([image, np.full(image.shape[:2] + (1,), 255, dtype=np.uint8)], axis=2)
+    return np.ascontiguousarray(image[:, :, :4])
+
+
+def load_image(source: str | bytes) -> np.ndarray:
+    """Decode an image file, given its path or contents, to RGBA8."""
+    import imageio
+    return to_rgba8(np.asarray(imageio.imread(source)))
+
+
+def encode(pixels: np.ndarray, dxgi_format: int, quality: bool = False) -> bytes:
+    """Encode an (height, width, 4) RGBA8 image to block-compressed data in the given DXGI format."""
+    if dxgi_format not in ENCODER_KINDS:
+        raise ValueError(f"Encoding to DXGI format {dxgi_format} is not supported")
+    height, width = pixels.shape[:2]
+    blocks_x = (width + 3) // 4
+    blocks_y = (height + 3) // 4
+    # Pad partial edge blocks by repeating the last row/column so they do not skew the endpoints
+    padded = np.pad(pixels, ((0, blocks_y * 4 - height), (0, blocks_x * 4 - width), (0, 0)), mode='edge')
+    out = np.zeros((blocks_x * blocks_y, BLOCK_SIZES[dxgi_format]), dtype=np.uint8)
+    _encode_blocks(padded, out, blocks_x, blocks_y, ENCODER_KINDS[dxgi_format], quality)
+    return out.tobytes()
@@ -0,0 +1,102 @@
+"""
+Mip chain generation.
+
+Each level is resampled from the one above it with a separable filter. Both
+axes are filtered in float32 with numpy, one tap at a time, so memory stays
+at a few copies of the level. _SRGB textures are filtered in linear light
+and converted back, otherwise every mip darkens.
+"""
+import numpy as np
+
+MIP_FILTERS = ('BOX', 'KAISER')
+
+KAISER_WIDTH = 3.0    # Filter radius in destination pixels
+KAISER_ALPHA = 4.0    # Window shape, higher trades sharpness for less ringing
+
+_SRGB_TO_LINEAR = np.where(
+    np.arange(256) / 255.0 <= 0.04045,
+    np.arange(256) / 255.0 / 12.92,
+    ((np.arange(256) / 255.0 + 0.055) / 1.055) ** 2.4,
+).astype(np.float32)
+
+
+def get_mip_count(width: int, height: int) -> int:
+    return max(width, height).bit_length()
+
+
+def _box(x: np.ndarray, scale: float, center: float) -> np.ndarray:
+    # Overlap of each source pixel with the destination pixel's footprint
+    left = np.maximum(x, center - scale / 2)
+    right = np.minimum(x + 1, center + scale / 2)
+    return np.maximum(right - left, 0.0)
+
+
+def _kaiser(x: np.ndarray, scale: float, center: float) -> np.ndarray:
+    t = (x + 0.5 - center) / scale
+    window = np.i0(KAISER_ALPHA * np.sqrt(np.maximum(1.0 - (t / KAISER_WIDTH) ** 2, 0.0))) / np.i0(KAISER_ALPHA)
+    return np.sinc(t) * window * (np.abs(t) < KAISER_WIDTH)
+
+
+def _filter_taps(src_size: int, dst_size: int, mip_filter: str) -> tuple[np.ndarray, np.ndarray]:
+    """Source indices and normalized weights, both shaped (dst_size, taps)."""
+    scale = src_size / dst_size
+    radius = scale / 2 if mip_filter == 'BOX' else KAISER_WIDTH * scale
+    centers = (np.arange(dst_size) + 0.5) * scale
+    first = np.floor(centers - radius).astype(np.int64)
+    taps = int(np.ceil(2 * radius)) + 1
+    x = first[:, None] + np.arange(taps)[None, :]
+    weight_func = _box if mip_filter == 'BOX' else _kaiser
+    weights = weight_func(x.astype(np.float64), scale, centers[:, None])
+    weights /= weights.sum(axis=1, keepdims=True)
+    # Clamp to the edge, the weights of taps past it land on the border pixel
+    return np.clip(x, 0, src_size - 1), weights.astype(np.float32)
+
+
+def _resample_axis(image: np.ndarray, dst_size: int, axis: int, mip_filter: str) -> np.ndarray:
+    src_size = image.shape[axis]
+    if src_size == dst_size:
+        return image
+    if mip_filter == 'BOX' and src_size == dst_size * 2:
+        if axis == 0:
+            return (image[0::2] + image[1::2]) * 0.5
+        return (image[:, 0::2] + image[:, 1::2]) * 0.5
+    indices, weights = _filter_taps(src_size, dst_size, mip_filter)
+    shape = [1, 1, 1]
+    shape[axis] = dst_size
+    out = None
+    for tap in range(indices.shape[1]):
+        sample = np.take(image, indices[:, tap], axis=axis) * weights[:, tap].reshape(shape)
+        out = sample if out is None else out + sample
+    return out
+
+
+def linear_to_srgb(linear: np.ndarray) -> np.ndarray:
+    linear = np.clip(linear, 0.0, 1.0)
+    return np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+
+
+def generate_mips(pixels: np.ndarray, srgb: bool, mip_filter: str = 'BOX') -> list[np.ndarray]:
+    """Build the full chain down to 1x1 from an (height, width, 4) RGBA8 image, the first level being the input itself."""
+    if mip_filter not in MIP_FILTERS:
+        raise ValueError(f"Unknown mip filter {mip_filter}")
+    height, width = pixels.shape[:2]
+    chain = [pixels]
+    level = np.empty(pixels.shape, dtype=np.float32)
+    if srgb:
+        level[:, :, :3] = _SRGB_TO_LINEAR[pixels[:, :, :3]]
+        level[:, :, 3] = pixels[:, :, 3] / np.float32(255.0)
+    else:
+        level[:] = pixels / np.float32(255.0)
+
+    for _ in range(1, get_mip_count(width, height)):
+        width = max(1, width // 2)
+        height = max(1, height // 2)
+        level = _resample_axis(level, width, 1, mip_filter)
+        level = _resample_axis(level, height, 0, mip_filter)
+        # Filtering from the previous level compounds Kaiser overshoot, clamp before it feeds the next one
+        np.clip(level, 0.0, 1.0, out=level)
+        out = level.copy()
+        if srgb:
+            out[:, :, :3] = linear_to_srgb(out[:, :, :3])
+        chain.append((out * 255.0 + 0.5).astype(np.uint8))
+    return chain
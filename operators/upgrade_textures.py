@@ -0,0 +1,60 @@
+import os
+import bpy
+
+from ..importers.material_import import upgrade_texture_image
+from ..util import log
+
+
+def get_target_materials(context) -> list[bpy.types.Material]:
+    """Materials of the selected objects, or the active material if nothing is selected."""
+    objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+    materials = [mat for obj in objects for mat in obj.data.materials if mat is not None]
+    if not materials and context.active_object and context.active_object.active_material:
+        materials = [context.active_object.active_material]
+    return list(dict.fromkeys(materials))
+
+
+class REPLICANT_OT_upgrade_textures(bpy.types.Operator):
+    """Replace preview textures of the selected objects' materials with their full resolution, in place"""
+    bl_idname = "replicant.upgrade_textures"
+    bl_label = "Upgrade Textures to Full Resolution"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        materials = get_target_materials(context)
+        if not materials:
+            self.report({'ERROR'}, "No materials selected")
+            return {'CANCELLED'}
+
+        upgraded = 0
+        failed = 0
+        for material in materials:
+            if not material.use_nodes:
+                continue
+            for sampler in material.replicant_texture_samplers:
+                if os.path.splitext(sampler.texture_path)[-1].lower() != ".dds" or not os.path.isfile(sampler.texture_path):
+                    continue
+                for node in material.node_tree.nodes:
+                    if node.type != 'TEX_IMAGE' or node.label != sampler.name or node.image is None:
+                        continue
+                    try:
+                        if upgrade_texture_image(node.image, sampler.texture_path):
+                            log.d(f"Upgraded {node.image.name} to full resolution")
+                            upgraded += 1
+                    except Exception as e:
+                        log.e(f"Failed to upgrade {node.image.name} from {sampler.texture_path}: {e}")
+                        failed += 1
+
+        if failed:
+            self.report({'WARNING'}, f"Upgraded {upgraded} textures, {failed} failed (see console)")
+        else:
+            self.report({'INFO'}, f"Upgraded {upgraded} textures to full resolution")
+        return {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(REPLICANT_OT_upgrade_textures)
+
+
+def unregister():
+    bpy.utils.unregister_class(REPLICANT_OT_upgrade_textures)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# replicant_texconv does not import bpy, so it is tested on its own as a top-level package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lib"))
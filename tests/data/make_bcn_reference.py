@@ -0,0 +1,67 @@
+"""
+Regenerate bcn_reference.npz: fixed blocks for every BCn format replicant_texconv.bcn decodes,
+and the pixels puredds decodes them to. Run from the repository root:
+
+    python tests/data/make_bcn_reference.py
+"""
+import os
+import struct
+
+import numpy as np
+from puredds import DDS
+
+WIDTH = 14   # 4x4 blocks, the last column and row of blocks are partial
+HEIGHT = 14
+BLOCKS = 16
+
+# DXGI format: block size
+FORMATS = {
+    71: 8, 72: 8,       # BC1 UNORM/SRGB
+    74: 16, 75: 16,     # BC2 UNORM/SRGB
+    77: 16, 78: 16,     # BC3 UNORM/SRGB
+    80: 8,              # BC4 UNORM
+    83: 16,             # BC5 UNORM
+    95: 16, 96: 16,     # BC6H UF16/SF16
+    98: 16, 99: 16,     # BC7 UNORM/SRGB
+}
+# Every valid BC6H mode code, then a reserved one
+BC6H_MODE_CODES = [0b00, 0b01, 0b00010, 0b00110, 0b01010, 0b01110, 0b10010, 0b10110, 0b11010, 0b11110,
+                   0b00011, 0b00111, 0b01011, 0b01111, 0b10011, 0b00000]
+
+
+def make_blocks(rng: np.random.Generator, dxgi_format: int) -> np.ndarray:
+    blocks = rng.integers(0, 256, (BLOCKS, FORMATS[dxgi_format]), dtype=np.uint8)
+    if dxgi_format in (98, 99):
+        # Two blocks of each mode, a mode is the lowest set bit of the first byte
+        for i in range(BLOCKS):
+            mode = i // 2
+            blocks[i, 0] = (int(blocks[i, 0]) & (0xFF << (mode + 1)) & 0xFF) | (1 << mode)
+    elif dxgi_format in (95, 96):
+        for i, code in enumerate(BC6H_MODE_CODES):
+            bits = 2 if code < 2 else 5
+            blocks[i, 0] = (int(blocks[i, 0]) & (0xFF << bits) & 0xFF) | code
+    return blocks
+
+
+def make_dds(data: bytes, dxgi_format: int) -> bytes:
+    header = struct.pack(
+        "<4s7I44x2I4s5I2I12x",
+        b"DDS ", 124, 0x1 | 0x2 | 0x4 | 0x1000 | 0x80000, HEIGHT, WIDTH, len(data), 0, 1,
+        32, 0x4, b"DX10", 0, 0, 0, 0, 0,
+        0x1000, 0,
+    )
+    return header + struct.pack("<5I", dxgi_format, 3, 0, 1, 0) + data
+
+
+def main() -> None:
+    rng = np.random.default_rng(30)
+    arrays = {}
+    for dxgi_format in FORMATS:
+        blocks = make_blocks(rng, dxgi_format)
+        arrays[f"blocks_{dxgi_format}"] = blocks
+        arrays[f"pixels_{dxgi_format}"] = DDS.from_bytes(make_dds(blocks.tobytes(), dxgi_format)).to_image()
+    np.savez_compressed(os.path.join(os.path.dirname(os.path.abspath(__file__)), "bcn_reference.npz"), **arrays)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+
+import numpy as np
+import pytest
+
+from replicant_texconv.bcn import decode
+
+# Fixed blocks of every supported format and the pixels puredds decodes them to, see data/make_bcn_reference.py
+REFERENCE = np.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bcn_reference.npz"))
+FORMATS = sorted(int(key.split("_")[1]) for key in REFERENCE.files if key.startswith("blocks_"))
+
+
+def test_reference_covers_every_format():
+    assert FORMATS == [71, 72, 74, 75, 77, 78, 80, 83, 95, 96, 98, 99]
+
+
+@pytest.mark.parametrize("dxgi_format", FORMATS)
+def test_decode_matches_reference(dxgi_format):
+    expected = REFERENCE[f"pixels_{dxgi_format}"]
+    height, width = expected.shape[:2]
+    decoded = decode(REFERENCE[f"blocks_{dxgi_format}"].tobytes(), width, height, dxgi_format)
+    assert decoded.dtype == expected.dtype
+    np.testing.assert_array_equal(decoded, expected)
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from replicant_texconv.bcn import DXGI_BC7_UNORM, decode
+from replicant_texconv.encode import encode
+
+
+@pytest.mark.parametrize("quality", [False, True])
+def test_bc7_flat_opaque_block_stays_opaque(quality):
+    pixels = np.empty((4, 4, 4), dtype=np.uint8)
+    pixels[:] = (200, 100, 50, 255)
+    decoded = decode(encode(pixels, DXGI_BC7_UNORM, quality), 4, 4, DXGI_BC7_UNORM)
+    assert (decoded[..., 3] == 255).all()
+    assert np.abs(decoded[..., :3].astype(int) - pixels[..., :3]).max() <= 1
+
+
+@pytest.mark.parametrize("quality", [False, True])
+def test_bc7_opaque_image_stays_opaque(quality):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (32, 32, 4), dtype=np.uint8)
+    pixels[..., 3] = 255
+    decoded = decode(encode(pixels, DXGI_BC7_UNORM, quality), 32, 32, DXGI_BC7_UNORM)
+    assert (decoded[..., 3] == 255).all()
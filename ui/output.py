@@ -4,6 +4,7 @@ import bpy
 from bpy.props import FloatProperty, StringProperty, BoolProperty, CollectionProperty, PointerProperty
 from bpy.types import Material, UILayout
 
+from ..exporters.texture_export import can_encode
 from ..util import get_export_collections, get_export_collections_materials, label_multiline
 
 class PreprocessingSteps(bpy.types.PropertyGroup):
@@ -345,6 +346,13 @@ def texture_export(layout: UILayout, context: Context):
         box.label(text="None found", icon='INFO')
         return
 
+    row = box.row()
+    row.label(text="PNG/TIF Compression")
+    row.prop(context.scene, "replicant_texture_compression", expand=True)
+    row = box.row()
+    row.label(text="Mipmap Filter")
+    row.prop(context.scene, "replicant_mip_filter", expand=True)
+
     for pack, materials in texture_packs.items():
         pack_box = box.box()
 
@@ -397,11 +405,13 @@ def texture_export(layout: UILayout, context: Context):
                         else:
                             right_split.label(text=f"Mipmaps", icon='CHECKBOX_DEHLT')
                     else:
-                        right_split = split.split(factor=0.5)
-                        right_split.enabled = False
-                        right_split.alert = True
-                        right_split.label(text="Embedded DXGI compression not implemented yet!", icon='X')
-                        right_split.prop(sampler, "dxgi_format", text="")
+                        right_split = split.split(factor=0.6)
+                        format_row = right_split.row()
+                        if can_encode(sampler.dxgi_format):
+                            format_row.prop(sampler, "dxgi_format", text="", icon='MOD_REMESH')
+                        else:
+                            format_row.alert = True
+                            format_row.prop(sampler, "dxgi_format", text="", icon='X')
                         right_split.prop(sampler, "mip_maps", text="Mipmaps")
 
         # Export button
@@ -491,6 +501,15 @@ def archive_export(layout: UILayout, context: Context):
     row = box.row()
     row.scale_y = 2.0
     op = row.operator("export.replicant_archive", text="Export Archive", icon='EXPORT')
+    box.prop(context.scene, "replicant_archive_layout")
+    row = box.row(align=True)
+    row.prop(context.scene, "replicant_archive_zstd_level")
+    row.prop(context.scene, "replicant_archive_min_throughput")
+    row.operator("export.replicant_archive_tune_level", text="", icon='SETTINGS')
+    box.prop(context.scene, "replicant_archive_incremental")
+    box.operator("export.replicant_archive_benchmark_threads", text="Benchmark Compression Threads", icon='TIME')
+    box.operator("export.replicant_archive_dictionary", text="Analyze Dictionary Compression", icon='VIEWZOOM')
+    box.operator("export.replicant_archive_verify", text="Verify Archive", icon='CHECKMARK')
     label_multiline(context, box, "The Replicant2Blender archive exporting functionality is ported from the original UnsealedVerses, which is part of Lunar Tear.")
     row = box.row()
     op = row.operator("replicant.open_url", text="Check out Lunar Tear here")
@@ -511,6 +530,35 @@ def register():
         subtype='FILE_PATH'
     )
 
+    bpy.types.Scene.replicant_archive_zstd_level = bpy.props.IntProperty(
+        name="Compression Level",
+        description="Zstd level archives are compressed at. Higher levels give smaller archives but export slower, the window stays capped so the game can load them",
+        default=1,
+        min=1,
+        max=19
+    )
+    bpy.types.Scene.replicant_archive_layout = bpy.props.EnumProperty(
+        name="Layout",
+        description="Order of the files inside the exported archive",
+        items=[
+            ('NAME', "By Name", "Alphabetical by relative path"),
+            ('IMPORTS', "By Imports", "Each PACK followed by the PACKs it imports, so files loaded together are read sequentially"),
+        ],
+        default='NAME'
+    )
+    bpy.types.Scene.replicant_archive_min_throughput = FloatProperty(
+        name="Min MB/s",
+        description="Slowest compression speed the level tuner may pick, in MB/s per thread",
+        default=50.0,
+        min=0.0
+    )
+
+    bpy.types.Scene.replicant_archive_incremental = bpy.props.BoolProperty(
+        name="Incremental Build",
+        description="Keep a .manifest.json next to the archive and reuse the frames of unchanged files on the next export at the same compression level",
+        default=False
+    )
+
     bpy.types.Scene.replicant_preprocessing_steps = bpy.props.PointerProperty(type=PreprocessingSteps)
 
     bpy.types.Scene.replicant_show_export_sources = bpy.props.BoolProperty(
@@ -533,6 +581,24 @@ def register():
         name="Show Archive Export",
         default=False
     )
+    bpy.types.Scene.replicant_texture_compression = bpy.props.EnumProperty(
+        name="Texture Compression",
+        description="Preset used when compressing PNG/TIF textures to their sampler's DXGI format on export",
+        items=[
+            ('FAST', "Fast", "Fit each block to its bounding box"),
+            ('QUALITY', "Quality", "Fit each block along its principal axis and refine it, several times slower"),
+        ],
+        default='FAST'
+    )
+    bpy.types.Scene.replicant_mip_filter = bpy.props.EnumProperty(
+        name="Mipmap Filter",
+        description="Filter used to downsample PNG/TIF textures into mipmaps on export. _SRGB formats are filtered in linear space",
+        items=[
+            ('BOX', "Box", "Average each 2x2 block, fast and slightly blurry"),
+            ('KAISER', "Kaiser", "Windowed sinc, keeps mips sharper at a few times the cost"),
+        ],
+        default='BOX'
+    )
 
     bpy.types.Collection.replicant_original_mesh_pack = StringProperty(
         name="Original Mesh PACK",
@@ -578,9 +644,15 @@ def unregister():
     del bpy.types.Scene.replicant_show_mesh_export
     del bpy.types.Scene.replicant_show_material_export
     del bpy.types.Scene.replicant_show_texture_export
+    del bpy.types.Scene.replicant_texture_compression
+    del bpy.types.Scene.replicant_mip_filter
     del bpy.types.Collection.replicant_original_mesh_pack
     del bpy.types.Scene.replicant_expanded_texture_packs
     del bpy.types.Scene.replicant_archive_root
+    del bpy.types.Scene.replicant_archive_zstd_level
+    del bpy.types.Scene.replicant_archive_min_throughput
+    del bpy.types.Scene.replicant_archive_layout
+    del bpy.types.Scene.replicant_archive_incremental
     del bpy.types.Collection.replicant_export
 
     # Unregister operators
@@ -2,6 +2,7 @@
 from nt import replace
 import os
 import struct
+import sys
 from typing import Tuple
 import bpy
 from bpy.types import Collection, Context, Material, Object, UILayout
@@ -78,14 +79,148 @@ def generate_converted_texture_paths(samplers) -> list[str]:
 		converted_textures.append(texture_filename_png)
 	return converted_textures
 
+class TextureIndex:
+	"""Filename index of a replicant2blender_extracted directory, walked once and updated as textures are written."""
+	def __init__(self, textures_dir: str):
+		self.textures_dir = os.path.normpath(textures_dir)
+		self.by_basename: dict[str, list[str]] = {}
+		self.by_stem: dict[str, list[str]] = {}
+		self.dir_parts: dict[str, list[str]] = {}
+		self.built = False
+
+	def build(self) -> None:
+		self.by_basename.clear()
+		self.by_stem.clear()
+		self.dir_parts.clear()
+		for root, dirs, files in os.walk(self.textures_dir):
+			# Skip the shared .store, pack folders link every texture in it under its real name
+			dirs[:] = [d for d in dirs if not d.startswith('.')]
+			for file in files:
+				self.add(os.path.join(root, file))
+		self.built = True
+
+	def ensure_built(self) -> None:
+		if not self.built:
+			self.build()
+
+	def add(self, path: str) -> None:
+		path = os.path.normpath(path)
+		directory, basename = os.path.split(path)
+		paths = self.by_basename.setdefault(basename, [])
+		if path in paths:
+			return
+		paths.append(path)
+		self.by_stem.setdefault(os.path.splitext(basename)[0], []).append(path)
+		if directory not in self.dir_parts:
+			rel_path = os.path.relpath(directory, self.textures_dir)
+			self.dir_parts[directory] = [] if rel_path == '.' else rel_path.split(os.sep)
+
+	def find(self, texture_filename: str) -> str | None:
+		self.ensure_built()
+		paths = self.by_basename.get(texture_filename)
+		if not paths:
+			# Fallback to .tif if .png not found (probably HDR)
+			paths = self.by_basename.get(texture_filename.replace(".png", ".tif"))
+		return paths[0] if paths else None
+
+	def find_stem(self, tex_name: str) -> list[str]:
+		self.ensure_built()
+		return self.by_stem.get(tex_name, [])
+
+	def find_pack_path(self, tex_name: str, imports: list[str]) -> str | None:
+		for path in self.find_stem(tex_name):
+			for part in self.dir_parts.get(os.path.dirname(path), []):
+				for import_str in imports:
+					if import_str.endswith(part):
+						return import_str
+		return None
+
+texture_indices: dict[str, TextureIndex] = {}
+
+def get_texture_index(textures_dir: str) -> TextureIndex:
+	key = os.path.normpath(textures_dir)
+	if key not in texture_indices:
+		texture_indices[key] = TextureIndex(key)
+	return texture_indices[key]
+
+# Converted texture filenames of textures decoded straight into Blender images, mapped to the image names
+in_memory_texture_images: dict[str, str] = {}
+
+def clear_texture_indices():
+	texture_indices.clear()
+	in_memory_texture_images.clear()
+	texture_image_cache.clear()
+
 def search_texture(textures_dir: str, texture_filename: str) -> str | None:
-	for root, dirs, files in os.walk(textures_dir):
-		for file in files:
-			if file == texture_filename:
-				return os.path.join(root, file)
-			elif file == texture_filename.replace(".png", ".tif"):	# Fallback to .tif if .png not found (probably HDR)
-				return os.path.join(root, file)
-	return None
+	return get_texture_index(textures_dir).find(texture_filename)
+
+class TextureImageCache:
+	"""Images loaded from disk this import, keyed by resolved path and mtime, so materials sharing a texture share one Image."""
+	def __init__(self):
+		self.images: dict[str, tuple[int, str]] = {}
+		self.loads = 0
+		self.reused = 0
+
+	@staticmethod
+	def resolve(path: str) -> str:
+		return os.path.normcase(os.path.abspath(path))
+
+	def get_cached_image(self, path: str) -> tuple[int, bpy.types.Image] | None:
+		"""The cached (mtime, Image) of a resolved path, unless that Image was deleted, renamed or now points at another file."""
+		cached = self.images.get(path)
+		if cached is None:
+			return None
+		image = bpy.data.images.get(cached[1])
+		if image is None or self.resolve(bpy.path.abspath(image.filepath)) != path:
+			del self.images[path]
+			return None
+		return cached[0], image
+
+	def load(self, path: str) -> bpy.types.Image:
+		path = self.resolve(path)
+		mtime = os.stat(path).st_mtime_ns
+		cached = self.get_cached_image(path)
+		if cached is None:
+			image = bpy.data.images.load(path, check_existing=True)
+			self.loads += 1
+		elif cached[0] != mtime:
+			# The file changed since it was loaded, refresh the existing Image so every user sees the new pixels
+			image = cached[1]
+			image.reload()
+			self.loads += 1
+		else:
+			image = cached[1]
+			self.reused += 1
+		self.images[path] = (mtime, image.name)
+		return image
+
+	def reset_counts(self) -> None:
+		self.loads = 0
+		self.reused = 0
+
+	def clear(self) -> None:
+		self.images.clear()
+		self.reset_counts()
+
+texture_image_cache = TextureImageCache()
+
+def load_texture_image(textures_dir: str, texture_filename: str) -> bpy.types.Image | None:
+	"""Image of a converted texture, preferring one decoded in memory this import over loading it from disk."""
+	for filename in (texture_filename, texture_filename.replace(".png", ".tif")):
+		image_name = in_memory_texture_images.get(filename)
+		if image_name is not None and image_name in bpy.data.images:
+			return bpy.data.images[image_name]
+	texture_path = search_texture(textures_dir, texture_filename)
+	if texture_path is None:
+		log.w(f"Failed to find converted texture {texture_filename}")
+		return None
+	return texture_image_cache.load(texture_path)
+
+def register_texconv_path():
+	"""Make lib/replicant_texconv importable as a top-level package, for us and for spawned worker processes."""
+	lib_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib")
+	if lib_path not in sys.path:
+		sys.path.append(lib_path)
 
 def show_blender_system_console():
 	import os